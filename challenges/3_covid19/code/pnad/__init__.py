@@ -0,0 +1,8 @@
+"""
+Pipeline da PNAD COVID-19 (download, bronze, silver e gold) fora dos notebooks.
+
+As colunas de partição ficam aqui, sem dependências, para que os módulos que só
+leem ou gravam o dataset não precisem importar ``pnad.download`` (``requests``).
+"""
+PREFIX_YEAR = 'ano_part'
+PREFIX_MONTH = 'mes'
@@ -0,0 +1,282 @@
+"""
+Carga das tabelas gold da PNAD COVID-19 no ClickHouse do ``docker-compose.yml``.
+
+A gold (``pnad.local_engine.gold`` ou ``spark_gold``) vira uma tabela
+``MergeTree`` particionada por ``(ano_part, mes)`` e ordenada pelas chaves
+usadas nos filtros do dashboard. A carga é feita pela interface HTTP (porta
+8123) com uma ``requests.Session`` (conexões reaproveitadas):
+
+- cada partição ano/mês é enviada em um único ``INSERT ... FORMAT ArrowStream``,
+  com os ``RecordBatch`` do parquet em stream (sem montar CSV nem carregar
+  tudo em memória);
+- o insert vai para uma tabela de staging e a partição é trocada na tabela
+  final com ``REPLACE PARTITION``: recarregar um mês substitui os dados
+  anteriores, sem duplicar linhas;
+- as materialized views (``MATERIALIZED_VIEWS``) agregam o insert no staging
+  por Brasil e por região, e as partições delas são trocadas junto.
+
+Uso pela linha de comando (a partir de ``code/``)::
+
+    python -m pnad.clickhouse_loader <pasta_gold>/indicadores_uf_mes --url http://localhost:8123
+"""
+import argparse
+import io
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import requests
+from requests.adapters import HTTPAdapter
+
+from pnad import PREFIX_MONTH, PREFIX_YEAR
+from pnad.local_engine import GOLD_INDICATORS, GOLD_TABLE
+
+CLICKHOUSE_URL = os.environ.get('CLICKHOUSE_URL', 'http://localhost:8123')
+CLICKHOUSE_USER = os.environ.get('CLICKHOUSE_USER', 'default')
+CLICKHOUSE_PASSWORD = os.environ.get('CLICKHOUSE_PASSWORD', '')
+DATABASE = os.environ.get('CLICKHOUSE_DATABASE', 'pnad_covid19')
+
+# Linhas por RecordBatch enviado no stream
+BATCH_SIZE = 500_000
+
+STAGING_SUFFIX = '_staging'
+
+REGIONS = {
+    'Norte': ['Rondônia', 'Acre', 'Amazonas', 'Roraima', 'Pará', 'Amapá', 'Tocantins'],
+    'Nordeste': ['Maranhão', 'Piauí', 'Ceará', 'Rio Grande do Norte', 'Paraíba', 'Pernambuco', 'Alagoas',
+                 'Sergipe', 'Bahia'],
+    'Sudeste': ['Minas Gerais', 'Espírito Santo', 'Rio de Janeiro', 'São Paulo'],
+    'Sul': ['Paraná', 'Santa Catarina', 'Rio Grande do Sul'],
+    'Centro-Oeste': ['Mato Grosso do Sul', 'Mato Grosso', 'Goiás', 'Distrito Federal'],
+}
+
+_MEASURES = ['populacao', 'entrevistas'] + list(GOLD_INDICATORS)
+
+
+def _quote(value):
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _sums():
+    return ', '.join(f'sum({column}) AS {column}' for column in _MEASURES)
+
+
+def _region_expression():
+    states = [state for region in REGIONS for state in REGIONS[region]]
+    regions = [region for region in REGIONS for _ in REGIONS[region]]
+    return (f"transform(UF, [{', '.join(map(_quote, states))}], "
+            f"[{', '.join(map(_quote, regions))}], 'Ignorado')")
+
+
+def gold_table_ddl(name):
+    """``CREATE TABLE`` da gold: uma linha por ano, mês e UF."""
+    indicators = ''.join(f',\n    {column} Float64' for column in GOLD_INDICATORS)
+    return f"""
+CREATE TABLE IF NOT EXISTS {name} (
+    {PREFIX_YEAR} UInt16,
+    {PREFIX_MONTH} UInt8,
+    UF LowCardinality(String),
+    populacao Float64,
+    entrevistas UInt64{indicators}
+)
+ENGINE = MergeTree
+PARTITION BY ({PREFIX_YEAR}, {PREFIX_MONTH})
+ORDER BY (UF, {PREFIX_YEAR}, {PREFIX_MONTH})
+"""
+
+
+def aggregate_table_ddl(name, keys):
+    """``CREATE TABLE`` de destino de uma materialized view (``SummingMergeTree`` pelas ``keys``)."""
+    key_columns = ''.join(f'    {key} LowCardinality(String),\n' for key in keys)
+    measures = ',\n'.join(
+        f"    {column} {'UInt64' if column == 'entrevistas' else 'Float64'}" for column in _MEASURES
+    )
+    return f"""
+CREATE TABLE IF NOT EXISTS {name} (
+    {PREFIX_YEAR} UInt16,
+    {PREFIX_MONTH} UInt8,
+{key_columns}{measures}
+)
+ENGINE = SummingMergeTree
+PARTITION BY ({PREFIX_YEAR}, {PREFIX_MONTH})
+ORDER BY ({', '.join(keys + [PREFIX_YEAR, PREFIX_MONTH])})
+"""
+
+
+# Materialized views dos indicadores do dashboard: nome -> (chaves, expressões das chaves)
+MATERIALIZED_VIEWS = {
+    'indicadores_brasil_mes': ([], []),
+    'indicadores_regiao_mes': (['regiao'], [_region_expression()]),
+}
+
+
+class ClickHouseClient:
+    """
+    Cliente mínimo da interface HTTP do ClickHouse, com conexões reaproveitadas.
+
+    Parâmetros
+    ----------
+    url, user, password : str, opcional
+        Padrão: variáveis de ambiente ``CLICKHOUSE_URL``, ``CLICKHOUSE_USER`` e ``CLICKHOUSE_PASSWORD``.
+    pool_size : int, opcional, default=4
+    timeout : int, opcional, default=300
+    """
+
+    def __init__(self, url=CLICKHOUSE_URL, user=CLICKHOUSE_USER, password=CLICKHOUSE_PASSWORD,
+                 pool_size=4, timeout=300):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'X-ClickHouse-User': user, 'X-ClickHouse-Key': password})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def execute(self, query, data=None, **settings):
+        """Executa ``query`` (``data`` é o corpo do insert: bytes ou iterador de bytes). Retorna o texto da resposta."""
+        params = {'query': query, **settings} if data is not None else settings
+        body = data if data is not None else query.encode('utf-8')
+        response = self.session.post(self.url, params=params, data=body, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"ClickHouse ({response.status_code}): {response.text.strip()}")
+        return response.text
+
+    def insert_arrow(self, table_name, schema, batches, **settings):
+        """``INSERT INTO table_name FORMAT ArrowStream`` com os ``batches`` enviados em stream."""
+        return self.execute(f'INSERT INTO {table_name} FORMAT ArrowStream', data=arrow_stream(schema, batches),
+                            **settings)
+
+    def close(self):
+        self.session.close()
+
+
+def arrow_stream(schema, batches):
+    """
+    Serializa ``batches`` no formato Arrow IPC stream, um bloco de bytes por ``RecordBatch``.
+
+    Retorno
+    -------
+    iterador de bytes
+    """
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def create_schema(client, database=DATABASE, table=GOLD_TABLE):
+    """
+    Cria banco, tabela gold, tabelas de staging e materialized views (idempotente).
+
+    As views leem do staging da gold e gravam no staging de cada agregado; a
+    troca de partição (``load_partition``) leva os dois para as tabelas finais.
+    """
+    client.execute(f'CREATE DATABASE IF NOT EXISTS {database}')
+    gold, gold_staging = f'{database}.{table}', f'{database}.{table}{STAGING_SUFFIX}'
+    client.execute(gold_table_ddl(gold))
+    client.execute(f'CREATE TABLE IF NOT EXISTS {gold_staging} AS {gold}')
+
+    for name, (keys, expressions) in MATERIALIZED_VIEWS.items():
+        target, target_staging = f'{database}.{name}', f'{database}.{name}{STAGING_SUFFIX}'
+        client.execute(aggregate_table_ddl(target, keys))
+        client.execute(f'CREATE TABLE IF NOT EXISTS {target_staging} AS {target}')
+        select_keys = ''.join(f'{expression} AS {key}, ' for key, expression in zip(keys, expressions))
+        group_by = ', '.join([PREFIX_YEAR, PREFIX_MONTH] + keys)
+        client.execute(f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {database}.mv_{name} TO {target_staging} AS
+SELECT {PREFIX_YEAR}, {PREFIX_MONTH}, {select_keys}{_sums()}
+FROM {gold_staging}
+GROUP BY {group_by}
+""")
+
+
+def partitions(dataset):
+    """Pares ``(ano, mês)`` presentes no dataset gold."""
+    table = dataset.to_table(columns=[PREFIX_YEAR, PREFIX_MONTH])
+    pairs = table.group_by([PREFIX_YEAR, PREFIX_MONTH]).aggregate([])
+    return sorted(zip(pairs.column(PREFIX_YEAR).to_pylist(), pairs.column(PREFIX_MONTH).to_pylist()))
+
+
+def load_partition(client, dataset, year, month, database=DATABASE, table=GOLD_TABLE, batch_size=BATCH_SIZE):
+    """
+    Carrega (ou recarrega) uma partição ano/mês da gold e dos agregados.
+
+    1. limpa a partição nos stagings (sobras de uma carga interrompida);
+    2. envia as linhas do mês para o staging da gold (as views preenchem os stagings dos agregados);
+    3. ``REPLACE PARTITION`` de cada staging na tabela final;
+    4. limpa a partição nos stagings.
+
+    Retorno
+    -------
+    n_rows : int
+    """
+    partition = f'({int(year)}, {int(month)})'
+    tables = [table] + list(MATERIALIZED_VIEWS)
+
+    def drop_staging():
+        for name in tables:
+            client.execute(f'ALTER TABLE {database}.{name}{STAGING_SUFFIX} DROP PARTITION {partition}')
+
+    drop_staging()
+    scanner = dataset.scanner(
+        filter=(pc.field(PREFIX_YEAR) == int(year)) & (pc.field(PREFIX_MONTH) == int(month)), batch_size=batch_size
+    )
+    n_rows = 0
+
+    def batches():
+        nonlocal n_rows
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                n_rows += batch.num_rows
+                yield batch
+
+    client.insert_arrow(f'{database}.{table}{STAGING_SUFFIX}', scanner.projected_schema, batches())
+    for name in tables:
+        client.execute(f'ALTER TABLE {database}.{name} REPLACE PARTITION {partition} FROM {database}.{name}{STAGING_SUFFIX}')
+    drop_staging()
+    return n_rows
+
+
+def load_gold(gold_path, client=None, database=DATABASE, table=GOLD_TABLE, batch_size=BATCH_SIZE):
+    """
+    Cria o schema e carrega todas as partições de uma tabela gold em parquet.
+
+    Parâmetros
+    ----------
+    gold_path : str
+        Pasta da tabela gold (ex.: ``<gold>/indicadores_uf_mes``).
+    client : ClickHouseClient, opcional
+
+    Retorno
+    -------
+    rows : dict
+        ``(ano, mês)`` -> linhas carregadas.
+    """
+    client = client or ClickHouseClient()
+    dataset = ds.dataset(gold_path, format='parquet', partitioning='hive')
+    create_schema(client, database, table)
+    return {
+        (year, month): load_partition(client, dataset, year, month, database, table, batch_size)
+        for year, month in partitions(dataset)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Carga da gold da PNAD COVID-19 no ClickHouse.')
+    parser.add_argument('gold_path')
+    parser.add_argument('--url', default=CLICKHOUSE_URL)
+    parser.add_argument('--database', default=DATABASE)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = load_gold(args.gold_path, ClickHouseClient(args.url), args.database, batch_size=args.batch_size)
+    for (year, month), n_rows in rows.items():
+        print(f"{PREFIX_YEAR}={year}/{PREFIX_MONTH}={month}: {n_rows} linhas")
+    print(f"Total: {sum(rows.values())} linhas em {time.perf_counter() - start:.1f}s -> {args.url}")
@@ -0,0 +1,225 @@
+"""
+Decodificação vetorizada código -> descrição dos microdados da PNAD COVID-19.
+
+Nos notebooks, ``DICIONARIO_VALORES`` e ``DICIONARIO_CODIGOS`` são lidos do
+Excel (``dtype=str``) e os códigos são substituídos pela descrição coluna a
+coluna. Aqui o dicionário é compilado uma vez em, para cada coluna
+codificada, um array ``posição[código]`` e a lista de descrições; o resultado
+fica em um ``.npz`` pequeno ao lado do Excel (invalidado pelo sha256 do
+Excel), então o Excel só é lido quando muda.
+
+A decodificação de uma coluna é uma indexação de array e o resultado é
+categórico (``pd.Categorical`` ou ``pa.DictionaryArray``): cada descrição é
+guardada uma vez por coluna, não uma vez por linha.
+
+Uso pela linha de comando (a partir de ``code/``)::
+
+    python -m pnad.decoder <bronze_parquet> <silver_parquet>
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from pnad.dictionary import DICTIONARY_PATH, read_dictionary
+
+CACHE_FORMAT_VERSION = 1
+
+_CODE = re.compile(r'^\s*\d+\s*$')
+
+
+def _sha256_of(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def compile_dictionary(df_codigos, df_valores):
+    """
+    Compila o dicionário em arrays de consulta por coluna.
+
+    Só colunas em que todos os ``SUB_CODIGO`` são códigos inteiros (``'1'``,
+    ``'01 '``) são decodificadas; faixas (``'01 a 30'``), valores em reais e
+    pesos continuam numéricos.
+
+    Retorno
+    -------
+    lookups : dict
+        Coluna -> ``(positions, labels)``: ``positions[código]`` é a posição da
+        descrição em ``labels`` (``-1`` para códigos fora do dicionário).
+    descriptions : dict
+        Coluna -> descrição (``DICIONARIO_CODIGOS``).
+    """
+    lookups = {}
+    for column, group in df_valores.dropna(subset=['SUB_CODIGO']).groupby('CODIGO', sort=False):
+        sub_codes = group['SUB_CODIGO'].astype(str)
+        if not sub_codes.str.match(_CODE).all():
+            continue
+        codes = sub_codes.str.strip().astype(int).to_numpy()
+        descriptions = group['DESCRICAO'].fillna('').astype(str).str.strip()
+        labels = list(dict.fromkeys(descriptions))
+        label_position = {label: i for i, label in enumerate(labels)}
+
+        positions = np.full(codes.max() + 1, -1, dtype=np.int32)
+        positions[codes] = [label_position[description] for description in descriptions]
+        lookups[column.strip()] = (positions, labels)
+
+    descriptions = {
+        code.strip(): str(description).strip()
+        for code, description in zip(df_codigos['CODIGO'], df_codigos['DESCRICAO'])
+    }
+    return lookups, descriptions
+
+
+def _save(cache_path, source_sha256, lookups, descriptions):
+    arrays = {
+        '__version': np.array(CACHE_FORMAT_VERSION),
+        '__source_sha256': np.array(source_sha256),
+        '__description_columns': np.array(list(descriptions), dtype=str),
+        '__description_values': np.array(list(descriptions.values()), dtype=str),
+    }
+    for column, (positions, labels) in lookups.items():
+        arrays[f'positions/{column}'] = positions
+        arrays[f'labels/{column}'] = np.array(labels, dtype=str)
+    tmp_path = f'{cache_path}.tmp.npz'
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, cache_path)
+
+
+def _load(cache_path, source_sha256):
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            if int(data['__version']) != CACHE_FORMAT_VERSION or str(data['__source_sha256']) != source_sha256:
+                return None
+            lookups = {
+                key[len('positions/'):]: (data[key], data[f"labels/{key[len('positions/'):]}"].tolist())
+                for key in data.files if key.startswith('positions/')
+            }
+            descriptions = dict(zip(data['__description_columns'].tolist(), data['__description_values'].tolist()))
+    except (OSError, KeyError, ValueError):
+        return None
+    return lookups, descriptions
+
+
+class PnadDecoder:
+    """
+    Decodificador compilado do dicionário da PNAD COVID-19.
+    """
+
+    def __init__(self, lookups, descriptions):
+        self.lookups = lookups
+        self.descriptions = descriptions
+        # Categorias prontas (criadas uma vez por coluna)
+        self._categories = {column: pd.Index(labels) for column, (_, labels) in lookups.items()}
+        self._arrow_labels = {column: pa.array(labels, pa.string()) for column, (_, labels) in lookups.items()}
+
+    @classmethod
+    def load(cls, dictionary_path=DICTIONARY_PATH, cache_path=None):
+        """
+        Decodificador do dicionário, usando o cache ``.npz`` se ele estiver atualizado.
+
+        Parâmetros
+        ----------
+        dictionary_path : str, opcional
+            ``dicionario_pnad_covid.xlsx``.
+        cache_path : str, opcional
+            Artefato compilado. Padrão: ``<dictionary_path>.decoder.npz``.
+        """
+        cache_path = cache_path or f'{dictionary_path}.decoder.npz'
+        source_sha256 = _sha256_of(dictionary_path)
+        cached = _load(cache_path, source_sha256)
+        if cached is None:
+            cached = compile_dictionary(*read_dictionary(dictionary_path))
+            _save(cache_path, source_sha256, *cached)
+        return cls(*cached)
+
+    @property
+    def columns(self):
+        """Colunas decodificáveis."""
+        return list(self.lookups)
+
+    def _positions(self, column, values):
+        positions, _ = self.lookups[column]
+        values = pd.to_numeric(pd.Series(values, copy=False), errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(values) & (values >= 0) & (values < len(positions)) & (values == np.floor(values))
+        result = np.full(len(values), -1, dtype=np.int32)
+        result[valid] = positions[values[valid].astype(np.int64)]
+        return result
+
+    def decode(self, column, values):
+        """
+        Códigos de uma coluna -> ``pd.Categorical`` com as descrições.
+
+        Códigos nulos ou fora do dicionário ficam nulos.
+        """
+        return pd.Categorical.from_codes(self._positions(column, values), categories=self._categories[column])
+
+    def decode_frame(self, df, columns=None):
+        """
+        Decodifica as colunas codificadas de um DataFrame (as demais ficam iguais).
+
+        Retorno
+        -------
+        df : pd.DataFrame
+            Cópia com as colunas decodificadas como ``category``.
+        """
+        columns = [column for column in (columns or self.columns) if column in df.columns and column in self.lookups]
+        decoded = {column: self.decode(column, df[column].to_numpy()) for column in columns}
+        return df.assign(**{column: pd.Series(values, index=df.index) for column, values in decoded.items()})
+
+    def decode_table(self, table, columns=None):
+        """
+        Decodifica as colunas codificadas de uma ``pa.Table`` em colunas ``dictionary<int32, string>``.
+        """
+        columns = [column for column in (columns or self.columns) if column in table.column_names and column in self.lookups]
+        for column in columns:
+            positions = self._positions(column, table.column(column).to_numpy(zero_copy_only=False))
+            indices = pa.array(positions, type=pa.int32(), mask=positions < 0)
+            decoded = pa.DictionaryArray.from_arrays(indices, self._arrow_labels[column])
+            table = table.set_column(table.schema.get_field_index(column), column, decoded)
+        return table
+
+    def rename_map(self, columns=None):
+        """Coluna -> descrição (``DICIONARIO_CODIGOS``), para renomear as colunas."""
+        return {column: self.descriptions[column] for column in (columns or self.descriptions) if column in self.descriptions}
+
+
+def decode_dataset(input_path, output_path, decoder=None, columns=None):
+    """
+    Decodifica um dataset parquet particionado (hive), um arquivo por vez.
+
+    A memória usada é a de um arquivo (uma partição ano/mês); a saída mantém o
+    mesmo caminho relativo de cada arquivo.
+
+    Retorno
+    -------
+    n_rows : int
+    """
+    decoder = decoder or PnadDecoder.load()
+    dataset = ds.dataset(input_path, format='parquet', partitioning='hive')
+    n_rows = 0
+    for fragment in dataset.get_fragments():
+        table = decoder.decode_table(pq.read_table(fragment.path), columns)
+        target = os.path.join(output_path, os.path.relpath(fragment.path, input_path))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        pq.write_table(table, target)
+        n_rows += table.num_rows
+    return n_rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Decodifica códigos da PNAD COVID-19 em descrições (categóricas).')
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--dictionary', default=DICTIONARY_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_rows = decode_dataset(args.input_path, args.output_path, PnadDecoder.load(args.dictionary))
+    print(f"{n_rows} linhas decodificadas em {time.perf_counter() - start:.1f}s -> {args.output_path}")
@@ -0,0 +1,86 @@
+"""
+Leitura do dicionário da PNAD COVID-19 (``dicionario_pnad_covid.xlsx``).
+
+O dicionário tem duas abas:
+
+- ``DICIONARIO_CODIGOS``: ``CODIGO`` (coluna dos microdados) e ``DESCRICAO``;
+- ``DICIONARIO_VALORES``: ``CODIGO``, ``SUB_CODIGO`` (valor ou faixa, ex.:
+  ``'1'``, ``'01 a 30'``, ``'valor em reais'``) e ``DESCRICAO``.
+
+``column_types`` deriva daí o tipo de cada coluna dos microdados, usado na
+conversão para parquet (``pnad.to_parquet``) no lugar de ler tudo como string.
+"""
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+
+DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'docs',
+                               'dicionario_pnad_covid.xlsx')
+
+SHEET_CODES = 'DICIONARIO_CODIGOS'
+SHEET_VALUES = 'DICIONARIO_VALORES'
+
+_CODE = re.compile(r'^\s*\d+\s*$')
+_RANGE = re.compile(r'^\s*(\d+)\s+a\s+(\d+)\s*$')
+
+
+def read_dictionary(path=DICTIONARY_PATH):
+    """
+    Abas do dicionário, como no ``pre_processing.ipynb`` (todas as colunas ``str``).
+
+    Retorno
+    -------
+    df_codigos, df_valores : pd.DataFrame
+    """
+    df_codigos = pd.read_excel(path, sheet_name=SHEET_CODES, dtype=str)
+    df_valores = pd.read_excel(path, sheet_name=SHEET_VALUES, dtype=str)
+    return df_codigos, df_valores
+
+
+def _column_type(sub_codes):
+    sub_codes = [str(sub_code).strip() for sub_code in sub_codes if isinstance(sub_code, str)]
+    text = ' '.join(sub_codes).lower()
+    # Valores monetários e pesos amostrais
+    if 'reais' in text or 'casas decimais' in text:
+        return pa.float64()
+    # Códigos e faixas pequenas (UF, respostas, idade, horas, ano de nascimento)
+    if sub_codes and 'ano de referência' in text:
+        return pa.int16()
+    upper_bounds = []
+    for sub_code in sub_codes:
+        if _CODE.match(sub_code):
+            upper_bounds.append(int(sub_code))
+        elif _RANGE.match(sub_code):
+            upper_bounds.append(int(_RANGE.match(sub_code).group(2)))
+        else:
+            upper_bounds = None
+            break
+    if upper_bounds and max(upper_bounds) < 2 ** 15:
+        return pa.int16()
+    # Identificadores e contagens (Estrato, UPA, posest, projeção da população)
+    return pa.int64()
+
+
+def column_types(df_codigos, df_valores):
+    """
+    Tipo (pyarrow) de cada coluna dos microdados.
+
+    - ``float64``: valores em reais e pesos (``'valor em reais'``, ``'... casas decimais'``);
+    - ``int16``: códigos e faixas numéricas (``'1'``, ``'01 a 30'``) e o ano;
+    - ``int64``: demais colunas numéricas (identificadores e contagens).
+
+    Vazios nos microdados ("Não aplicável") ficam nulos.
+
+    Retorno
+    -------
+    types : dict
+        Coluna -> ``pa.DataType``.
+    """
+    types = {}
+    for code, group in df_valores.groupby('CODIGO', sort=False):
+        types[code.strip()] = _column_type(group['SUB_CODIGO'].tolist())
+    for code in df_codigos['CODIGO']:
+        types.setdefault(code.strip(), pa.int16() if code.strip() == 'Ano' else pa.int64())
+    return types
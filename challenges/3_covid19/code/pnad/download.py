@@ -0,0 +1,237 @@
+"""
+Download concorrente e retomável dos microdados da PNAD COVID-19.
+
+O ``ingest.ipynb`` baixava um zip por vez (``download_file`` com blocos de 8 KB)
+em um laço ano x mês. Aqui:
+
+- os arquivos são baixados em paralelo por um pool limitado de threads, cada
+  uma com a sua ``requests.Session`` (conexões reaproveitadas);
+- a escrita é feita em blocos grandes (``chunk_size``) em um arquivo
+  ``.part``, renomeado só depois da verificação;
+- um ``.part`` existente é retomado com ``Range: bytes=<tamanho>-`` (se o
+  servidor responder ``200`` em vez de ``206`` o download recomeça);
+- ao final o tamanho é conferido com o ``Content-Length`` e, se informado,
+  o ``sha256``; os metadados ficam em ``<arquivo>.meta.json``;
+- arquivos já atualizados (mesmo tamanho e mesmo ``ETag``/``Last-Modified``
+  do servidor) não são baixados de novo.
+
+Uso pela linha de comando (a partir de ``code/``)::
+
+    python -m pnad.download /Volumes/fiap_postech_covid19_pnad/ingest/ingest_raw/zip --workers 7
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pnad import PREFIX_MONTH, PREFIX_YEAR
+
+BASE_DOWNLOAD_URL_MICRO_DATA = 'https://ftp.ibge.gov.br/Trabalho_e_Rendimento/Pesquisa_Nacional_por_Amostra_de_Domicilios_PNAD_COVID19/Microdados/Dados/PNAD_COVID_{month}{year}.zip'
+
+LIST_AVAILABLE_MONTHS = ['05', '06', '07', '08', '09', '10', '11']
+LIST_AVAILABLE_YEARS = ['2020']
+
+# Buffer de escrita em disco e tamanho de cada leitura da rede (o que já foi lido
+# fica no ``.part`` se a conexão cair)
+CHUNK_SIZE = 4 * 1024 * 1024
+READ_SIZE = 256 * 1024
+
+_local = threading.local()
+
+
+def _session(pool_size):
+    # Uma sessão por thread (``requests.Session`` não é thread-safe)
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
+
+def micro_data_jobs(download_path, years=LIST_AVAILABLE_YEARS, months=LIST_AVAILABLE_MONTHS,
+                    base_url=BASE_DOWNLOAD_URL_MICRO_DATA):
+    """
+    Lista de downloads (``url``, ``path``) no mesmo layout do ``process_micro_data``.
+
+    Retorno
+    -------
+    jobs : list of dict
+        ``{'url', 'path', 'year', 'month'}`` com ``path`` em
+        ``<download_path>/ano_part=<ano>/mes=<mês>/<mês>-<ano>.zip``.
+    """
+    jobs = []
+    for year in years:
+        for month in months:
+            path = os.path.join(download_path, f'{PREFIX_YEAR}={year}', f'{PREFIX_MONTH}={month}', f'{month}-{year}.zip')
+            jobs.append({'url': base_url.format(year=year, month=month), 'path': path, 'year': year, 'month': month})
+    return jobs
+
+
+def _read_meta(path):
+    try:
+        with open(f'{path}.meta.json', 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _remote_meta(response):
+    size = response.headers.get('Content-Length')
+    return {
+        'size': int(size) if size is not None else None,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def _is_current(path, meta, remote, sha256):
+    if meta is None or not os.path.exists(path):
+        return False
+    if os.path.getsize(path) != meta.get('size'):
+        return False
+    if sha256 is not None and meta.get('sha256') != sha256:
+        return False
+    if remote['size'] is not None and remote['size'] != meta.get('size'):
+        return False
+    # Sem ETag/Last-Modified no servidor, o tamanho é o único critério
+    for field in ('etag', 'last_modified'):
+        if remote[field] is not None and remote[field] != meta.get(field):
+            return False
+    return True
+
+
+def _sha256_of(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_file(url, path, sha256=None, chunk_size=CHUNK_SIZE, retries=3, timeout=60, pool_size=8):
+    """
+    Baixa ``url`` em ``path`` com retomada, verificação e escrita em blocos grandes.
+
+    Parâmetros
+    ----------
+    url : str
+    path : str
+        Arquivo final (o download parcial fica em ``<path>.part``).
+    sha256 : str, opcional
+        Hash esperado; se omitido, só o tamanho é verificado.
+    chunk_size : int, opcional, default=4 MiB
+        Tamanho do buffer de escrita.
+    retries : int, opcional, default=3
+        Novas tentativas (retomando do ``.part``) em erros de rede ou de verificação.
+
+    Retorno
+    -------
+    result : dict
+        ``{'url', 'path', 'status', 'bytes', 'seconds'}``; ``status`` é
+        ``'skipped'`` (já atualizado) ou ``'downloaded'``.
+    """
+    start = time.perf_counter()
+    session = _session(pool_size)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    part_path = f'{path}.part'
+
+    head = session.head(url, allow_redirects=True, timeout=timeout)
+    head.raise_for_status()
+    remote = _remote_meta(head)
+    if _is_current(path, _read_meta(path), remote, sha256):
+        return {'url': url, 'path': path, 'status': 'skipped', 'bytes': 0, 'seconds': time.perf_counter() - start}
+
+    n_bytes, digest = 0, None
+    for attempt in range(retries + 1):
+        try:
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if remote['size'] is not None and offset > remote['size']:
+                offset = 0
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            if offset and (remote['etag'] or remote['last_modified']):
+                headers['If-Range'] = remote['etag'] or remote['last_modified']
+
+            with session.get(url, stream=True, headers=headers, timeout=timeout) as response:
+                # 206: continua o ``.part``; 416: range além do fim (``.part`` já completo);
+                # 200: o servidor ignorou o range ou o arquivo mudou, recomeça do zero
+                if response.status_code != 416:
+                    if response.status_code != 206:
+                        response.raise_for_status()
+                    mode = 'ab' if response.status_code == 206 else 'wb'
+                    with open(part_path, mode, buffering=chunk_size) as file:
+                        for chunk in response.iter_content(chunk_size=READ_SIZE):
+                            file.write(chunk)
+                            n_bytes += len(chunk)
+
+            size = os.path.getsize(part_path)
+            if remote['size'] is not None and size != remote['size']:
+                raise IOError(f"Tamanho inválido para {url}: {size} bytes, esperado {remote['size']}")
+            digest = _sha256_of(part_path, chunk_size) if sha256 is not None else None
+            if sha256 is not None and digest != sha256:
+                os.remove(part_path)
+                raise IOError(f"sha256 inválido para {url}: {digest}")
+            break
+        except requests.HTTPError:
+            raise
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, IOError):
+            if attempt == retries:
+                raise
+            time.sleep(min(2 ** attempt, 30))
+
+    os.replace(part_path, path)
+    with open(f'{path}.meta.json', 'w', encoding='utf-8') as file:
+        json.dump({**remote, 'size': os.path.getsize(path), 'url': url, 'sha256': digest}, file)
+    return {'url': url, 'path': path, 'status': 'downloaded', 'bytes': n_bytes, 'seconds': time.perf_counter() - start}
+
+
+def download_all(jobs, max_workers=4, **kwargs):
+    """
+    Baixa uma lista de arquivos com um pool limitado de threads.
+
+    Parâmetros
+    ----------
+    jobs : list of dict
+        Itens com ``url`` e ``path`` (e opcionalmente ``sha256``), ex.: ``micro_data_jobs``.
+    max_workers : int, opcional, default=4
+        Downloads simultâneos.
+    **kwargs
+        Repassados para ``download_file``.
+
+    Retorno
+    -------
+    results : list of dict
+        Resultado de cada ``download_file``, na ordem de ``jobs``.
+    """
+    results = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(download_file, job['url'], job['path'], job.get('sha256'),
+                            pool_size=max_workers, **kwargs): position
+            for position, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Download dos microdados da PNAD COVID-19.')
+    parser.add_argument('download_path')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--years', nargs='+', default=LIST_AVAILABLE_YEARS)
+    parser.add_argument('--months', nargs='+', default=LIST_AVAILABLE_MONTHS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for result in download_all(micro_data_jobs(args.download_path, args.years, args.months), args.workers):
+        print(f"{result['status']:>10} {result['bytes'] / 1e6:8.1f} MB {result['seconds']:6.1f}s {result['path']}")
+    print(f"Total: {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,286 @@
+"""
+Pipeline bronze -> silver -> gold da PNAD COVID-19 sem cluster Spark.
+
+Os notebooks rodam em Databricks/Spark; para alguns GB de microdados o custo
+de subir a JVM e de ``toPandas()`` é maior que o das transformações. Este
+módulo executa as mesmas etapas com Arrow (``pyarrow.dataset`` +
+``pyarrow.compute``, multithread) sobre o parquet particionado:
+
+- bronze: zips -> parquet tipado (``pnad.to_parquet``);
+- silver: seleção de ``SILVER_COLUMNS`` e troca dos códigos pelas descrições
+  (``pnad.decoder``), partição por partição;
+- gold: indicadores mensais por UF ponderados pelo peso amostral ``V1032``
+  (``GOLD_INDICATORS``), em parquet e CSV para o Power BI.
+
+``spark_silver``/``spark_gold`` são novos: os notebooks só têm a etapa bronze
+em Spark (CSV -> parquet no ``pre_processing.ipynb``); eles reescrevem silver e
+gold em PySpark para servir de referência. ``parity_check`` roda os dois
+caminhos sobre o mesmo bronze e compara silver e gold (o bronze não entra na
+comparação). Teste: ``python -m unittest discover -s tests`` (a partir de
+``code/``; a paridade é pulada sem ``pyspark``).
+
+Uso pela linha de comando (a partir de ``code/``)::
+
+    python -m pnad.local_engine <pasta_zip> <pasta_saida>
+"""
+import argparse
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from pnad import PREFIX_MONTH, PREFIX_YEAR
+from pnad.decoder import PnadDecoder
+from pnad.dictionary import DICTIONARY_PATH
+from pnad.to_parquet import convert_micro_data
+
+PARTITION_COLUMNS = [PREFIX_YEAR, PREFIX_MONTH]
+
+# Colunas do silver: localização, perfil, sintomas, atendimento, testes, trabalho e auxílio
+SILVER_COLUMNS = [
+    'Ano', 'V1013', 'UF', 'CAPITAL', 'V1022', 'V1023', 'A002', 'A003', 'A004', 'A005',
+    'B0011', 'B0012', 'B0013', 'B0014', 'B0015', 'B0016', 'B0017', 'B0018', 'B0019',
+    'B00110', 'B00111', 'B00112', 'B00113', 'B002', 'B005', 'B009A', 'B009B', 'B011',
+    'C001', 'C013', 'D0051', 'V1032',
+]
+
+WEIGHT_COLUMN = 'V1032'
+GOLD_KEYS = PARTITION_COLUMNS + ['UF']
+
+# Indicador -> (coluna do silver, descrição contada); soma do peso ``V1032``
+GOLD_INDICATORS = {
+    'pop_febre': ('B0011', 'Sim'),
+    'pop_tosse': ('B0012', 'Sim'),
+    'pop_dificuldade_respirar': ('B0014', 'Sim'),
+    'pop_perda_cheiro_sabor': ('B00111', 'Sim'),
+    'pop_procurou_atendimento': ('B002', 'Sim'),
+    'pop_internada': ('B005', 'Sim'),
+    'pop_fez_swab': ('B009A', 'Sim'),
+    'pop_swab_positivo': ('B009B', 'Positivo'),
+    'pop_isolamento_rigoroso': ('B011', 'Ficou rigorosamente em casa'),
+    'pop_trabalhou': ('C001', 'Sim'),
+    'pop_home_office': ('C013', 'Sim'),
+    'pop_auxilio_emergencial': ('D0051', 'Sim'),
+}
+
+GOLD_TABLE = 'indicadores_uf_mes'
+
+
+def bronze(download_path, bronze_path, dictionary_path=DICTIONARY_PATH, **kwargs):
+    """Bronze: zips -> parquet tipado particionado (``pnad.to_parquet.convert_micro_data``)."""
+    return convert_micro_data(download_path, bronze_path, dictionary_path, **kwargs)
+
+
+def silver(bronze_path, silver_path, decoder=None, columns=SILVER_COLUMNS):
+    """
+    Silver: colunas selecionadas, com códigos trocados pelas descrições.
+
+    Cada arquivo do bronze (uma partição ano/mês) é lido só com as colunas
+    necessárias e gravado no mesmo caminho relativo; colunas ausentes em um mês
+    ficam nulas, para que todas as partições tenham o mesmo schema.
+
+    Retorno
+    -------
+    n_rows : int
+    """
+    decoder = decoder or PnadDecoder.load()
+    shutil.rmtree(silver_path, ignore_errors=True)
+    dataset = ds.dataset(bronze_path, format='parquet', partitioning='hive')
+
+    n_rows = 0
+    for fragment in dataset.get_fragments():
+        available = set(fragment.physical_schema.names)
+        table = pq.read_table(fragment.path, columns=[column for column in columns if column in available])
+        for column in columns:
+            if column not in available:
+                table = table.append_column(column, pa.nulls(table.num_rows, pa.float64() if column == WEIGHT_COLUMN else pa.int64()))
+        table = decoder.decode_table(table.select(columns))
+
+        target = os.path.join(silver_path, os.path.relpath(fragment.path, bronze_path))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        pq.write_table(table, target)
+        n_rows += table.num_rows
+    return n_rows
+
+
+def gold(silver_path, gold_path, indicators=GOLD_INDICATORS):
+    """
+    Gold: indicadores por ano, mês e UF (soma de ``V1032`` de quem responde cada descrição).
+
+    Grava ``<gold_path>/indicadores_uf_mes/part-0.parquet`` e ``<gold_path>/indicadores_uf_mes.csv``.
+
+    Retorno
+    -------
+    table : pa.Table
+    """
+    columns = sorted({column for column, _ in indicators.values()} | {'UF', WEIGHT_COLUMN})
+    table = ds.dataset(silver_path, format='parquet', partitioning='hive').to_table(columns=columns + PARTITION_COLUMNS)
+
+    weight = table.column(WEIGHT_COLUMN)
+    aggregations = [(WEIGHT_COLUMN, 'sum'), ([], 'count_all')]
+    for name, (column, label) in indicators.items():
+        values = pc.cast(table.column(column), pa.string())
+        matches = pc.fill_null(pc.equal(values, label), False)
+        table = table.append_column(name, pc.if_else(matches, weight, pa.scalar(0.0)))
+        aggregations.append((name, 'sum'))
+
+    keys = GOLD_KEYS
+    table = table.select(keys + [WEIGHT_COLUMN] + list(indicators))
+    table = table.set_column(table.schema.get_field_index('UF'), 'UF', pc.cast(table.column('UF'), pa.string()))
+    result = table.group_by(keys, use_threads=True).aggregate(aggregations)
+    result = result.rename_columns([
+        {f'{WEIGHT_COLUMN}_sum': 'populacao', 'count_all': 'entrevistas'}.get(name, name.removesuffix('_sum'))
+        for name in result.column_names
+    ])
+    result = result.select(keys + ['populacao', 'entrevistas'] + list(indicators))
+    result = result.sort_by([(key, 'ascending') for key in keys])
+
+    shutil.rmtree(os.path.join(gold_path, GOLD_TABLE), ignore_errors=True)
+    os.makedirs(os.path.join(gold_path, GOLD_TABLE))
+    pq.write_table(result, os.path.join(gold_path, GOLD_TABLE, 'part-0.parquet'))
+    result.to_pandas().to_csv(os.path.join(gold_path, f'{GOLD_TABLE}.csv'), index=False)
+    return result
+
+
+def run_pipeline(download_path, output_path, dictionary_path=DICTIONARY_PATH):
+    """
+    Executa bronze, silver e gold em ``<output_path>/{bronze,silver,gold}``.
+
+    Retorno
+    -------
+    timings : dict
+        Segundos de cada etapa.
+    """
+    paths = {stage: os.path.join(output_path, stage) for stage in ('bronze', 'silver', 'gold')}
+    timings = {}
+
+    start = time.perf_counter()
+    bronze(download_path, paths['bronze'], dictionary_path)
+    timings['bronze'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    silver(paths['bronze'], paths['silver'], PnadDecoder.load(dictionary_path))
+    timings['silver'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gold(paths['silver'], paths['gold'])
+    timings['gold'] = time.perf_counter() - start
+    return timings
+
+
+def spark_silver(spark, bronze_path, silver_path, decoder=None, columns=SILVER_COLUMNS):
+    """Silver em PySpark (mesma saída de ``silver``), para o caminho Databricks e para a paridade."""
+    from pyspark.sql import functions as F
+
+    decoder = decoder or PnadDecoder.load()
+    df = spark.read.parquet(bronze_path)
+    selected = []
+    for column in columns:
+        if column not in df.columns:
+            expression = F.lit(None).cast('string' if column in decoder.lookups else
+                                          'double' if column == WEIGHT_COLUMN else 'bigint')
+        elif column in decoder.lookups:
+            positions, labels = decoder.lookups[column]
+            pairs = [item for code, position in enumerate(positions) if position >= 0
+                     for item in (F.lit(code), F.lit(labels[position]))]
+            expression = F.create_map(*pairs)[F.col(column).cast('int')]
+        else:
+            expression = F.col(column)
+        selected.append(expression.alias(column))
+    df = df.select(*selected, *PARTITION_COLUMNS)
+    df.write.format('parquet').mode('overwrite').partitionBy(*PARTITION_COLUMNS).save(silver_path)
+
+
+def spark_gold(spark, silver_path, gold_path, indicators=GOLD_INDICATORS):
+    """Gold em PySpark (mesma saída de ``gold``)."""
+    from pyspark.sql import functions as F
+
+    weight = F.col(WEIGHT_COLUMN)
+    aggregations = [F.sum(weight).alias('populacao'), F.count(F.lit(1)).alias('entrevistas')]
+    aggregations += [
+        F.sum(F.when(F.col(column) == label, weight).otherwise(F.lit(0.0))).alias(name)
+        for name, (column, label) in indicators.items()
+    ]
+    df = spark.read.parquet(silver_path).groupBy(*GOLD_KEYS).agg(*aggregations).orderBy(*GOLD_KEYS)
+    df.write.format('parquet').mode('overwrite').save(os.path.join(gold_path, GOLD_TABLE))
+
+
+def read_output(path):
+    """Saída de uma etapa como DataFrame normalizado (categorias como texto, linhas ordenadas)."""
+    df = ds.dataset(path, format='parquet', partitioning='hive').to_table().to_pandas()
+    for column in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+    for column in PARTITION_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(int)
+    df = df[sorted(df.columns)]
+    return df.sort_values(list(df.columns), na_position='first', kind='stable').reset_index(drop=True)
+
+
+def compare_outputs(left_path, right_path, rtol=1e-9):
+    """
+    Compara duas saídas (mesmas colunas, linhas e valores; floats com tolerância ``rtol``).
+
+    Retorno
+    -------
+    (ok, message) : (bool, str)
+    """
+    left, right = read_output(left_path), read_output(right_path)
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, check_exact=False, rtol=rtol)
+    except AssertionError as error:
+        return False, str(error)
+    return True, f'{len(left)} linhas iguais'
+
+
+def parity_check(bronze_path, work_path, spark=None, decoder=None):
+    """
+    Roda silver e gold pelos dois caminhos (Arrow e Spark) sobre o mesmo bronze e compara.
+
+    Parâmetros
+    ----------
+    bronze_path : str
+        Bronze particionado (``bronze`` ou o parquet gravado pelo notebook).
+    work_path : str
+        Pasta de trabalho (``local/`` e ``spark/``).
+    spark : SparkSession, opcional
+        Padrão: ``SparkSession.builder.master('local[*]')``.
+
+    Retorno
+    -------
+    result : dict
+        Etapa -> ``(ok, message)``.
+    """
+    if spark is None:
+        from pyspark.sql import SparkSession
+        spark = SparkSession.builder.master('local[*]').getOrCreate()
+    decoder = decoder or PnadDecoder.load()
+    local = {stage: os.path.join(work_path, 'local', stage) for stage in ('silver', 'gold')}
+    remote = {stage: os.path.join(work_path, 'spark', stage) for stage in ('silver', 'gold')}
+
+    silver(bronze_path, local['silver'], decoder)
+    gold(local['silver'], local['gold'])
+    spark_silver(spark, bronze_path, remote['silver'], decoder)
+    spark_gold(spark, remote['silver'], remote['gold'])
+
+    return {
+        'silver': compare_outputs(local['silver'], remote['silver']),
+        'gold': compare_outputs(os.path.join(local['gold'], GOLD_TABLE), os.path.join(remote['gold'], GOLD_TABLE)),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pipeline PNAD COVID-19 (bronze, silver, gold) com Arrow, sem Spark.')
+    parser.add_argument('download_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--dictionary', default=DICTIONARY_PATH)
+    args = parser.parse_args()
+
+    for stage, seconds in run_pipeline(args.download_path, args.output_path, args.dictionary).items():
+        print(f"{stage}: {seconds:.1f}s")
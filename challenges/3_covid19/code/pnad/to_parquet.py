@@ -0,0 +1,206 @@
+"""
+Conversão dos zips da PNAD COVID-19 direto para parquet tipado.
+
+O ``ingest.ipynb`` extraía cada zip para o disco (``extract_file``) e o
+``pre_processing.ipynb`` relia os CSVs com ``spark.read.csv`` (todas as colunas
+como string). Aqui o CSV é lido como stream de dentro do zip
+(``ZipFile.open`` + ``pyarrow.csv.open_csv``), já com os tipos do dicionário
+(``pnad.dictionary.column_types``), e gravado em
+``<saída>/ano_part=<ano>/mes=<mês>/part-0.parquet``, um row group por vez:
+a memória usada é a de um row group, sem cópia descompactada no disco. A
+partição é escrita em um diretório temporário ao lado (oculto para a leitura
+do dataset) e só substitui a anterior quando a conversão termina sem erro.
+
+Uso pela linha de comando (a partir de ``code/``)::
+
+    python -m pnad.to_parquet /Volumes/fiap_postech_covid19_pnad/ingest/ingest_raw/zip \\
+        /Volumes/fiap_postech_covid19_pnad/bronze/bronze_raw/micro_data_parquet
+"""
+import argparse
+import glob
+import io
+import os
+import re
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from pnad.dictionary import DICTIONARY_PATH, column_types, read_dictionary
+from pnad import PREFIX_MONTH, PREFIX_YEAR
+
+ROW_GROUP_SIZE = 250_000
+BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def load_column_types(path=DICTIONARY_PATH):
+    """Tipos das colunas a partir do dicionário (``pnad.dictionary.column_types``)."""
+    return column_types(*read_dictionary(path))
+
+
+def _csv_member(archive):
+    members = [name for name in archive.namelist() if name.lower().endswith('.csv')]
+    if len(members) != 1:
+        raise ValueError(f"Esperado um CSV no zip, encontrado: {members}")
+    return members[0]
+
+
+def _header(archive, member, delimiter):
+    with archive.open(member) as file:
+        line = io.TextIOWrapper(file, encoding='latin-1').readline()
+    return [name.strip().strip('"') for name in line.rstrip('\r\n').split(delimiter)]
+
+
+def schema_for(columns, types):
+    """Schema do CSV: tipo do dicionário ou ``string`` para colunas fora dele."""
+    return pa.schema([pa.field(column, types.get(column, pa.string())) for column in columns])
+
+
+def iter_zip_batches(zip_path, types, delimiter=',', block_size=BLOCK_SIZE):
+    """
+    Itera sobre os ``RecordBatch`` do CSV de um zip, sem extraí-lo.
+
+    Parâmetros
+    ----------
+    zip_path : str
+    types : dict
+        Coluna -> ``pa.DataType`` (``load_column_types``).
+    delimiter : str, opcional, default=','
+    block_size : int, opcional, default=16 MiB
+        Bytes do CSV lidos por bloco.
+
+    Retorno
+    -------
+    iterador de pa.RecordBatch
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        member = _csv_member(archive)
+        schema = schema_for(_header(archive, member, delimiter), types)
+        with archive.open(member) as file:
+            reader = pa_csv.open_csv(
+                file,
+                read_options=pa_csv.ReadOptions(block_size=block_size, encoding='latin-1'),
+                parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=schema, strings_can_be_null=True, quoted_strings_can_be_null=True
+                ),
+            )
+            for batch in reader:
+                yield batch
+
+
+def convert_zip(zip_path, output_path, year, month, types, row_group_size=ROW_GROUP_SIZE, **kwargs):
+    """
+    Converte um zip mensal em ``<output_path>/ano_part=<ano>/mes=<mês>/part-0.parquet``.
+
+    A partição é escrita em ``.mes=<mês>.tmp-*`` e substitui a existente só
+    no final; se a leitura do zip falhar, a partição anterior fica intacta e a
+    saída parcial é removida.
+
+    Parâmetros
+    ----------
+    zip_path : str
+    output_path : str
+        Raiz do dataset parquet.
+    year, month : int ou str
+        Valores das partições (``mes`` sem zero à esquerda, como no ``partitionBy`` do Spark).
+    types : dict
+        Coluna -> ``pa.DataType``.
+    row_group_size : int, opcional, default=250_000
+        Linhas por row group (limita a memória usada na escrita).
+
+    Retorno
+    -------
+    n_rows : int
+    """
+    parent = os.path.join(output_path, f'{PREFIX_YEAR}={int(year)}')
+    partition = os.path.join(parent, f'{PREFIX_MONTH}={int(month)}')
+    # Prefixo "." : o pyarrow.dataset e o Spark ignoram o diretório durante a escrita
+    staging = os.path.join(parent, f'.{PREFIX_MONTH}={int(month)}.tmp-{os.getpid()}-{threading.get_ident()}')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    n_rows, pending, n_pending, writer = 0, [], 0, None
+    try:
+        try:
+            for batch in iter_zip_batches(zip_path, types, **kwargs):
+                if writer is None:
+                    writer = pq.ParquetWriter(os.path.join(staging, 'part-0.parquet'), batch.schema)
+                pending.append(batch)
+                n_pending += batch.num_rows
+                while n_pending >= row_group_size:
+                    table = pa.Table.from_batches(pending)
+                    writer.write_table(table.slice(0, row_group_size), row_group_size=row_group_size)
+                    rest = table.slice(row_group_size)
+                    pending, n_pending = rest.to_batches(), rest.num_rows
+                    n_rows += row_group_size
+            if pending and n_pending:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+                n_rows += n_pending
+        finally:
+            if writer is not None:
+                writer.close()
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Troca: a partição antiga sai do caminho e a nova entra com ``os.replace``
+    retired = f'{staging}.old'
+    if os.path.exists(partition):
+        os.replace(partition, retired)
+    os.replace(staging, partition)
+    shutil.rmtree(retired, ignore_errors=True)
+    return n_rows
+
+
+def find_zips(download_path):
+    """Zips no layout de ``pnad.download.micro_data_jobs``: lista de ``(caminho, ano, mês)``."""
+    pattern = re.compile(rf'{PREFIX_YEAR}=(\d+){re.escape(os.sep)}{PREFIX_MONTH}=(\d+)')
+    zips = []
+    for path in sorted(glob.glob(os.path.join(download_path, f'{PREFIX_YEAR}=*', f'{PREFIX_MONTH}=*', '*.zip'))):
+        match = pattern.search(path)
+        zips.append((path, int(match.group(1)), int(match.group(2))))
+    return zips
+
+
+def convert_micro_data(download_path, output_path, dictionary_path=DICTIONARY_PATH, max_workers=2, **kwargs):
+    """
+    Converte todos os zips de ``download_path`` (um por mês) em parquet particionado.
+
+    Parâmetros
+    ----------
+    max_workers : int, opcional, default=2
+        Zips convertidos ao mesmo tempo (a leitura do CSV já usa várias threads).
+
+    Retorno
+    -------
+    rows : dict
+        ``(ano, mês)`` -> linhas gravadas.
+    """
+    types = load_column_types(dictionary_path)
+    zips = find_zips(download_path)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        counts = executor.map(lambda job: convert_zip(job[0], output_path, job[1], job[2], types, **kwargs), zips)
+        return {(year, month): n_rows for (_, year, month), n_rows in zip(zips, counts)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Zips da PNAD COVID-19 -> parquet tipado, particionado por ano/mês.')
+    parser.add_argument('download_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--dictionary', default=DICTIONARY_PATH)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = convert_micro_data(args.download_path, args.output_path, args.dictionary, args.workers,
+                              row_group_size=args.row_group_size)
+    for (year, month), n_rows in rows.items():
+        print(f"{PREFIX_YEAR}={year}/{PREFIX_MONTH}={month}: {n_rows} linhas")
+    print(f"Total: {sum(rows.values())} linhas em {time.perf_counter() - start:.1f}s -> {args.output_path}")
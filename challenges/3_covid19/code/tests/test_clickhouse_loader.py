@@ -0,0 +1,122 @@
+"""
+Testes do ``pnad.clickhouse_loader`` com um cliente de ClickHouse em memória.
+
+O ``StubClient`` registra cada comando enviado (e o corpo dos inserts), então a
+sequência de uma carga pode ser conferida sem um servidor ClickHouse.
+
+Uso (a partir de ``code/``)::
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pnad import PREFIX_MONTH, PREFIX_YEAR, clickhouse_loader  # noqa: E402
+from pnad.local_engine import GOLD_INDICATORS, GOLD_TABLE  # noqa: E402
+
+DATABASE = 'pnad_test'
+STAGING = clickhouse_loader.STAGING_SUFFIX
+
+
+class StubClient(clickhouse_loader.ClickHouseClient):
+    """Guarda ``(query, corpo)`` de cada ``execute`` em vez de chamar a interface HTTP."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, data=None, **settings):
+        body = b''.join(data) if data is not None else None
+        self.statements.append((' '.join(query.split()), body))
+        return ''
+
+
+def gold_table(months=(5, 6), states=('São Paulo', 'Bahia', 'Acre'), seed=0):
+    """Gold no layout do ``local_engine.gold``: uma linha por ano, mês e UF."""
+    rng = np.random.default_rng(seed)
+    n_rows = len(months) * len(states)
+    columns = {
+        PREFIX_YEAR: pa.array(np.full(n_rows, 2020), pa.int32()),
+        PREFIX_MONTH: pa.array(np.repeat(months, len(states)), pa.int32()),
+        'UF': pa.array(list(states) * len(months)),
+        'populacao': pa.array(rng.random(n_rows) * 1e6),
+        'entrevistas': pa.array(rng.integers(100, 1000, n_rows)),
+    }
+    for name in GOLD_INDICATORS:
+        columns[name] = pa.array(rng.random(n_rows) * 1e5)
+    return pa.table(columns)
+
+
+class ClickHouseLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_path = tempfile.mkdtemp()
+        self.gold_path = os.path.join(self.work_path, GOLD_TABLE)
+        os.makedirs(self.gold_path)
+        self.table = gold_table()
+        pq.write_table(self.table, os.path.join(self.gold_path, 'part-0.parquet'))
+        self.dataset = ds.dataset(self.gold_path, format='parquet', partitioning='hive')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def test_partition_statement_sequence(self):
+        client = StubClient()
+        n_rows = clickhouse_loader.load_partition(client, self.dataset, 2020, 6, database=DATABASE, batch_size=2)
+
+        tables = [GOLD_TABLE] + list(clickhouse_loader.MATERIALIZED_VIEWS)
+        drop = [f'ALTER TABLE {DATABASE}.{name}{STAGING} DROP PARTITION (2020, 6)' for name in tables]
+        expected = drop + [f'INSERT INTO {DATABASE}.{GOLD_TABLE}{STAGING} FORMAT ArrowStream'] + [
+            f'ALTER TABLE {DATABASE}.{name} REPLACE PARTITION (2020, 6) FROM {DATABASE}.{name}{STAGING}'
+            for name in tables
+        ] + drop
+        self.assertEqual([query for query, _ in client.statements], expected)
+        self.assertEqual(n_rows, 3)
+
+        # Só o insert leva corpo: o stream Arrow com as linhas do mês
+        bodies = [body for _, body in client.statements if body is not None]
+        self.assertEqual(len(bodies), 1)
+        sent = pa.ipc.open_stream(bodies[0]).read_all()
+        expected_rows = self.table.filter(pc.equal(self.table[PREFIX_MONTH], 6))
+        self.assertEqual(sent.num_rows, 3)
+        self.assertEqual(sent.sort_by('UF').to_pylist(), expected_rows.sort_by('UF').to_pylist())
+
+    def test_arrow_stream_round_trip(self):
+        batches = self.table.to_batches(max_chunksize=2)
+        chunks = list(clickhouse_loader.arrow_stream(self.table.schema, batches))
+
+        # Um bloco por RecordBatch e o fim do stream
+        self.assertEqual(len(chunks), len(batches) + 1)
+        reader = pa.ipc.open_stream(b''.join(chunks))
+        self.assertEqual(reader.schema, self.table.schema)
+        self.assertTrue(reader.read_all().equals(self.table))
+
+    def test_arrow_stream_without_batches(self):
+        reader = pa.ipc.open_stream(b''.join(clickhouse_loader.arrow_stream(self.table.schema, [])))
+        self.assertEqual(reader.read_all().num_rows, 0)
+
+    def test_load_gold_loads_every_partition(self):
+        client = StubClient()
+        rows = clickhouse_loader.load_gold(self.gold_path, client, database=DATABASE)
+
+        self.assertEqual(rows, {(2020, 5): 3, (2020, 6): 3})
+        queries = [query for query, _ in client.statements]
+        self.assertEqual(queries[0], f'CREATE DATABASE IF NOT EXISTS {DATABASE}')
+        inserts = [i for i, query in enumerate(queries) if query.startswith('INSERT')]
+        last_create = max(i for i, query in enumerate(queries) if query.startswith('CREATE'))
+        self.assertEqual(len(inserts), 2)
+        self.assertLess(last_create, inserts[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Testes do ``pnad.download`` contra um servidor HTTP local (``http.server``).
+
+O servidor atende ``HEAD``/``GET`` com ``Content-Length``, ``ETag`` e
+``Range: bytes=<início>-`` (``206``/``416``) e registra cada requisição. Ele
+pode ignorar o ``Range`` (responde ``200`` com o arquivo inteiro) ou anunciar no
+``HEAD`` um tamanho diferente do conteúdo.
+
+Uso (a partir de ``code/``)::
+
+    python -m unittest discover -s tests
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pnad import download  # noqa: E402
+
+CONTENT = bytes(range(256)) * 4096  # 1 MiB
+PARTIAL = 300_000
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_headers(self, status, length):
+        self.send_response(status)
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', self.server.etag)
+        self.send_header('Last-Modified', 'Mon, 01 Jun 2020 00:00:00 GMT')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', None, None))
+        self._send_headers(200, self.server.head_size or len(self.server.content))
+
+    def do_GET(self):
+        content = self.server.content
+        requested = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        start = int(requested[len('bytes='):-1]) if requested else 0
+        if not (requested and self.server.honor_range and if_range in (None, self.server.etag)):
+            status, body = 200, content
+        elif start >= len(content):
+            status, body = 416, b''
+        else:
+            status, body = 206, content[start:]
+        self.server.requests.append(('GET', requested, status))
+        self._send_headers(status, len(body))
+        self.wfile.write(body)
+
+
+class DownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/PNAD_COVID_052020.zip'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.content = CONTENT
+        self.server.etag = '"v1"'
+        self.server.honor_range = True
+        self.server.head_size = None
+        self.server.requests = []
+        self.work_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.work_path, 'ano_part=2020', 'mes=05', '05-2020.zip')
+        self.part_path = f'{self.path}.part'
+
+    def tearDown(self):
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def write_part(self, data):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.part_path, 'wb') as file:
+            file.write(data)
+
+    def fetch(self, **kwargs):
+        return download.download_file(self.url, self.path, retries=0, **kwargs)
+
+    def gets(self):
+        return [request[1:] for request in self.server.requests if request[0] == 'GET']
+
+    def assertDownloaded(self):
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), CONTENT)
+        self.assertFalse(os.path.exists(self.part_path))
+        with open(f'{self.path}.meta.json', 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        self.assertEqual(meta['size'], len(CONTENT))
+        self.assertEqual(meta['etag'], '"v1"')
+
+    def test_resumes_part_file(self):
+        self.write_part(CONTENT[:PARTIAL])
+        result = self.fetch()
+
+        self.assertEqual(self.gets(), [(f'bytes={PARTIAL}-', 206)])
+        self.assertEqual(result['status'], 'downloaded')
+        self.assertEqual(result['bytes'], len(CONTENT) - PARTIAL)
+        self.assertDownloaded()
+
+    def test_restarts_when_server_ignores_range(self):
+        self.server.honor_range = False
+        self.write_part(b'\xff' * PARTIAL)
+        result = self.fetch()
+
+        self.assertEqual(self.gets(), [(f'bytes={PARTIAL}-', 200)])
+        self.assertEqual(result['bytes'], len(CONTENT))
+        self.assertDownloaded()
+
+    def test_complete_part_file_416(self):
+        self.write_part(CONTENT)
+        result = self.fetch()
+
+        self.assertEqual(self.gets(), [(f'bytes={len(CONTENT)}-', 416)])
+        self.assertEqual(result['bytes'], 0)
+        self.assertDownloaded()
+
+    def test_size_mismatch(self):
+        self.server.head_size = len(CONTENT) + 10
+        with self.assertRaisesRegex(IOError, 'Tamanho inválido'):
+            self.fetch()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(f'{self.path}.meta.json'))
+
+    def test_sha256_mismatch(self):
+        with self.assertRaisesRegex(IOError, 'sha256 inválido'):
+            self.fetch(sha256='0' * 64)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.part_path))
+
+    def test_sha256_match(self):
+        self.fetch(sha256=hashlib.sha256(CONTENT).hexdigest())
+        self.assertDownloaded()
+
+    def test_skips_current_file(self):
+        self.fetch()
+        self.server.requests = []
+        result = self.fetch()
+
+        self.assertEqual(result['status'], 'skipped')
+        self.assertEqual(self.server.requests, [('HEAD', None, None)])
+
+        # Novo ETag no servidor: baixa de novo
+        self.server.etag = '"v2"'
+        self.assertEqual(self.fetch()['status'], 'downloaded')
+        self.assertEqual(self.gets(), [(None, 200)])
+
+    def test_download_all_keeps_job_order(self):
+        jobs = download.micro_data_jobs(self.work_path, months=['05', '06', '07'], base_url=self.url + '?{month}{year}')
+        results = download.download_all(jobs, max_workers=3, retries=0)
+
+        self.assertEqual([result['path'] for result in results], [job['path'] for job in jobs])
+        for job in jobs:
+            with open(job['path'], 'rb') as file:
+                self.assertEqual(file.read(), CONTENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
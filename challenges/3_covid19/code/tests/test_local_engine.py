@@ -0,0 +1,123 @@
+"""
+Testes do ``pnad.local_engine`` sobre um bronze sintético pequeno.
+
+- ``LocalEngineTest``: silver e gold com Arrow, conferidos com pandas;
+- ``SparkParityTest``: ``parity_check`` (Arrow x PySpark) no mesmo bronze;
+  pulado quando o ``pyspark`` não está instalado (``requirements.txt`` fixa o
+  3.5.4, que precisa de um Java 8/11/17 no ``JAVA_HOME``).
+
+O bronze sintético já está no formato gravado por ``pnad.to_parquet`` (a etapa
+bronze não entra na paridade: o ``pre_processing.ipynb`` lê o CSV como string).
+
+Uso (a partir de ``code/``)::
+
+    python -m unittest discover -s tests
+"""
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pnad import PREFIX_MONTH, PREFIX_YEAR, local_engine  # noqa: E402
+from pnad.decoder import PnadDecoder  # noqa: E402
+
+HAS_PYSPARK = importlib.util.find_spec('pyspark') is not None
+
+# (mês, linhas, coluna ausente no mês)
+MONTHS = [(5, 3000, None), (6, 2000, 'C013')]
+
+
+def write_bronze(path, decoder, seed=0):
+    """Bronze com dois meses: códigos válidos, um código fora do dicionário, nulos e uma coluna ausente."""
+    rng = np.random.default_rng(seed)
+    for month, n_rows, missing in MONTHS:
+        columns = {}
+        for column in local_engine.SILVER_COLUMNS:
+            if column == local_engine.WEIGHT_COLUMN:
+                columns[column] = pa.array(rng.random(n_rows) * 100)
+            elif column in decoder.lookups:
+                positions, _ = decoder.lookups[column]
+                codes = [code for code, position in enumerate(positions) if position >= 0][:4] + [len(positions) + 7]
+                columns[column] = pa.array(rng.choice(codes, n_rows), mask=rng.random(n_rows) < 0.05)
+            else:
+                columns[column] = pa.array(rng.integers(1, 5, n_rows))
+        columns['UF'] = pa.array(rng.choice([11, 35, 53], n_rows))
+        columns['Ano'] = pa.array(np.full(n_rows, 2020))
+        if missing:
+            del columns[missing]
+        partition = os.path.join(path, f'{PREFIX_YEAR}=2020', f'{PREFIX_MONTH}={month}')
+        os.makedirs(partition)
+        pq.write_table(pa.table(columns), os.path.join(partition, 'part-0.parquet'))
+
+
+class _BronzeTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.decoder = PnadDecoder.load()
+        cls.work_path = tempfile.mkdtemp()
+        cls.bronze_path = os.path.join(cls.work_path, 'bronze')
+        write_bronze(cls.bronze_path, cls.decoder)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_path, ignore_errors=True)
+
+
+class LocalEngineTest(_BronzeTestCase):
+
+    def test_gold_matches_pandas(self):
+        silver_path = os.path.join(self.work_path, 'silver')
+        n_rows = local_engine.silver(self.bronze_path, silver_path, self.decoder)
+        self.assertEqual(n_rows, sum(n for _, n, _ in MONTHS))
+
+        schemas = {str(pq.read_schema(os.path.join(root, name)).remove_metadata())
+                   for root, _, names in os.walk(silver_path) for name in names}
+        self.assertEqual(len(schemas), 1)
+
+        gold = local_engine.gold(silver_path, os.path.join(self.work_path, 'gold')).to_pandas()
+        df = local_engine.read_output(silver_path)
+        keys = local_engine.GOLD_KEYS
+        df['UF'] = df['UF'].astype(str)
+        expected = df.groupby(keys).agg(
+            populacao=(local_engine.WEIGHT_COLUMN, 'sum'), entrevistas=(local_engine.WEIGHT_COLUMN, 'size')
+        )
+        for name, (column, label) in local_engine.GOLD_INDICATORS.items():
+            matches = df[column].astype(object).eq(label)
+            expected[name] = df[local_engine.WEIGHT_COLUMN].where(matches, 0.0).groupby([df[key] for key in keys]).sum()
+        expected = expected.reset_index()
+
+        gold[keys[:2]] = gold[keys[:2]].astype(int)
+        pd.testing.assert_frame_equal(
+            gold.sort_values(keys).reset_index(drop=True), expected.sort_values(keys).reset_index(drop=True),
+            check_dtype=False, check_exact=False, rtol=1e-9,
+        )
+
+
+@unittest.skipUnless(HAS_PYSPARK, 'pyspark não instalado')
+class SparkParityTest(_BronzeTestCase):
+
+    def test_parity_check(self):
+        from pyspark.sql import SparkSession
+
+        spark = SparkSession.builder.master('local[1]').appName('pnad-parity').getOrCreate()
+        try:
+            result = local_engine.parity_check(self.bronze_path, os.path.join(self.work_path, 'parity'),
+                                               spark=spark, decoder=self.decoder)
+        finally:
+            spark.stop()
+        for stage, (ok, message) in result.items():
+            self.assertTrue(ok, f'{stage}: {message}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,51 +3,14 @@ import os
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import plotly.graph_objects as go
 
+from model_serving import MODEL_PATH, ModelServer
+from prediction_cache import PredictionLookup
+from utils import DICT_FREQUENCY_FCVC, DICT_FREQUENCY_OBESITY, DICT_RESULT, DICT_VALUE_OBESITY_TRANSLATION
 
 
 
-DICT_VALUE_OBESITY_TRANSLATION = {
-    "Feminino": 0,
-    "Masculino": 1,
-    "Transporte público": "Public_Transportation",
-    "Caminhada": "Walking",
-    "Automóvel": "Automobile",
-    "Motocicleta": "Motorbike",
-    "Bicicleta": "Bike"
-}
-
-DICT_RESULT = {
-    0: "Peso insuficiente",
-    1: "Peso Ideal",
-    2: "Sobrepeso Nível I",
-    3: "Sobrepeso Nível II",
-    4: "Obesidade Tipo I",
-    5: "Obesidade Tipo II",
-    6: "Obesidade Tipo III",   
-}
-
-
-DICT_FREQUENCY_FCVC = {
-  'Nunca': 1,
-  'Às vezes': 2,
-  'Sempre': 3
-}
-
-DICT_FREQUENCY_OBESITY = {
-  'Não': 0,
-  'Nunca': 0,
-  'Às vezes': 1,
-  'Frequentemente': 2,
-  'Sempre': 3
-}
-
-DICT_YES_NO_TO_BOOL = {
-  'Sim': True,
-  'Não': False
-}
 
 DICT_GENDER = {
     'Male'
@@ -71,6 +34,32 @@ with st.expander('Veja Mais'):
     extra = st.container()
 
 
+@st.cache_resource
+def load_model_server(path=MODEL_PATH):
+    """Model loaded once per process (reloaded by the server when the file changes)."""
+    return ModelServer(path).warm()
+
+
+try:
+    model_server = load_model_server()
+except FileNotFoundError:
+    # Not cached: the next rerun tries again once the file exists
+    model_server = None
+    st.error(f'Modelo não encontrado em {MODEL_PATH}. Gere o model.joblib com o generate_model.ipynb '
+             'ou defina OBESITY_MODEL_PATH.')
+
+
+@st.cache_resource
+def load_prediction_lookup(max_entries=int(os.environ.get('OBESITY_PREDICTION_CACHE', 0))):
+    """Optional prediction table over the form grid (disabled when OBESITY_PREDICTION_CACHE is 0)."""
+    if max_entries <= 0:
+        return None
+    return PredictionLookup(model_server, max_entries=max_entries)
+
+
+prediction_lookup = load_prediction_lookup() if model_server is not None else None
+
+
 def process_data_from_user(dict_values_user):
     dict_processed = {}
 
@@ -158,22 +147,21 @@ def calculate_personal_insights(dict_processed):
 
 def generate_prediction():
 
+    if model_server is None:
+        body.error(f'Modelo não encontrado em {MODEL_PATH}.')
+        return
+
     dict_processed = process_data_from_user(dict_values_user)
 
     dict_personal_insights = calculate_personal_insights(dict_processed)
 
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-
-    full_path_joblib = os.path.join(dir_path, 'model.joblib')
-    
-    model = joblib.load(full_path_joblib)
-
-    df = pd.DataFrame.from_records([dict_processed])
-
-    result = model.predict(df)
+    if prediction_lookup is not None:
+        result = prediction_lookup.predict(dict_processed)
+    else:
+        result = model_server.predict_one(dict_processed)
 
-    if result[0] in DICT_RESULT:
-        predict = DICT_RESULT[result[0]]
+    if result in DICT_RESULT:
+        predict = DICT_RESULT[result]
 
     print(f'dict_personal_insights: {dict_personal_insights}')
     print(result, predict)
@@ -218,11 +206,17 @@ def generate_prediction():
 
     plots.plotly_chart(fig)
 
-    extra.write(df)
     extra.write(f'predict: {predict}')
     extra.write(f'dict_processed: {dict_processed}')
     extra.write(f'dict_personal_insights: {dict_personal_insights}')
-    extra.write(f'full_path_joblib: {full_path_joblib}')
+    extra.write(f'full_path_joblib: {model_server.path}')
+
+    latency = model_server.stats()['latency']
+    extra.write(f'latência (ms) - n: {latency["count"]} | p50: {latency["p50_ms"]:.2f} | p95: {latency["p95_ms"]:.2f} | máx: {latency["max_ms"]:.2f}')
+    labels = [f'<= {bucket["le_ms"]}ms' if bucket['le_ms'] is not None else 'acima' for bucket in latency['buckets']]
+    extra.bar_chart(pd.Series([bucket['count'] for bucket in latency['buckets']], index=labels, name='predições'))
+    if prediction_lookup is not None:
+        extra.write(f'tabela de predições: {prediction_lookup.stats()}')
     
 with st.sidebar.form(key='obesity_predictor'):
 
@@ -0,0 +1,211 @@
+"""
+Predição em lote do modelo de obesidade (planilhas de pacientes).
+
+Mesmas regras de ``process_data_from_user`` e ``calculate_personal_insights``
+do ``app.py``, aplicadas a colunas inteiras:
+
+- ``prepare_features``: one-hot de ``mtrans``, mapeamento de gênero e
+  frequências (aceita os rótulos do formulário ou os códigos do
+  ``obesity_gold.csv``) e matriz de features na ordem do modelo;
+- ``calculate_insights``: IMC, ingestão ideal de água e contagem de alertas
+  e pontos positivos;
+- ``score_file``: lê CSV ou parquet em blocos, prevê bloco a bloco e grava a
+  saída incrementalmente (CSV ou parquet).
+
+Uso pela linha de comando::
+
+    python batch_scoring.py data/gold/obesity_gold.csv predicoes.parquet --chunk-size 100000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from model_serving import FEATURE_NAMES, INPUT_COLUMNS, MODEL_PATH, ModelServer, predict_array
+from utils import (DICT_FREQUENCY_FCVC, DICT_FREQUENCY_OBESITY, DICT_RESULT, DICT_VALUE_OBESITY_TRANSLATION,
+                   DICT_YES_NO_TO_BOOL)
+
+BOOL_COLUMNS = ['family_history', 'favc', 'smoke', 'scc']
+
+# Categorias do one-hot, na ordem de ``FEATURE_NAMES`` (``mtrans_<categoria>``)
+MTRANS_CATEGORIES = [name[len('mtrans_'):] for name in FEATURE_NAMES if name.startswith('mtrans_')]
+
+_BOOL_VALUES = {**DICT_YES_NO_TO_BOOL, 'True': True, 'False': False, 'true': True, 'false': False,
+                '1': True, '0': False}
+
+
+def _encode(series, mapping):
+    """Rótulos do formulário -> códigos; colunas já numéricas passam direto."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float)
+    codes = series.map(mapping)
+    numeric = pd.to_numeric(series.where(codes.isna()), errors='coerce')
+    return codes.fillna(numeric).to_numpy(dtype=float)
+
+
+def _to_bool(series):
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=float)
+    return series.astype(str).str.strip().map(_BOOL_VALUES).to_numpy(dtype=float)
+
+
+def prepare_features(df, feature_names=FEATURE_NAMES):
+    """
+    Matriz de features (n x len(feature_names), ``float64``) de um DataFrame de pacientes.
+
+    Parâmetros
+    ----------
+    df : pd.DataFrame
+        Colunas de ``INPUT_COLUMNS`` (schema do ``obesity_gold.csv``, com ou sem ``obesity``).
+    feature_names : list of str, opcional
+        Ordem das colunas esperada pelo modelo.
+
+    Retorno
+    -------
+    X : np.ndarray
+    """
+    missing = [column for column in INPUT_COLUMNS if column not in df.columns]
+    if missing:
+        raise KeyError(f"Colunas ausentes no arquivo: {missing}")
+
+    columns = {
+        'gender': _encode(df['gender'], DICT_VALUE_OBESITY_TRANSLATION),
+        'fcvc': _encode(df['fcvc'], DICT_FREQUENCY_FCVC),
+        'caec': _encode(df['caec'], DICT_FREQUENCY_OBESITY),
+        'calc': _encode(df['calc'], DICT_FREQUENCY_OBESITY),
+    }
+    for column in BOOL_COLUMNS:
+        columns[column] = _to_bool(df[column])
+    for column in ['age', 'height', 'weight', 'ncp', 'ch2o', 'faf', 'tue']:
+        columns[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+    # One-hot de ``mtrans``: categoria desconhecida fica com todas as colunas em 0 (como no app)
+    codes = pd.Categorical(df['mtrans'].astype(str).str.strip(), categories=MTRANS_CATEGORIES).codes
+    one_hot = np.zeros((len(df), len(MTRANS_CATEGORIES) + 1))
+    one_hot[np.arange(len(df)), codes] = 1.0
+    for position, category in enumerate(MTRANS_CATEGORIES):
+        columns[f'mtrans_{category}'] = one_hot[:, position]
+
+    return np.column_stack([columns[name] for name in feature_names])
+
+
+def _round2(values):
+    """``round(x, 2)`` do Python, vetorizado (``np.round`` difere em valores próximos de empate)."""
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+    return rounded
+
+
+def calculate_insights(df):
+    """
+    IMC, ingestão ideal de água e contagem de alertas/pontos positivos por paciente.
+
+    Mesmas regras de ``calculate_personal_insights``.
+
+    Retorno
+    -------
+    insights : pd.DataFrame
+        Colunas ``bmi``, ``ideal_water_intake``, ``n_suggestions`` e ``n_good``.
+    """
+    weight = pd.to_numeric(df['weight'], errors='coerce').to_numpy(dtype=float)
+    height = pd.to_numeric(df['height'], errors='coerce').to_numpy(dtype=float)
+    ch2o = pd.to_numeric(df['ch2o'], errors='coerce').to_numpy(dtype=float)
+    faf = pd.to_numeric(df['faf'], errors='coerce').to_numpy(dtype=float)
+    fcvc = _encode(df['fcvc'], DICT_FREQUENCY_FCVC)
+    favc = _to_bool(df['favc']) == 1
+    family_history = _to_bool(df['family_history']) == 1
+
+    bmi = _round2(weight / height ** 2)
+    ideal_water_intake = _round2(weight * 0.033)
+    water_below = ideal_water_intake > ch2o
+
+    n_suggestions = (favc.astype(int) + water_below + family_history + (fcvc == 1) + (faf == 0))
+    n_good = ((~favc).astype(int) + ~water_below + (fcvc == 3) + (faf >= 3))
+    return pd.DataFrame({
+        'bmi': bmi,
+        'ideal_water_intake': ideal_water_intake,
+        'n_suggestions': n_suggestions,
+        'n_good': n_good,
+    }, index=df.index)
+
+
+def predict_batch(model, df, feature_names=FEATURE_NAMES):
+    """
+    Previsões de um bloco: colunas de entrada + insights + ``prediction`` e ``prediction_label``.
+    """
+    result = df.join(calculate_insights(df))
+    prediction = predict_array(model, prepare_features(df, feature_names), feature_names)
+    result['prediction'] = prediction
+    result['prediction_label'] = pd.Series(prediction, index=df.index).map(DICT_RESULT)
+    return result
+
+
+def iter_chunks(path, chunk_size=100_000):
+    """Lê um CSV ou parquet em blocos de ``chunk_size`` linhas (DataFrames)."""
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def score_file(input_path, output_path, model_path=MODEL_PATH, chunk_size=100_000):
+    """
+    Prevê um arquivo de pacientes inteiro, bloco a bloco, com memória limitada ao bloco.
+
+    Parâmetros
+    ----------
+    input_path : str
+        CSV ou parquet com o schema do ``obesity_gold.csv``.
+    output_path : str
+        Saída ``.parquet`` ou ``.csv``.
+    model_path : str, opcional
+        Arquivo ``.joblib`` do modelo.
+    chunk_size : int, opcional, default=100_000
+        Linhas por bloco.
+
+    Retorno
+    -------
+    n_rows : int
+        Linhas previstas.
+    """
+    model, feature_names = ModelServer(model_path).get_model()
+
+    n_rows, writer = 0, None
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    try:
+        for chunk in iter_chunks(input_path, chunk_size):
+            result = predict_batch(model, chunk, feature_names)
+            if output_path.endswith('.parquet'):
+                table = pa.Table.from_pandas(result, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                result.to_csv(output_path, mode='a', header=n_rows == 0, index=False)
+            n_rows += len(result)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Predição de obesidade em lote (CSV/parquet).')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_rows = score_file(args.input, args.output, args.model, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"{n_rows} linhas em {elapsed:.1f}s ({n_rows / max(elapsed, 1e-9):,.0f} linhas/s) -> {args.output}")
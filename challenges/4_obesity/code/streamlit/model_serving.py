@@ -0,0 +1,262 @@
+"""
+Serviço do modelo de obesidade: carregado uma vez por processo.
+
+O ``app.py`` fazia ``joblib.load`` a cada clique em "Predict" e montava um
+``pd.DataFrame`` de uma linha para o ``predict``. Aqui:
+
+- ``ModelServer`` mantém o modelo em memória (um por processo, compartilhado
+  entre as sessões via ``st.cache_resource``) e só o recarrega quando o
+  ``mtime`` do arquivo muda;
+- ``feature_vector`` monta o vetor de features (``np.ndarray`` 1 x n) na ordem
+  em que o modelo foi treinado, sem pandas, e ``predict_array`` chama o
+  ``predict`` com ele;
+- o ``generate_model.ipynb`` salva o pipeline inteiro (transformações
+  ajustadas no treino + modelo). Para um pipeline, ``predict_array`` volta o
+  vetor para o schema do ``obesity_gold.csv`` (``pipeline_frame``) e o
+  ``predict`` aplica as mesmas transformações do treino. Um arquivo só com o
+  modelo continua recebendo o vetor direto;
+- ``LatencyHistogram`` acumula a latência de cada predição em buckets fixos.
+"""
+import os
+import threading
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+MODEL_PATH = os.environ.get(
+    'OBESITY_MODEL_PATH', os.path.join(os.path.dirname(os.path.realpath(__file__)), 'model.joblib')
+)
+
+# Ordem das colunas de ``process_data_from_user`` (a mesma do treino: one-hot primeiro)
+FEATURE_NAMES = [
+    'mtrans_Automóvel', 'mtrans_Bicicleta', 'mtrans_Caminhada', 'mtrans_Motocicleta', 'mtrans_Transporte público',
+    'gender', 'age', 'height', 'weight', 'family_history', 'favc', 'fcvc', 'ncp', 'caec', 'smoke', 'ch2o', 'scc',
+    'faf', 'tue', 'calc',
+]
+
+MTRANS_FEATURES = [name for name in FEATURE_NAMES if name.startswith('mtrans_')]
+
+# Colunas de entrada do pipeline (schema do ``obesity_gold.csv``, sem ``obesity``)
+INPUT_COLUMNS = [
+    'gender', 'age', 'height', 'weight', 'family_history', 'favc', 'fcvc', 'ncp', 'caec', 'smoke', 'ch2o', 'scc',
+    'faf', 'tue', 'calc', 'mtrans',
+]
+
+# Limites superiores dos buckets de latência (ms); o último bucket é "acima de 1000ms"
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+def feature_vector(dict_processed, feature_names=FEATURE_NAMES):
+    """
+    Vetor de features (1 x n, ``float64``) de um ``dict_processed``.
+
+    Parâmetros
+    ----------
+    dict_processed : dict
+        Saída de ``process_data_from_user``.
+    feature_names : list of str, opcional
+        Ordem das colunas esperada pelo modelo.
+
+    Retorno
+    -------
+    vector : np.ndarray
+    """
+    return np.array([[float(dict_processed[name]) for name in feature_names]])
+
+
+def is_pipeline(model):
+    """``True`` se ``model`` é um ``Pipeline`` (transformações + modelo)."""
+    return hasattr(model, 'steps')
+
+
+def pipeline_frame(X, feature_names=FEATURE_NAMES):
+    """
+    Matriz de features -> DataFrame de entrada do pipeline (schema do ``obesity_gold.csv``).
+
+    O one-hot de ``mtrans`` volta a ser a categoria (``None`` se nenhuma
+    coluna estiver marcada); as demais colunas passam direto.
+
+    Parâmetros
+    ----------
+    X : np.ndarray
+        Matriz n x len(feature_names).
+    feature_names : list of str, opcional
+
+    Retorno
+    -------
+    df : pd.DataFrame
+        Colunas ``INPUT_COLUMNS``.
+    """
+    frame = pd.DataFrame(X, columns=feature_names)
+    one_hot = frame[MTRANS_FEATURES].to_numpy()
+    categories = np.array([name[len('mtrans_'):] for name in MTRANS_FEATURES] + [None], dtype=object)
+    frame['mtrans'] = categories[np.where(one_hot.any(axis=1), one_hot.argmax(axis=1), len(MTRANS_FEATURES))]
+    return frame[INPUT_COLUMNS]
+
+
+def predict_array(model, X, feature_names=FEATURE_NAMES):
+    """
+    ``model.predict`` de uma matriz de features.
+
+    Para um pipeline a matriz é convertida com ``pipeline_frame``. Para um
+    modelo sozinho ``X`` já segue ``feature_names_in_``, então o aviso do
+    scikit-learn de "sem nomes de features" é ignorado só durante esta chamada.
+
+    Parâmetros
+    ----------
+    model : estimador ou ``Pipeline`` do scikit-learn
+    X : np.ndarray
+        Matriz n x len(feature_names).
+    feature_names : list of str, opcional
+        Ordem das colunas de ``X``.
+
+    Retorno
+    -------
+    prediction : np.ndarray
+    """
+    if is_pipeline(model):
+        return model.predict(pipeline_frame(X, feature_names))
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+        return model.predict(X)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências (thread-safe) com buckets fixos em milissegundos.
+    """
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def observe(self, seconds):
+        """Registra uma latência (em segundos)."""
+        ms = seconds * 1000
+        index = int(np.searchsorted(self.buckets_ms, ms, side='left'))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Percentil aproximado (limite superior do bucket que contém o percentil ``q``, 0-100)."""
+        with self._lock:
+            counts, count, max_ms = list(self.counts), self.count, self.max_ms
+        if not count:
+            return 0.0
+        target = q / 100 * count
+        cumulative = 0
+        for bound, n in zip(self.buckets_ms + [max_ms], counts):
+            cumulative += n
+            if cumulative >= target:
+                return min(bound, max_ms)
+        return max_ms
+
+    def snapshot(self):
+        """
+        Resumo do histograma.
+
+        Retorno
+        -------
+        resumo : dict
+            ``count``, ``mean_ms``, ``max_ms``, ``p50_ms``, ``p95_ms``, ``p99_ms`` e
+            ``buckets`` (lista de ``{'le_ms', 'count'}``; ``le_ms=None`` é o bucket aberto).
+        """
+        with self._lock:
+            counts, count, total_ms, max_ms = list(self.counts), self.count, self.total_ms, self.max_ms
+        return {
+            'count': count,
+            'mean_ms': total_ms / count if count else 0.0,
+            'max_ms': max_ms,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': [
+                {'le_ms': bound, 'count': n} for bound, n in zip(self.buckets_ms + [None], counts)
+            ],
+        }
+
+
+class ModelServer:
+    """
+    Modelo carregado uma vez e recarregado quando o arquivo muda.
+    """
+
+    def __init__(self, path=MODEL_PATH):
+        """
+        Parâmetros
+        ----------
+        path : str, opcional
+            Arquivo ``.joblib`` do modelo. Padrão: ``OBESITY_MODEL_PATH`` ou
+            ``model.joblib`` ao lado do ``app.py``.
+        """
+        self.path = path
+        self.latency = LatencyHistogram()
+        self.n_loads = 0
+        self._lock = threading.Lock()
+        # (modelo, feature_names, mtime), trocado de uma vez a cada carregamento
+        self._loaded = None
+
+    def _load(self, mtime):
+        # O pipeline salvo referencia ``utils.<classe>`` (importadas pelo generate_model.ipynb)
+        model = joblib.load(self.path)
+        # O pipeline recebe o vetor na ordem de ``FEATURE_NAMES`` (convertido em ``predict_array``)
+        names = None if is_pipeline(model) else getattr(model, 'feature_names_in_', None)
+        feature_names = list(names) if names is not None else list(FEATURE_NAMES)
+        self._loaded = (model, feature_names, mtime)
+        self.n_loads += 1
+
+    def get_model(self):
+        """
+        Modelo em memória; recarrega só se o ``mtime`` do arquivo mudou.
+
+        Retorno
+        -------
+        model, feature_names : tuple
+            O modelo e a ordem das colunas dele, sempre do mesmo carregamento.
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        loaded = self._loaded
+        if loaded is None or mtime != loaded[2]:
+            with self._lock:
+                if self._loaded is None or mtime != self._loaded[2]:
+                    self._load(mtime)
+                loaded = self._loaded
+        return loaded[0], loaded[1]
+
+    def warm(self):
+        """Carrega o modelo e faz uma predição de aquecimento."""
+        model, feature_names = self.get_model()
+        predict_array(model, np.zeros((1, len(feature_names))), feature_names)
+        return self
+
+    def predict_one(self, dict_processed):
+        """
+        Classe prevista para um ``dict_processed`` (sem pandas), registrando a latência.
+
+        Retorno
+        -------
+        result : int
+        """
+        start = time.perf_counter()
+        model, feature_names = self.get_model()
+        result = predict_array(model, feature_vector(dict_processed, feature_names), feature_names)[0]
+        self.latency.observe(time.perf_counter() - start)
+        return result.item() if isinstance(result, np.generic) else result
+
+    def stats(self):
+        """Arquivo, número de carregamentos e histograma de latência."""
+        return {'path': self.path, 'loads': self.n_loads, 'latency': self.latency.snapshot()}
@@ -0,0 +1,271 @@
+"""
+Tabela de predições sobre o espaço discreto do formulário.
+
+Quase todas as entradas do formulário são discretas (selectbox, checkbox e
+sliders com passo fixo) e idade, altura e peso também têm passo no
+``number_input``. Cada ``dict_processed`` é levado para a grade de
+``FEATURE_DOMAINS`` (um índice inteiro por feature) e a predição fica em uma
+tabela LRU indexada por esses índices: submissões repetidas (ou próximas, com
+passos maiores para idade/altura/peso) não chamam o modelo.
+
+A grade inteira tem ~2.7e15 células (``grid_size()``; altura e peso
+dominam), então a tabela é preenchida sob demanda;
+``PredictionLookup.precompute`` preenche de uma vez (em lote) uma sub-grade
+escolhida, e ``simulate_capacities`` mede memória x taxa de acerto para vários
+tamanhos da tabela. A tabela é compartilhada entre as sessões do app, então
+consulta, inserção e descarte são feitos sob um lock; o modelo é chamado fora
+dele.
+"""
+import itertools
+import math
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from model_serving import FEATURE_NAMES, feature_vector, predict_array
+
+# Domínio de cada feature de ``process_data_from_user``: (mínimo, máximo, passo)
+FEATURE_DOMAINS = {
+    'mtrans_Automóvel': (0, 1, 1),
+    'mtrans_Bicicleta': (0, 1, 1),
+    'mtrans_Caminhada': (0, 1, 1),
+    'mtrans_Motocicleta': (0, 1, 1),
+    'mtrans_Transporte público': (0, 1, 1),
+    'gender': (0, 1, 1),
+    'age': (1, 120, 1),
+    'height': (1.0, 5.0, 0.01),
+    'weight': (1, 200, 1),
+    'family_history': (0, 1, 1),
+    'favc': (0, 1, 1),
+    'fcvc': (1, 3, 1),
+    'ncp': (1.0, 8.0, 1.0),
+    'caec': (0, 3, 1),
+    'smoke': (0, 1, 1),
+    'ch2o': (1.0, 6.0, 0.1),
+    'scc': (0, 1, 1),
+    'faf': (0.0, 5.0, 1.0),
+    'tue': (1.0, 8.0, 0.5),
+    'calc': (0, 3, 1),
+}
+
+MTRANS_FEATURES = [name for name in FEATURE_NAMES if name.startswith('mtrans_')]
+
+
+def grid_size(domains=FEATURE_DOMAINS):
+    """Número de células da grade (o one-hot de ``mtrans`` conta como uma feature só)."""
+    size = len(MTRANS_FEATURES)
+    for name, (low, high, step) in domains.items():
+        if name not in MTRANS_FEATURES:
+            size *= int(round((high - low) / step)) + 1
+    return size
+
+
+class PredictionLookup:
+    """
+    Predições memorizadas (LRU) por célula da grade do formulário.
+    """
+
+    def __init__(self, server, max_entries=100_000, steps=None, domains=FEATURE_DOMAINS):
+        """
+        Parâmetros
+        ----------
+        server : model_serving.ModelServer
+            Serviço do modelo; a tabela é esvaziada quando o modelo é recarregado.
+        max_entries : int, opcional, default=100_000
+            Número máximo de células guardadas.
+        steps : dict, opcional
+            Passos maiores para algumas features (ex.: ``{'weight': 2, 'height': 0.02}``);
+            entradas próximas caem na mesma célula e a predição é feita no centro dela.
+        domains : dict, opcional
+            Domínios ``(mínimo, máximo, passo)`` de cada feature.
+        """
+        self.server = server
+        self.max_entries = max_entries
+        self.domains = {
+            name: (low, high, (steps or {}).get(name, step)) for name, (low, high, step) in domains.items()
+        }
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._model = None
+        self._feature_names = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, dict_processed):
+        """Índices da célula de ``dict_processed`` na grade (tupla de ``int``)."""
+        return tuple(
+            int(round((float(dict_processed[name]) - low) / step))
+            for name, (low, _, step) in self.domains.items()
+        )
+
+    def values(self, key):
+        """Valores da célula (``dict_processed`` equivalente)."""
+        return {
+            name: round(low + index * step, 6)
+            for (name, (low, _, step)), index in zip(self.domains.items(), key)
+        }
+
+    def _check_model(self):
+        # Modelo recarregado (arquivo mudou): as predições guardadas não valem mais
+        model, feature_names = self.server.get_model()
+        with self._lock:
+            if model is not self._model:
+                self._model, self._feature_names = model, feature_names
+                self._clear()
+            return self._model, self._feature_names
+
+    def _clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _insert(self, model, items):
+        # Só guarda se o modelo ainda é o da tabela (senão a tabela já foi esvaziada)
+        with self._lock:
+            if model is not self._model:
+                return
+            for key, result in items:
+                self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def predict(self, dict_processed):
+        """
+        Classe prevista para ``dict_processed``, consultando a tabela antes do modelo.
+
+        Retorno
+        -------
+        result : int
+        """
+        model, _ = self._check_model()
+        key = self.key(dict_processed)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return result
+            self.misses += 1
+
+        result = self.server.predict_one(self.values(key))
+        self._insert(model, [(key, result)])
+        return result
+
+    def precompute(self, grid, base, chunk_size=50_000):
+        """
+        Preenche a tabela com uma sub-grade, prevista em lote.
+
+        Parâmetros
+        ----------
+        grid : dict
+            Feature -> lista de valores a combinar (produto cartesiano). Para
+            ``mtrans`` use a chave ``'mtrans'`` com os nomes das colunas one-hot.
+        base : dict
+            ``dict_processed`` com os valores das features fora de ``grid``.
+        chunk_size : int, opcional, default=50_000
+            Linhas por chamada de ``predict``.
+
+        Retorno
+        -------
+        n_cells : int
+            Células calculadas.
+        """
+        names = list(grid)
+        n_cells = math.prod(len(grid[name]) for name in names)
+        if n_cells > self.max_entries:
+            raise ValueError(f"Sub-grade com {n_cells} células não cabe na tabela (max_entries={self.max_entries})")
+
+        model, feature_names = self._check_model()
+        combinations = itertools.product(*(grid[name] for name in names))
+        while True:
+            chunk = list(itertools.islice(combinations, chunk_size))
+            if not chunk:
+                break
+            keys = []
+            for combination in chunk:
+                record = dict(base)
+                for name, value in zip(names, combination):
+                    if name == 'mtrans':
+                        record.update({feature: float(feature == value) for feature in MTRANS_FEATURES})
+                    else:
+                        record[name] = value
+                keys.append(self.key(record))
+            X = np.vstack([feature_vector(self.values(key), feature_names) for key in keys])
+            self._insert(model, zip(keys, predict_array(model, X, feature_names).tolist()))
+        return n_cells
+
+    def memory_bytes(self):
+        """Memória aproximada da tabela (dicionário + chaves; as classes são ints compartilhados)."""
+        with self._lock:
+            if not self._entries:
+                return sys.getsizeof(self._entries)
+            sample = next(iter(self._entries))
+            return sys.getsizeof(self._entries) + len(self._entries) * sys.getsizeof(sample)
+
+    def stats(self):
+        """Tamanho, memória, acertos e cobertura da grade."""
+        memory_bytes = self.memory_bytes()
+        with self._lock:
+            entries, hits, misses = len(self._entries), self.hits, self.misses
+        total = hits + misses
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'memory_bytes': memory_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+            'grid_size': grid_size(self.domains),
+            'grid_coverage': entries / grid_size(self.domains),
+        }
+
+
+def simulate_capacities(records, capacities, steps=None, domains=FEATURE_DOMAINS):
+    """
+    Memória x taxa de acerto de uma tabela LRU para uma sequência de submissões.
+
+    Só as chaves são simuladas (o modelo não é chamado).
+
+    Parâmetros
+    ----------
+    records : iterável de dict
+        Submissões (``dict_processed``) na ordem de chegada.
+    capacities : list of int
+        Tamanhos de tabela avaliados.
+    steps : dict, opcional
+        Mesmo parâmetro de ``PredictionLookup``.
+
+    Retorno
+    -------
+    report : pd.DataFrame
+        Colunas ``max_entries``, ``entries``, ``memory_bytes``, ``hit_rate``.
+    """
+    lookup = PredictionLookup(server=None, max_entries=0, steps=steps, domains=domains)
+    keys = [lookup.key(record) for record in records]
+    key_size = sys.getsizeof(keys[0]) if keys else 0
+
+    rows = []
+    for capacity in capacities:
+        entries, hits = OrderedDict(), 0
+        for key in keys:
+            if key in entries:
+                hits += 1
+                entries.move_to_end(key)
+                continue
+            entries[key] = None
+            if len(entries) > capacity:
+                entries.popitem(last=False)
+        rows.append({
+            'max_entries': capacity,
+            'entries': len(entries),
+            'memory_bytes': sys.getsizeof(entries) + len(entries) * key_size,
+            'hit_rate': hits / len(keys) if keys else 0.0,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,106 @@
+"""
+Pipeline salvo pelo ``generate_model.ipynb`` servido pelo ``model_serving``.
+
+O pipeline é ajustado como no notebook (``obesity_gold.csv``, mesmas classes de
+``utils``) e as entradas de uma linha passam por ``predict_array`` com os
+valores que o formulário produz (sliders com passo 0.1/0.5/1).
+
+Uso (a partir de ``code/streamlit``)::
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_serving  # noqa: E402
+from utils import MinMax, OneHotEncodingNames, OrdinalFeature  # noqa: E402
+
+GOLD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'data', 'gold',
+                         'obesity_gold.csv')
+
+# Valores possíveis dos sliders do ``app.py``
+SLIDERS = {
+    'ncp': np.arange(1.0, 8.0 + 1e-9, 1.0),
+    'ch2o': np.round(np.arange(1.0, 6.0 + 1e-9, 0.1), 1),
+    'faf': np.arange(0.0, 5.0 + 1e-9, 1.0),
+    'tue': np.arange(1.0, 8.0 + 1e-9, 0.5),
+}
+
+# ``dict_processed`` de uma submissão do formulário (valores padrão do app)
+FORM = {
+    'mtrans_Automóvel': 0.0, 'mtrans_Bicicleta': 0.0, 'mtrans_Caminhada': 0.0, 'mtrans_Motocicleta': 0.0,
+    'mtrans_Transporte público': 1.0, 'gender': 1, 'age': 25, 'height': 1.80, 'weight': 90, 'family_history': True,
+    'favc': False, 'fcvc': 2, 'ncp': 3.0, 'caec': 1, 'smoke': False, 'ch2o': 2.0, 'scc': False, 'faf': 2.0,
+    'tue': 1.0, 'calc': 0,
+}
+
+
+class PipelineServingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.gold = pd.read_csv(GOLD_PATH)
+        features = Pipeline([
+            ('OneHotEncoding', OneHotEncodingNames()),
+            ('ordinal_feature', OrdinalFeature()),
+            ('min_max_scaler', MinMax()),
+        ])
+        train = features.fit_transform(cls.gold)
+        forest = RandomForestClassifier(n_estimators=20, random_state=0)
+        forest.fit(train.loc[:, train.columns != 'obesity'], train['obesity'])
+
+        cls.work_path = tempfile.mkdtemp()
+        cls.model_path = os.path.join(cls.work_path, 'model.joblib')
+        joblib.dump(Pipeline(features.steps + [('model', forest)]), cls.model_path)
+        cls.model, cls.feature_names = model_serving.ModelServer(cls.model_path).get_model()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_path, ignore_errors=True)
+
+    def predict(self, **values):
+        X = model_serving.feature_vector({**FORM, **values}, self.feature_names)
+        return model_serving.predict_array(self.model, X, self.feature_names)[0]
+
+    def test_pickle_references_utils(self):
+        with open(self.model_path, 'rb') as file:
+            content = file.read()
+        self.assertIn(b'utils', content)
+        self.assertNotIn(b'__main__', content)
+
+    def test_training_codes_unchanged(self):
+        ordinal = self.model.named_steps['ordinal_feature']
+        encoded = ordinal.transform(self.gold.copy())
+        for column, categories in ordinal.categories_.items():
+            expected = self.gold[column].map({category: i for i, category in enumerate(categories)})
+            np.testing.assert_array_equal(encoded[column].to_numpy(), expected.to_numpy(dtype=float))
+
+    def test_slider_values_have_no_unknown_code(self):
+        ordinal = self.model.named_steps['ordinal_feature']
+        for column, values in SLIDERS.items():
+            frame = model_serving.pipeline_frame(
+                np.vstack([model_serving.feature_vector({**FORM, column: value}) for value in values])
+            )
+            encoded = ordinal.transform(frame)[column]
+            self.assertFalse((encoded == ordinal.unknown_value).any(), column)
+
+    def test_single_row_uses_nearest_category(self):
+        # ch2o 2.3 fica na categoria 2 (a mesma de 2.0); tue 1.4 na categoria 1
+        self.assertEqual(self.predict(ch2o=2.3), self.predict(ch2o=2.0))
+        self.assertEqual(self.predict(tue=1.4), self.predict(tue=1.0))
+        self.assertEqual(self.predict(ncp=8.0), self.predict(ncp=4.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
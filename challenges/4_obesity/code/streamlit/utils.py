@@ -1,7 +1,51 @@
 
+import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.preprocessing import OneHotEncoder, MinMaxScaler, OrdinalEncoder
+from sklearn.utils.validation import check_is_fitted
+
+
+# Dicionários de valores do formulário -> valores do modelo
+
+DICT_VALUE_OBESITY_TRANSLATION = {
+    "Feminino": 0,
+    "Masculino": 1,
+    "Transporte público": "Public_Transportation",
+    "Caminhada": "Walking",
+    "Automóvel": "Automobile",
+    "Motocicleta": "Motorbike",
+    "Bicicleta": "Bike"
+}
+
+DICT_RESULT = {
+    0: "Peso insuficiente",
+    1: "Peso Ideal",
+    2: "Sobrepeso Nível I",
+    3: "Sobrepeso Nível II",
+    4: "Obesidade Tipo I",
+    5: "Obesidade Tipo II",
+    6: "Obesidade Tipo III",   
+}
+
+
+DICT_FREQUENCY_FCVC = {
+  'Nunca': 1,
+  'Às vezes': 2,
+  'Sempre': 3
+}
+
+DICT_FREQUENCY_OBESITY = {
+  'Não': 0,
+  'Nunca': 0,
+  'Às vezes': 1,
+  'Frequentemente': 2,
+  'Sempre': 3
+}
+
+DICT_YES_NO_TO_BOOL = {
+  'Sim': True,
+  'Não': False
+}
 
 
 # Classes para pipeline
@@ -11,36 +55,47 @@ class OneHotEncodingNames(BaseEstimator,TransformerMixin):
 
         self.OneHotEncoding = OneHotEncoding
 
-    def fit(self,df):
+    def fit(self,df,y=None):
+        # aprende as categorias de cada feature (mesma ordem do OneHotEncoder: ordenadas)
+        missing = set(self.OneHotEncoding) - set(df.columns)
+        if missing:
+            raise KeyError(f"Colunas ausentes no DataFrame: {missing}")
+        self.categories_ = {
+            feature: sorted(df[feature].dropna().unique().tolist()) for feature in self.OneHotEncoding
+        }
+        # categoria -> posição, para transformar com uma consulta por valor
+        self.category_index_ = {
+            feature: {category: i for i, category in enumerate(categories)}
+            for feature, categories in self.categories_.items()
+        }
+        self.feature_names_out_ = [
+            f'{feature}_{category}' for feature, categories in self.categories_.items() for category in categories
+        ]
         return self
 
+    def get_feature_names_out(self,input_features=None):
+        check_is_fitted(self, 'categories_')
+        return np.array(self.feature_names_out_, dtype=object)
+
     def transform(self,df):
+        check_is_fitted(self, 'categories_')
         if (set(self.OneHotEncoding).issubset(df.columns)):
-            # função para one-hot-encoding das features
-            def one_hot_enc(df,OneHotEncoding):
-                one_hot_enc = OneHotEncoder()
-                one_hot_enc.fit(df[OneHotEncoding])
-                # obtendo o resultado dos nomes das colunas
-                feature_names = one_hot_enc.get_feature_names_out(OneHotEncoding)
-                # mudando o array do one hot encoding para um dataframe com os nomes das colunas
-                df = pd.DataFrame(one_hot_enc.transform(df[self.OneHotEncoding]).toarray(),
-                                  columns= feature_names,index=df.index)
-                return df
-
-            # função para concatenar as features com aquelas que não passaram pelo one-hot-encoding
-            def concat_with_rest(df,one_hot_enc_df,OneHotEncoding):
-                # get the rest of the features
-                outras_features = [feature for feature in df.columns if feature not in OneHotEncoding]
-                # concaternar o restante das features com as features que passaram pelo one-hot-encoding
-                df_concat = pd.concat([one_hot_enc_df, df[outras_features]],axis=1)
-                return df_concat
-
-            # one hot encoded dataframe
-            df_OneHotEncoding = one_hot_enc(df,self.OneHotEncoding)
-
-            # retorna o dataframe concatenado
-            df_full = concat_with_rest(df, df_OneHotEncoding,self.OneHotEncoding)
-            return df_full
+            # colunas one-hot primeiro e depois o restante das features, montadas em um único DataFrame
+            columns = {}
+            for feature in self.OneHotEncoding:
+                categories = self.categories_[feature]
+                # categorias não vistas no fit ficam com todas as colunas em 0
+                index = self.category_index_[feature]
+                positions = [index.get(value, len(categories)) for value in df[feature].tolist()]
+                one_hot = np.zeros((len(df), len(categories) + 1))
+                one_hot[np.arange(len(df)), positions] = 1.0
+                for i, category in enumerate(categories):
+                    columns[f'{feature}_{category}'] = one_hot[:, i]
+
+            outras_features = [feature for feature in df.columns if feature not in self.OneHotEncoding]
+            for feature in outras_features:
+                columns[feature] = df[feature].to_numpy()
+            return pd.DataFrame(columns, index=df.index)
 
         else:
             print('Uma ou mais features não estão no DataFrame')
@@ -49,30 +104,65 @@ class OneHotEncodingNames(BaseEstimator,TransformerMixin):
             return df
 
 class OrdinalFeature(BaseEstimator,TransformerMixin):
-    def __init__(self,ordinal_feature = ['fcvc','ncp', 'caec', 'ch2o', 'faf', 'tue', 'calc']):
+    def __init__(self,ordinal_feature = ['fcvc','ncp', 'caec', 'ch2o', 'faf', 'tue', 'calc'], unknown_value = -1):
         self.ordinal_feature = ordinal_feature
-    def fit(self,df):
+        self.unknown_value = unknown_value
+    def fit(self,df,y=None):
+        # aprende as categorias ordenadas de cada feature (como o OrdinalEncoder)
+        self.categories_ = {
+            ordinal: sorted(df[ordinal].dropna().unique().tolist())
+            for ordinal in self.ordinal_feature if ordinal in df.columns
+        }
+        self.category_index_ = {
+            ordinal: {category: float(i) for i, category in enumerate(categories)}
+            for ordinal, categories in self.categories_.items()
+        }
         return self
+    def _encode(self, ordinal, values):
+        categories = self.categories_[ordinal]
+        if not all(isinstance(category, (int, float, np.number)) for category in categories):
+            # categorias não numéricas: só valores vistos no fit; os demais recebem ``unknown_value``
+            index = self.category_index_[ordinal]
+            return [index.get(value, self.unknown_value) for value in values.tolist()]
+        # categorias numéricas: posição da categoria mais próxima (empate fica com a maior);
+        # valores fora da faixa do fit ficam na primeira/última e nulos recebem ``unknown_value``
+        categories = np.asarray(categories, dtype=float)
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+        upper = np.clip(np.searchsorted(categories, numbers), 0, len(categories) - 1)
+        lower = np.clip(upper - 1, 0, None)
+        position = np.where(np.abs(numbers - categories[lower]) < np.abs(categories[upper] - numbers), lower, upper)
+        return np.where(np.isnan(numbers), self.unknown_value, position)
     def transform(self,df):
+        check_is_fitted(self, 'categories_')
+        features, encoded = [], []
         for ordinal in self.ordinal_feature:
-          if ordinal in df.columns:
-              ordinal_encoder = OrdinalEncoder()
-              df[self.ordinal_feature] = ordinal_encoder.fit_transform(df[self.ordinal_feature])
-              return df
+          if ordinal in df.columns and ordinal in self.category_index_:
+              features.append(ordinal)
+              encoded.append(self._encode(ordinal, df[ordinal]))
           else:
               print(f"{ordinal} não está no DataFrame")
-              return df
+        if features:
+            df[features] = np.array(encoded, dtype=float).T
+        return df
           
 class MinMax(BaseEstimator,TransformerMixin):
     def __init__(self,min_max_scaler  = ['age', 'weight', 'height']):
         self.min_max_scaler = min_max_scaler
-    def fit(self,df):
+    def fit(self,df,y=None):
+        # aprende mínimo e máximo de cada feature (como o MinMaxScaler)
+        values = df[self.min_max_scaler].to_numpy(dtype=float)
+        self.data_min_ = np.nanmin(values, axis=0)
+        self.data_max_ = np.nanmax(values, axis=0)
+        data_range = self.data_max_ - self.data_min_
+        # amplitude zero: divide por 1, como o MinMaxScaler
+        self.scale_ = 1.0 / np.where(data_range == 0, 1.0, data_range)
+        self.min_ = -self.data_min_ * self.scale_
         return self
     def transform(self,df):
+        check_is_fitted(self, 'scale_')
         if (set(self.min_max_scaler).issubset(df.columns)):
-            min_max_enc = MinMaxScaler()
-            df[self.min_max_scaler] = min_max_enc.fit_transform(df[self.min_max_scaler ])
+            df[self.min_max_scaler] = df[self.min_max_scaler].to_numpy(dtype=float) * self.scale_ + self.min_
             return df
         else:
             print('Uma ou mais features não estão no DataFrame')
-            return df
\ No newline at end of file
+            return df
@@ -0,0 +1,234 @@
+"""
+Leitura incremental dos exports JSON (applicants, prospects e vagas) para parquet.
+
+Os arquivos do bronze são um único objeto JSON ``{id: registro, ...}``. Em vez
+de ``json.load`` no arquivo inteiro, ``iter_top_level_items`` lê o arquivo em
+blocos e decodifica um par ``(id, registro)`` por vez com
+``json.JSONDecoder.raw_decode``: a memória usada é limitada ao maior registro
+mais o tamanho do bloco, independente do tamanho do export.
+
+Os registros são achatados (mesma regra de ``parser_values_from_json`` do
+``parser_json.ipynb``), agrupados em lotes e gravados como row groups de um
+parquet com schema fixo (todas as colunas ``string``).
+
+Uso pela linha de comando::
+
+    python json_stream.py applicants data/bronze/applicants.json data/silver/application.parquet
+    python json_stream.py prospects data/bronze/prospects.json data/silver/prospects.parquet
+    python json_stream.py vagas data/bronze/vagas.json data/silver/vagas.parquet
+"""
+import json
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_WHITESPACE = ' \t\n\r'
+
+# Campos de cada prospect (lista ``prospects`` de prospects.json) -> coluna no silver
+PROSPECT_FIELD_NAMES = {
+    'nome': 'prospect_name',
+    'ultima_atualizacao': 'prospect_data_ultima_atualizacao',
+    'recrutador': 'prospect_recrutador_nome',
+}
+
+
+def iter_top_level_items(path, encoding='utf-8', chunk_size=1 << 20):
+    """
+    Itera sobre os pares ``(chave, valor)`` do objeto JSON raiz de um arquivo.
+
+    Parâmetros
+    ----------
+    path : str
+        Arquivo JSON cujo conteúdo é um objeto (``{...}``).
+    encoding : str, opcional, default='utf-8'
+    chunk_size : int, opcional, default=1 MiB
+        Caracteres lidos por vez.
+
+    Retorno
+    -------
+    iterador de (str, objeto)
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding=encoding) as file:
+        buffer, position, eof = '', 0, False
+
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            return not eof
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        def expect(char):
+            nonlocal position
+            skip_whitespace()
+            if position >= len(buffer) or buffer[position] != char:
+                found = buffer[position:position + 20] if position < len(buffer) else 'EOF'
+                raise ValueError(f"JSON inválido em {path}: esperado '{char}', encontrado {found!r}")
+            position += 1
+
+        def decode():
+            # Um valor pode atravessar o fim do bloco: lê mais até decodificar
+            nonlocal position
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+                # Números podem ter sido cortados no fim do bloco
+                if end == len(buffer) and not eof and fill():
+                    continue
+                position = end
+                return value
+
+        expect('{')
+        skip_whitespace()
+        if position < len(buffer) and buffer[position] == '}':
+            return
+
+        while True:
+            key = decode()
+            expect(':')
+            yield key, decode()
+
+            skip_whitespace()
+            if position < len(buffer) and buffer[position] == ',':
+                position += 1
+                continue
+            expect('}')
+            return
+
+
+def _flatten(value, row):
+    # Mesma regra do parser_values_from_json: dicionários aninhados são mesclados
+    for key, item in value.items():
+        if isinstance(item, dict):
+            row.update(**item)
+        else:
+            row[key] = item
+    return row
+
+
+def flatten_record(key, value, key_column='job_id'):
+    """Achata um registro de applicants.json ou vagas.json em uma linha."""
+    return [_flatten(value, {key_column: key})]
+
+
+def flatten_prospects(key, value, key_column='job_id'):
+    """Uma linha por prospect da vaga (``prospects``), com os campos da vaga."""
+    job = {key_column: key}
+    _flatten({k: v for k, v in value.items() if k != 'prospects'}, job)
+
+    rows = []
+    for prospect in value.get('prospects') or []:
+        row = dict(job)
+        for field, item in prospect.items():
+            row[PROSPECT_FIELD_NAMES.get(field, f'prospect_{field}')] = item
+        rows.append(row)
+    return rows
+
+
+DATASETS = {
+    'applicants': (flatten_record, 'job_id'),
+    'prospects': (flatten_prospects, 'job_id'),
+    'vagas': (flatten_record, 'id'),
+}
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def iter_record_batches(path, flatten, key_column, batch_size=10_000, encoding='utf-8'):
+    """
+    Itera sobre lotes de linhas achatadas (listas de dicionários).
+    """
+    batch = []
+    for key, value in iter_top_level_items(path, encoding=encoding):
+        batch.extend(flatten(key, value, key_column=key_column))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def infer_schema(path, flatten, key_column, encoding='utf-8'):
+    """
+    Schema fixo (todas as colunas ``string``) a partir de uma passada só pelas chaves.
+
+    Apenas os nomes das colunas ficam em memória; a ordem é a da primeira
+    ocorrência, com a coluna de id primeiro.
+    """
+    columns = {key_column: None}
+    for key, value in iter_top_level_items(path, encoding=encoding):
+        for row in flatten(key, value, key_column=key_column):
+            for column in row:
+                columns.setdefault(column, None)
+    return pa.schema([pa.field(column, pa.string()) for column in columns])
+
+
+def json_to_parquet(path, output_path, dataset, schema=None, batch_size=10_000, encoding='utf-8'):
+    """
+    Converte um export JSON em parquet, um row group por lote, com memória limitada.
+
+    Parâmetros
+    ----------
+    path : str
+        Export JSON do bronze.
+    output_path : str
+        Parquet de saída.
+    dataset : str
+        ``'applicants'``, ``'prospects'`` ou ``'vagas'`` (regra de achatamento e coluna de id).
+    schema : pa.Schema, opcional
+        Schema fixo. Se omitido, é inferido com ``infer_schema`` (uma passada a mais).
+        Colunas fora do schema são descartadas; colunas ausentes ficam nulas.
+    batch_size : int, opcional, default=10_000
+        Linhas por row group.
+
+    Retorno
+    -------
+    n_rows : int
+        Linhas gravadas.
+    """
+    flatten, key_column = DATASETS[dataset]
+    if schema is None:
+        schema = infer_schema(path, flatten, key_column, encoding=encoding)
+
+    n_rows = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for batch in iter_record_batches(path, flatten, key_column, batch_size=batch_size, encoding=encoding):
+            arrays = [
+                pa.array([_to_string(row.get(field.name)) for row in batch], type=field.type)
+                for field in schema
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema), row_group_size=len(batch))
+            n_rows += len(batch)
+    return n_rows
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in DATASETS:
+        raise SystemExit(f"Uso: python json_stream.py {{{'|'.join(DATASETS)}}} ENTRADA.json SAIDA.parquet")
+
+    start = time.perf_counter()
+    n_rows = json_to_parquet(sys.argv[2], sys.argv[3], sys.argv[1])
+    print(f"{n_rows} linhas gravadas em {time.perf_counter() - start:.1f}s -> {sys.argv[3]}")
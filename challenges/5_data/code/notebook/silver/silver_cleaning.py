@@ -0,0 +1,296 @@
+"""
+Limpeza do silver com operações vetorizadas por coluna (kernels de string do Arrow).
+
+Cada função recebe uma coluna inteira (``pd.Series``) e devolve o mesmo
+resultado das funções aplicadas célula a célula no ``process_silver.ipynb``
+(``normalize_text_field``, ``normalize_date_field``, ``normalize_remuneracao``,
+``split_and_clean_list_field``, ``clean_codigo_field``,
+``normalize_phone_field``, ``standardize_categorical_field`` e
+``extract_seniority_level``), sem ``apply``: a coluna é convertida uma vez para
+``pyarrow`` e processada com ``pyarrow.compute``.
+
+``profile_empty_values`` substitui os blocos ``applymap`` do
+``notebooks_joins.ipynb``: nulos, vazios e distintos de todas as colunas em uma
+única passada por coluna.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Mesmo conjunto de espaços de ``str.strip``/``\\s`` do Python (o ``\\s`` do RE2 é só ASCII)
+_WHITESPACE = r'[\t-\r\x{1c}-\x{1f}\x{85}\p{Z}]'
+
+PLACEHOLDER_TEXTS = ['em anexo', 'anexo', '-', 'n/a', 'na', 'não informado', 'não se aplica']
+
+LIST_SEPARATORS = r'[;,|\n]'
+
+# Palavras procuradas no título (em minúsculas), na ordem de prioridade de ``extract_seniority_level``
+SENIORITY_LEVELS = [
+    ('Senior', ['senior', 'sr', 'sênior']),
+    ('Junior', ['junior', 'jr', 'júnior']),
+    ('Pleno', ['pleno', 'mid', 'middle']),
+    ('Especialista', ['especialista', 'specialist', 'expert']),
+    ('Coordenador', ['coordenador', 'coordinator', 'lead']),
+    ('Gerente', ['gerente', 'manager', 'gestor']),
+    ('Diretor', ['diretor', 'director']),
+    ('Analista', ['analista', 'analyst']),
+    ('Desenvolvedor', ['desenvolvedor', 'developer', 'programador']),
+    ('Estagiário', ['estagiário', 'trainee', 'intern']),
+]
+SENIORITY_DEFAULT = 'Não Classificado'
+
+_DATE_PATTERNS = [
+    (r'(?P<a>\d{4})-(?P<b>\d{2})-(?P<c>\d{2})', ('a', 'b', 'c')),  # YYYY-MM-DD
+    (r'(?P<a>\d{2})/(?P<b>\d{2})/(?P<c>\d{4})', ('c', 'b', 'a')),  # DD/MM/YYYY
+    (r'(?P<a>\d{2})-(?P<b>\d{2})-(?P<c>\d{4})', ('c', 'b', 'a')),  # DD-MM-YYYY
+]
+
+
+def _to_arrow(series):
+    """Coluna como ``pa.StringArray`` (valores não textuais viram ``str(x)``, nulos ficam nulos)."""
+    if isinstance(series.dtype, pd.ArrowDtype) and pa.types.is_string(series.dtype.pyarrow_dtype):
+        return pa.array(series)
+    values = series.astype(object)
+    if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+        notna = values.notna()
+        values = values.where(~notna, values.astype(str))
+    return pa.array(values, type=pa.string(), from_pandas=True)
+
+
+def _to_series(array, series):
+    """Resultado Arrow como ``pd.Series`` (string[pyarrow]) com o índice original."""
+    return pd.Series(pd.arrays.ArrowStringArray(pc.cast(array, pa.large_string())), index=series.index)
+
+
+def _strip(array):
+    return pc.replace_substring_regex(array, f'^{_WHITESPACE}+|{_WHITESPACE}+$', '')
+
+
+def _strip_and_collapse(array):
+    return pc.replace_substring_regex(_strip(array), f'{_WHITESPACE}+', ' ')
+
+
+def _normalize_text(array):
+    array = _strip_and_collapse(array)
+    is_empty = pc.equal(array, '')
+    is_placeholder = pc.is_in(pc.utf8_lower(array), value_set=pa.array(PLACEHOLDER_TEXTS))
+    return pc.if_else(pc.or_(is_empty, is_placeholder), pa.scalar(None, pa.string()), array)
+
+
+def _is_blank(array):
+    return pc.fill_null(pc.equal(_strip(array), ''), True)
+
+
+def normalize_text_column(series, blank_value=None):
+    """
+    Versão vetorizada de ``normalize_text_field``.
+
+    Remove espaços nas pontas, colapsa espaços internos e troca vazios e
+    textos de preenchimento (``PLACEHOLDER_TEXTS``) por nulo.
+
+    Parâmetros
+    ----------
+    series : pd.Series
+    blank_value : str, opcional
+        Valor para entradas nulas ou só com espaços (ex.: o padrão de um campo
+        categórico); textos de preenchimento continuam virando nulo.
+    """
+    array = _to_arrow(series)
+    result = _normalize_text(array)
+    if blank_value is not None:
+        result = pc.if_else(_is_blank(array), pa.scalar(blank_value, pa.string()), result)
+    return _to_series(result, series)
+
+
+def standardize_categorical_column(series, mapping_dict=None, default_value=None):
+    """
+    Versão vetorizada de ``standardize_categorical_field``.
+
+    A regra (primeira chave do ``mapping_dict`` contida no valor, ou que contém
+    o valor) é avaliada uma vez por valor distinto, e o resultado é
+    distribuído para as linhas pelos códigos de ``pd.factorize``.
+    """
+    array = _to_arrow(series)
+    cleaned = pc.utf8_lower(_strip(array))
+    blank = _is_blank(array)
+    codes, uniques = pd.factorize(pd.Series(pc.if_else(blank, pa.scalar(None, pa.string()), cleaned).to_pylist(),
+                                            dtype=object))
+
+    keys = [(key.lower(), mapped_value) for key, mapped_value in (mapping_dict or {}).items()]
+    mapped = []
+    for value in uniques:
+        match = next((mapped_value for key, mapped_value in keys if key in value or value in key), None)
+        mapped.append(match if match is not None else (value if not default_value else default_value))
+
+    result = np.array(mapped + [default_value], dtype=object)[codes]
+    return pd.Series(result, index=series.index, dtype=object)
+
+
+def extract_seniority_level_column(series):
+    """
+    Versão vetorizada de ``extract_seniority_level``: nível (``SENIORITY_LEVELS``) procurado no título.
+
+    Nulos e ``''`` viram nulo; títulos sem nenhuma das palavras, ``SENIORITY_DEFAULT``.
+    """
+    array = _to_arrow(series)
+    lower = pc.utf8_lower(array)
+    result = pa.array([SENIORITY_DEFAULT] * len(array), pa.string())
+    # Do menos para o mais prioritário: o último ``if_else`` aplicado é o que vale
+    for level, words in reversed(SENIORITY_LEVELS):
+        pattern = '|'.join(re.escape(word) for word in words)
+        found = pc.fill_null(pc.match_substring_regex(lower, pattern), False)
+        result = pc.if_else(found, pa.scalar(level, pa.string()), result)
+    empty = pc.fill_null(pc.equal(array, ''), True)
+    return _to_series(pc.if_else(empty, pa.scalar(None, pa.string()), result), series)
+
+
+def normalize_date_column(series):
+    """
+    Versão vetorizada de ``normalize_date_field``: primeira data reconhecida em ``YYYY-MM-DD``.
+    """
+    array = _to_arrow(series)
+    result = pa.nulls(len(array), pa.string())
+    # Padrões em ordem de prioridade: o primeiro que casar vence
+    for pattern, (year, month, day) in reversed(_DATE_PATTERNS):
+        match = pc.extract_regex(array, pattern)
+        date = pc.binary_join_element_wise(
+            pc.struct_field(match, year), pc.struct_field(match, month), pc.struct_field(match, day), '-'
+        )
+        result = pc.if_else(pc.is_valid(match), date, result)
+    return _to_series(result, series)
+
+
+def clean_codigo_column(series):
+    """Versão vetorizada de ``clean_codigo_field`` (remove o sufixo ``.0``)."""
+    array = _to_arrow(series)
+    cleaned = pc.replace_substring_regex(_strip(array), r'\.0$', '')
+    empty = pc.fill_null(pc.equal(array, ''), False)
+    return _to_series(pc.if_else(empty, pa.scalar(None, pa.string()), cleaned), series)
+
+
+def normalize_phone_column(series):
+    """Versão vetorizada de ``normalize_phone_field`` (só dígitos, com 10 ou mais)."""
+    digits = pc.replace_substring_regex(_to_arrow(series), r'[^\d]', '')
+    valid = pc.fill_null(pc.greater_equal(pc.utf8_length(digits), 10), False)
+    return _to_series(pc.if_else(valid, digits, pa.scalar(None, pa.string())), series)
+
+
+def normalize_remuneracao_column(series):
+    """
+    Versão vetorizada de ``normalize_remuneracao``: maior número do texto, como ``float``.
+
+    Como na versão original, se algum número do texto não é um ``float``
+    válido (ex.: ``'1.000,00'`` vira ``'1.000.00'``), o valor inteiro fica nulo.
+    """
+    array = pc.utf8_lower(_to_arrow(series))
+    array = pc.replace_substring_regex(array, f'(r|\\$|{_WHITESPACE})', '')
+    array = pc.replace_substring_regex(array, r'(mensal|por hora|hora|mês)', '')
+
+    # Números ([\d.,]+) separados por espaço e quebrados em listas
+    numbers = pc.replace_substring_regex(array, r'[^\d.,]+', ' ')
+    numbers = pc.split_pattern(_strip(numbers), ' ')
+    flat = pc.list_flatten(numbers)
+    parents = pc.list_parent_indices(numbers).to_numpy()
+
+    tokens = pd.Series(pc.replace_substring(flat, ',', '.').to_pylist(), dtype=object)
+    keep = tokens.ne('').to_numpy()
+    values = pd.to_numeric(tokens[keep], errors='coerce').to_numpy(dtype=float)
+    parents = parents[keep]
+
+    grouped = pd.DataFrame({'row': parents, 'value': values}).groupby('row')['value']
+    result = np.full(len(series), np.nan)
+    maxima = grouped.max()
+    # ``float()`` falhando em um dos números anula o valor inteiro
+    maxima[grouped.count() < grouped.size()] = np.nan
+    result[maxima.index.to_numpy()] = maxima.to_numpy()
+    return pd.Series(result, index=series.index, dtype=float)
+
+
+def split_and_clean_list_column(series, separators=LIST_SEPARATORS):
+    """
+    Versão vetorizada de ``split_and_clean_list_field``: lista de itens limpos por linha.
+
+    Cada item é normalizado como em ``normalize_text_column`` e mantido se
+    tiver mais de 2 caracteres; linhas nulas ou vazias viram ``[]``.
+    """
+    lists = pc.split_pattern_regex(_to_arrow(series), separators)
+    flat = _normalize_text(pc.list_flatten(lists))
+    parents = pc.list_parent_indices(lists)
+
+    keep = pc.fill_null(pc.greater(pc.utf8_length(flat), 2), False)
+    rows = pc.filter(parents, keep).to_numpy()
+
+    # Remonta as listas a partir dos itens mantidos (já em ordem de linha)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(series)))]).astype(np.int32)
+    lists = pa.ListArray.from_arrays(pa.array(offsets), pc.filter(flat, keep))
+    return pd.Series(lists.to_pylist(), index=series.index, dtype=object)
+
+
+def remove_empty_rows(df, max_null_fraction=0.9):
+    """Remove linhas com ``max_null_fraction`` ou mais de valores nulos."""
+    null_fraction = df.isna().to_numpy().mean(axis=1) if len(df.columns) else np.zeros(len(df))
+    df_cleaned = df[null_fraction < max_null_fraction].copy()
+    print(f"Removed {len(df) - len(df_cleaned)} empty rows")
+    return df_cleaned
+
+
+def profile_empty_values(df, columns=None, distinct=True):
+    """
+    Perfil de nulos e vazios de cada coluna, em uma única passada por coluna.
+
+    Substitui a combinação ``isna().sum()`` + ``applymap(lambda x: isinstance(x, str)
+    and x.strip() == "")`` + ``nunique()`` dos notebooks.
+
+    Parâmetros
+    ----------
+    df : pd.DataFrame
+    columns : list of str, opcional
+        Colunas avaliadas. Padrão: todas.
+    distinct : bool, opcional, default=True
+        Inclui ``qtd_distintos`` (valores distintos não nulos).
+
+    Retorno
+    -------
+    resumo : pd.DataFrame
+        Colunas ``coluna``, ``qtd_nulos``, ``qtd_vazios``, ``total_vazios``,
+        ``pct_vazios`` e (opcional) ``qtd_distintos``.
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    blank = f'^{_WHITESPACE}*$'
+
+    rows = []
+    for column in columns:
+        series = df[column]
+        try:
+            array = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Coluna object com tipos misturados: só os valores str contam como vazios
+            array = None
+
+        if array is not None:
+            n_nulls = array.null_count
+            n_empty = 0
+            if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+                n_empty = pc.sum(pc.match_substring_regex(array, blank)).as_py() or 0
+            n_distinct = pc.count_distinct(array).as_py() if distinct else None
+        else:
+            n_nulls = int(series.isna().sum())
+            is_str = series.map(type).eq(str)
+            n_empty = int(series[is_str].str.match(r'^\s*$').sum())
+            n_distinct = series.nunique() if distinct else None
+
+        row = {
+            'coluna': column,
+            'qtd_nulos': int(n_nulls),
+            'qtd_vazios': int(n_empty),
+            'total_vazios': int(n_nulls + n_empty),
+            'pct_vazios': round((n_nulls + n_empty) / len(df) * 100, 2) if len(df) else 0.0,
+        }
+        if distinct:
+            row['qtd_distintos'] = int(n_distinct)
+        rows.append(row)
+
+    return pd.DataFrame(rows)
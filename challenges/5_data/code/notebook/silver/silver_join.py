@@ -0,0 +1,317 @@
+"""
+Join out-of-core de vagas x applications x prospects, particionado por vaga.
+
+O ``notebooks_joins.ipynb`` faz dois ``merge`` em memória sobre as tabelas
+inteiras (vagas -> applications -> prospects, todos ``left`` pela vaga) e depois
+remove as chaves duplicadas (``job_id``/``job_id_prospect``). Como uma vaga tem
+vários applications e vários prospects, o resultado intermediário cresce muito.
+
+Aqui o join é feito em duas etapas com memória limitada:
+
+1. cada tabela é lida em lotes (``iter_batches``) e distribuída em ``n_buckets``
+   arquivos de staging pelo hash do id da vaga (e ordenada pelo código do
+   candidato dentro do bucket);
+2. cada bucket é lido sozinho, os dois ``left join`` são aplicados usando uma
+   única coluna de chave (as chaves das tabelas da direita são renomeadas
+   antes do merge, então nenhuma coluna duplicada é criada), as colunas
+   derivadas do notebook (``job_description_final``,
+   ``nivel_profissional_group`` e ``nivel_profissional_lvl``) são calculadas e
+   o resultado é gravado em um dataset parquet particionado por ``job_bucket``.
+
+A saída tem o mesmo schema do ``df_join`` do notebook (chave da vaga em ``id``)
+mais a coluna ``job_bucket``, com os mesmos tipos em todos os buckets. O
+particionamento é só pela vaga: os dois joins são por vaga, então todas as
+linhas de uma vaga precisam estar no mesmo bucket; o código do candidato
+(``prospect_codigo``) é a ordenação dentro do bucket.
+
+``read_job_partitions`` lê apenas os buckets das vagas pedidas.
+
+Uso pela linha de comando::
+
+    python silver_join.py vagas_processed.parquet application_processed.parquet \
+        prospects_processed.parquet data/silver/job_candidates --buckets 64
+"""
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+JOB_KEY = 'job_id'
+OUTPUT_KEY = 'id'
+BUCKET_COLUMN = 'job_bucket'
+
+# Colunas usadas no notebooks_joins.ipynb (a primeira é a chave da vaga)
+VAGAS_COLUMNS = [
+    'id', 'titulo_vaga', 'objetivo_vaga', 'principais_atividades', 'competencia_tecnicas_e_comportamentais',
+    'estado', 'nivel_academico', 'nivel_ingles', 'nivel_espanhol', 'nivel_profissional',
+]
+APPLICATION_COLUMNS = ['job_id', 'sexo', 'pcd', 'cv_pt']
+PROSPECT_COLUMNS = ['job_id', 'prospect_codigo', 'titulo', 'prospect_situacao_candidado_normalized']
+
+# Taxonomia de senioridade do notebooks_joins.ipynb
+SENIORIDADE_GROUP = {
+    'Aprendiz': 'Estagiário',
+    'Trainee': 'Estagiário',
+    'Estagiário': 'Estagiário',
+    'Assistente': 'Assistente',
+    'Auxiliar': 'Assistente',
+    'Técnico de Nível Médio': 'Assistente',
+    'Júnior': 'Analista Júnior',
+    'Pleno': 'Analista Pleno',
+    'Analista': 'Analista Pleno',
+    'Sênior': 'Analista Sênior',
+    'Especialista': 'Especialista',
+    'Líder': 'Líder',
+    'Supervisor': 'Supervisor',
+    'Coordenador': 'Coordenador',
+    'Gerente': 'Gerente',
+    'Head': 'Head',
+    'Diretor': 'Diretor',
+    'CEO': 'CEO',
+}
+SENIORIDADE_LVL = {
+    'Estagiário': 1,
+    'Assistente': 2,
+    'Analista Júnior': 3,
+    'Analista Pleno': 4,
+    'Analista Sênior': 5,
+    'Especialista': 6,
+    'Líder': 7,
+    'Supervisor': 8,
+    'Coordenador': 9,
+    'Gerente': 10,
+    'Head': 11,
+    'Diretor': 12,
+    'CEO': 13,
+}
+DERIVED_FIELDS = [
+    pa.field('job_description_final', pa.string()),
+    pa.field('nivel_profissional_group', pa.string()),
+    pa.field('nivel_profissional_lvl', pa.float64()),
+]
+
+
+def job_bucket(job_ids, n_buckets):
+    """
+    Bucket de cada id de vaga (hash estável entre execuções).
+
+    Parâmetros
+    ----------
+    job_ids : pd.Series ou sequência
+        Ids das vagas (convertidos para ``str``, como no notebook).
+    n_buckets : int
+
+    Retorno
+    -------
+    buckets : np.ndarray (int32)
+    """
+    job_ids = pd.Series(job_ids).astype(str)
+    return (pd.util.hash_pandas_object(job_ids, index=False).to_numpy() % n_buckets).astype('int32')
+
+
+def _partition_table(path, columns, staging_dir, name, n_buckets, batch_size):
+    """Distribui uma tabela em ``n_buckets`` arquivos de staging, lote a lote, e devolve o schema."""
+    parquet_file = pq.ParquetFile(path)
+    missing = [column for column in columns if column not in parquet_file.schema_arrow.names]
+    if missing:
+        raise KeyError(f"Colunas ausentes em {path}: {missing}")
+
+    # Schema fixo do arquivo de origem, com a chave renomeada para ``job_id`` (str)
+    fields = [parquet_file.schema_arrow.field(column) for column in columns]
+    schema = pa.schema([pa.field(JOB_KEY, pa.string())] + fields[1:])
+
+    os.makedirs(os.path.join(staging_dir, name), exist_ok=True)
+    writers = {}
+    try:
+        for batch in parquet_file.iter_batches(columns=columns, batch_size=batch_size):
+            df = batch.to_pandas().rename(columns={columns[0]: JOB_KEY})
+            df[JOB_KEY] = df[JOB_KEY].astype(str)
+
+            for bucket, part in df.groupby(job_bucket(df[JOB_KEY], n_buckets), sort=False):
+                if bucket not in writers:
+                    writers[bucket] = pq.ParquetWriter(
+                        os.path.join(staging_dir, name, f'{bucket:05d}.parquet'), schema
+                    )
+                writers[bucket].write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return schema
+
+
+def _read_bucket(staging_dir, name, bucket, schema, sort_column):
+    path = os.path.join(staging_dir, name, f'{bucket:05d}.parquet')
+    if not os.path.exists(path):
+        # Bucket sem linhas nesta tabela: frame vazio com os tipos do staging
+        return schema.empty_table().to_pandas()
+    df = pd.read_parquet(path)
+    order = [JOB_KEY] + ([sort_column] if sort_column in df.columns else [])
+    return df.sort_values(order, kind='stable').reset_index(drop=True)
+
+
+def add_job_columns(df_join):
+    """
+    Colunas derivadas do ``notebooks_joins.ipynb`` (descrição final e senioridade).
+
+    Parâmetros
+    ----------
+    df_join : pd.DataFrame
+        Resultado do join, com ``principais_atividades``,
+        ``competencia_tecnicas_e_comportamentais`` e ``nivel_profissional``.
+
+    Retorno
+    -------
+    df_join : pd.DataFrame
+        O mesmo DataFrame, com as colunas novas.
+    """
+    # Se as duas descrições forem iguais mantém uma só; senão concatena com " | "
+    a = df_join['principais_atividades'].astype('string')
+    b = df_join['competencia_tecnicas_e_comportamentais'].astype('string')
+    df_join['job_description_final'] = np.where(
+        a.fillna('').str.strip() == b.fillna('').str.strip(),
+        a,
+        a.str.cat(b, na_rep='', sep=' | '),
+    )
+    df_join['nivel_profissional_group'] = df_join['nivel_profissional'].map(SENIORIDADE_GROUP)
+    df_join['nivel_profissional_lvl'] = df_join['nivel_profissional_group'].map(SENIORIDADE_LVL).astype('float64')
+    return df_join
+
+
+def join_bucket(df_vagas, df_application, df_prospect):
+    """
+    Mesmo join do ``notebooks_joins.ipynb`` para um bucket.
+
+    Parâmetros
+    ----------
+    df_vagas, df_application, df_prospect : pd.DataFrame
+        Partes do bucket, todas com a chave da vaga em ``job_id`` (str).
+
+    Retorno
+    -------
+    df_join : pd.DataFrame
+        Com a chave da vaga em ``id`` e as colunas derivadas, como no notebook.
+    """
+    df_join = df_vagas.merge(df_application, how='left', on=JOB_KEY, suffixes=('_vaga', '_app'))
+    df_join = df_join.merge(df_prospect, how='left', on=JOB_KEY, suffixes=('', '_prospect'))
+    return add_job_columns(df_join.rename(columns={JOB_KEY: OUTPUT_KEY}))
+
+
+def _output_schema(columns, schemas):
+    """Schema de saída: cada coluna do join com o tipo da tabela de origem (inclusive com sufixo)."""
+    types = {OUTPUT_KEY: pa.string(), BUCKET_COLUMN: pa.int32()}
+    types.update({field.name: field.type for field in DERIVED_FIELDS})
+    # Em nomes repetidos o merge mantém o da esquerda e põe sufixo no outro (ou nos dois)
+    for name, suffix in (('vagas', '_vaga'), ('application', '_app'), ('prospect', '_prospect')):
+        for field in schemas[name]:
+            if field.name != JOB_KEY:
+                types.setdefault(field.name, field.type)
+                types.setdefault(field.name + suffix, field.type)
+    return pa.schema([pa.field(column, types[column]) for column in columns])
+
+
+def build_job_candidate_dataset(vagas_path, application_path, prospect_path, output_path, n_buckets=64,
+                                vagas_columns=VAGAS_COLUMNS, application_columns=APPLICATION_COLUMNS,
+                                prospect_columns=PROSPECT_COLUMNS, batch_size=50_000):
+    """
+    Gera o dataset vagas x applications x prospects particionado por ``job_bucket``.
+
+    Parâmetros
+    ----------
+    vagas_path, application_path, prospect_path : str
+        Parquets do silver (a primeira coluna de cada lista de colunas é a chave da vaga).
+    output_path : str
+        Diretório do dataset de saída (substituído se existir).
+    n_buckets : int, opcional, default=64
+        Número de partições; a memória usada é a do maior bucket.
+    batch_size : int, opcional, default=50_000
+        Linhas lidas por lote na etapa de particionamento.
+
+    Retorno
+    -------
+    n_rows : int
+        Linhas gravadas.
+    """
+    staging_dir = f'{output_path}.staging'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    shutil.rmtree(output_path, ignore_errors=True)
+
+    # nome -> (caminho, colunas, coluna de ordenação dentro do bucket)
+    tables = {
+        'vagas': (vagas_path, list(vagas_columns), None),
+        'application': (application_path, list(application_columns), None),
+        'prospect': (prospect_path, list(prospect_columns), 'prospect_codigo'),
+    }
+    n_rows = 0
+    output_schema = None
+    try:
+        schemas = {
+            name: _partition_table(path, columns, staging_dir, name, n_buckets, batch_size)
+            for name, (path, columns, _) in tables.items()
+        }
+
+        for bucket in range(n_buckets):
+            parts = {
+                name: _read_bucket(staging_dir, name, bucket, schemas[name], sort_column)
+                for name, (_, _, sort_column) in tables.items()
+            }
+            if parts['vagas'].empty:
+                continue
+
+            df_join = join_bucket(parts['vagas'], parts['application'], parts['prospect'])
+            df_join[BUCKET_COLUMN] = bucket
+            if output_schema is None:
+                output_schema = _output_schema(df_join.columns, schemas)
+            pq.write_to_dataset(
+                pa.Table.from_pandas(df_join, schema=output_schema, preserve_index=False), output_path,
+                partition_cols=[BUCKET_COLUMN], basename_template=f'part-{bucket:05d}-{{i}}.parquet',
+            )
+            n_rows += len(df_join)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return n_rows
+
+
+def read_job_partitions(dataset_path, job_ids, n_buckets, columns=None):
+    """
+    Lê do dataset apenas as linhas (e partições) das vagas pedidas.
+
+    Parâmetros
+    ----------
+    dataset_path : str
+        Dataset gerado por ``build_job_candidate_dataset``.
+    job_ids : sequência
+        Ids das vagas.
+    n_buckets : int
+        O mesmo ``n_buckets`` usado na geração.
+    columns : list of str, opcional
+
+    Retorno
+    -------
+    df : pd.DataFrame
+    """
+    job_ids = pd.Series(list(job_ids)).astype(str)
+    buckets = sorted(set(job_bucket(job_ids, n_buckets).tolist()))
+    dataset = ds.dataset(dataset_path, format='parquet', partitioning='hive')
+    row_filter = ds.field(BUCKET_COLUMN).isin(buckets) & ds.field(OUTPUT_KEY).isin(job_ids.tolist())
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Join vagas x applications x prospects particionado por vaga.')
+    parser.add_argument('vagas')
+    parser.add_argument('application')
+    parser.add_argument('prospect')
+    parser.add_argument('output')
+    parser.add_argument('--buckets', type=int, default=64)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_rows = build_job_candidate_dataset(args.vagas, args.application, args.prospect, args.output, args.buckets)
+    print(f"{n_rows} linhas gravadas em {time.perf_counter() - start:.1f}s -> {args.output}")
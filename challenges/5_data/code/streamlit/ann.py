@@ -0,0 +1,185 @@
+"""
+Busca aproximada (ANN) de candidatos sobre os vetores TF-IDF, em processo.
+
+O índice projeta os vetores TF-IDF em um espaço denso pequeno (TruncatedSVD),
+agrupa os candidatos em ``n_lists`` listas invertidas (k-means, estilo IVF) e,
+na consulta, visita apenas as ``n_probe`` listas cujos centróides são mais
+próximos da vaga. Os candidatos dessas listas são pontuados com a similaridade
+do cosseno exata no índice TF-IDF esparso, então os scores retornados são os
+mesmos da busca exata; só o conjunto visitado é aproximado.
+
+``n_probe`` é o controle de recall x latência: mais listas visitadas, maior o
+recall e maior o custo. ``recall_report`` mede recall@k contra a busca exata.
+
+O índice é serializável com ``joblib.dump``/``joblib.load``.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+
+class ApproximateCandidateIndex:
+    """
+    Índice IVF sobre a projeção SVD dos vetores TF-IDF dos candidatos.
+    """
+
+    def __init__(self, n_components=128, n_lists=None, n_probe=8, random_state=42):
+        """
+        Parâmetros
+        ----------
+        n_components : int, opcional, default=128
+            Dimensão da projeção (TruncatedSVD).
+        n_lists : int, opcional
+            Número de listas invertidas. Padrão: ``sqrt(n_candidatos)``.
+        n_probe : int, opcional, default=8
+            Listas visitadas por consulta (controle de recall x latência).
+        random_state : int, opcional, default=42
+            Semente do SVD e do k-means.
+        """
+        self.n_components = n_components
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.random_state = random_state
+
+    def fit(self, candidate_index):
+        """
+        Constrói o índice a partir do índice exato de candidatos.
+
+        Parâmetros
+        ----------
+        candidate_index : scipy.sparse.csr_matrix
+            Índice com linhas normalizadas (``utils.build_candidate_index``).
+
+        Retorno
+        -------
+        self : ApproximateCandidateIndex
+        """
+        self.candidate_index = sparse.csr_matrix(candidate_index)
+        n_samples, n_features = self.candidate_index.shape
+
+        n_components = max(1, min(self.n_components, n_features - 1, n_samples - 1))
+        self.svd_ = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+        embeddings = normalize(self.svd_.fit_transform(self.candidate_index))
+
+        n_lists = self.n_lists or int(np.sqrt(n_samples))
+        n_lists = max(1, min(n_lists, n_samples))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=self.random_state, n_init=3)
+        labels = kmeans.fit_predict(embeddings)
+        self.centroids_ = normalize(kmeans.cluster_centers_)
+
+        # Listas invertidas: candidatos agrupados por lista, com deslocamentos de início/fim
+        self.list_members_ = np.argsort(labels, kind='stable')
+        self.list_offsets_ = np.searchsorted(labels[self.list_members_], np.arange(n_lists + 1))
+        return self
+
+    def _project(self, query_vector):
+        return normalize(self.svd_.transform(query_vector))
+
+    def candidates(self, query_vector, n_probe=None):
+        """
+        Retorna as posições dos candidatos das ``n_probe`` listas mais próximas.
+
+        Parâmetros
+        ----------
+        query_vector : scipy.sparse matrix (1 x n_features)
+            Vetor TF-IDF da vaga.
+        n_probe : int, opcional
+            Sobrescreve ``self.n_probe`` nesta consulta.
+
+        Retorno
+        -------
+        row_ids : np.ndarray
+            Posições (ordenadas) dos candidatos visitados.
+        """
+        n_probe = min(n_probe or self.n_probe, self.centroids_.shape[0])
+        centroid_scores = self.centroids_ @ self._project(query_vector).ravel()
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        row_ids = np.concatenate([
+            self.list_members_[self.list_offsets_[probe]:self.list_offsets_[probe + 1]] for probe in probes
+        ])
+        return np.sort(row_ids)
+
+    def search(self, query_vector, top_n=10, n_probe=None, min_score=None):
+        """
+        Busca aproximada dos ``top_n`` candidatos mais similares.
+
+        Retorno
+        -------
+        row_ids : np.ndarray
+            Posições dos candidatos, em ordem decrescente de similaridade.
+        scores : np.ndarray
+            Similaridade do cosseno (exata) de cada candidato.
+        """
+        query_vector = normalize(sparse.csr_matrix(query_vector, dtype=np.float64))
+        row_ids = self.candidates(query_vector, n_probe=n_probe)
+        scores = (self.candidate_index[row_ids] @ query_vector.T).toarray().ravel()
+
+        if min_score is not None:
+            keep = scores >= min_score
+            row_ids, scores = row_ids[keep], scores[keep]
+        if top_n < scores.shape[0]:
+            partition = np.argpartition(-scores, top_n - 1)[:top_n]
+            row_ids, scores = row_ids[partition], scores[partition]
+
+        order = np.lexsort((row_ids, -scores))
+        return row_ids[order], scores[order]
+
+    def recall_report(self, query_matrix, top_k=10, n_probe_values=(1, 2, 4, 8, 16, 32)):
+        """
+        Mede recall@k e latência da busca aproximada contra a busca exata.
+
+        Parâmetros
+        ----------
+        query_matrix : scipy.sparse matrix
+            Consultas (ex.: ``utils.job_description_matrix`` ou uma amostra de candidatos).
+        top_k : int, opcional, default=10
+            Tamanho da lista comparada.
+        n_probe_values : sequência de int
+            Valores de ``n_probe`` avaliados.
+
+        Retorno
+        -------
+        report : pd.DataFrame
+            Uma linha por ``n_probe`` com ``recall_at_k``, fração do pool visitada
+            e latência média (ms) da busca aproximada e da exata.
+        """
+        query_matrix = normalize(sparse.csr_matrix(query_matrix, dtype=np.float64))
+        n_queries, n_samples = query_matrix.shape[0], self.candidate_index.shape[0]
+
+        exact_results = []
+        start = time.perf_counter()
+        for i in range(n_queries):
+            scores = (self.candidate_index @ query_matrix[i].T).toarray().ravel()
+            k = min(top_k, n_samples)
+            top = np.argpartition(-scores, k - 1)[:k]
+            exact_results.append(set(top[scores[top] > 0].tolist()))
+        exact_ms = (time.perf_counter() - start) * 1000 / max(n_queries, 1)
+
+        rows = []
+        for n_probe in n_probe_values:
+            hits, expected, visited = 0, 0, 0
+            start = time.perf_counter()
+            for i in range(n_queries):
+                row_ids, _ = self.search(query_matrix[i], top_n=top_k, n_probe=n_probe)
+                hits += len(exact_results[i].intersection(row_ids.tolist()))
+                expected += len(exact_results[i])
+            ann_ms = (time.perf_counter() - start) * 1000 / max(n_queries, 1)
+
+            for i in range(min(n_queries, 50)):
+                visited += self.candidates(query_matrix[i], n_probe=n_probe).shape[0]
+
+            rows.append({
+                'n_probe': min(n_probe, self.centroids_.shape[0]),
+                'recall_at_k': hits / expected if expected else 1.0,
+                'visited_fraction': visited / (min(n_queries, 50) * n_samples) if n_queries else 0.0,
+                'ann_ms': ann_ms,
+                'exact_ms': exact_ms,
+            })
+
+        return pd.DataFrame(rows)
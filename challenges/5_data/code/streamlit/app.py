@@ -10,7 +10,10 @@ import plotly.express as px
 import random
 import joblib
 from sklearn.metrics.pairwise import cosine_similarity
-from utils import TalentRecommendationSystem, tokenizer, job_description_vector
+from candidate_table import fill_required_columns, standardize_candidate_data, load_serving_table
+from utils import TalentRecommendationSystem, CandidateFilterIndex, tokenizer, job_description_vector, build_candidate_index
+from query_cache import QueryCache, cache_version, filter_signature
+from incremental_index import IncrementalTalentIndex, ServingGenerations
 
 
 # App configuration
@@ -57,36 +60,8 @@ def load_real_data():
         
         df_candidates = pd.read_parquet(os.path.join(dir_path, 'talent_pool_final.parquet'))
         
-        # Add index and prospect_code if not present
-        if 'index' not in df_candidates.columns:
-            df_candidates['index'] = range(len(df_candidates))
-        
-        if 'prospect_code' not in df_candidates.columns:
-            df_candidates['prospect_code'] = [f"PRSP-2025-{i+1:04d}" for i in range(len(df_candidates))]
-        
-        # Ensure required columns exist, fill with defaults if missing
-        required_columns = {
-            'nivel_profissional': 'N/A',
-            'area_atuacao': 'N/A', 
-            'nivel_academico': 'N/A',
-            'nivel_ingles': 'N/A',
-            'nivel_espanhol': 'N/A',
-            'sexo': 'N/A',
-            'pcd': 'Não',
-            'conhecimentos_tecnicos': 'N/A',
-            'cv_pt_cleaned': 'N/A',
-            'titulo_profissional': 'N/A',
-            'objetivo_profissional': 'N/A',
-            'local': 'N/A',
-            'remuneracao_numeric': 0
-        }
-        
-        for col, default_value in required_columns.items():
-            if col not in df_candidates.columns:
-                df_candidates[col] = default_value
-            else:
-                # Fill NaN values with defaults
-                df_candidates[col] = df_candidates[col].fillna(default_value)
+        # Add index/prospect_code and fill required columns with defaults
+        df_candidates = fill_required_columns(df_candidates)
                 
         return df_candidates
         
@@ -95,6 +70,87 @@ def load_real_data():
         st.info("Falling back to mock data generation...")
         return generate_mock_data()
 
+# Load the precomputed standardized table (falls back to standardizing on the fly)
+@st.cache_resource
+def load_standardized_data():
+    """Load the serving table built by candidate_table.py for the current glossary"""
+    glossary = load_glossary()
+    df_candidates = load_serving_table(glossary)
+    if df_candidates is None:
+        df_candidates = standardize_candidate_data(load_real_data(), glossary)
+    return df_candidates
+
+# Build the sparse candidate index once and keep it across reruns
+@st.cache_resource
+def load_candidate_index():
+    """Build the L2-normalized CSR candidate index from the talent pool vectors"""
+    df_candidates = load_standardized_data()
+    if 'vetor_cv' not in df_candidates.columns:
+        return None
+
+    vectorizer = load_vectorizer()
+    n_features = len(vectorizer.vocabulary_) if vectorizer is not None else None
+    return build_candidate_index(df_candidates['vetor_cv'].values, n_features=n_features)
+
+# Optional approximate search backend (JOB_FIT_ANN=1), built once on top of the exact index
+def build_ann_index(candidate_index):
+    """IVF approximate index over ``candidate_index`` when enabled through the JOB_FIT_ANN env var"""
+    if candidate_index is None or os.environ.get('JOB_FIT_ANN', '0') != '1':
+        return None
+
+    from ann import ApproximateCandidateIndex
+    n_probe = int(os.environ.get('JOB_FIT_ANN_PROBES', '8'))
+    return ApproximateCandidateIndex(n_probe=n_probe).fit(candidate_index)
+
+@st.cache_resource
+def load_ann_index():
+    """Build the IVF approximate index once on top of the exact index"""
+    return build_ann_index(load_candidate_index())
+
+# Build the candidate attribute bitsets once and keep them across reruns
+@st.cache_resource
+def load_filter_index():
+    """Build the filter index over the standardized candidate attributes"""
+    return CandidateFilterIndex(load_standardized_data())
+
+# Query vectors and rankings reused across reruns (same vacancy, different filters/sliders)
+@st.cache_resource
+def load_query_cache():
+    """Create the bounded query cache, versioned by the vectorizer and the candidate index"""
+    vectorizer = load_vectorizer()
+    if vectorizer is None:
+        return None
+    return QueryCache(version=cache_version(vectorizer, load_candidate_index()))
+
+# Optional incremental talent pool store (JOB_FIT_STORE): each manifest version is served as one
+# generation of the resources above, rebuilt off the request thread after appends, deletes and compactions
+def build_store_generation(store, manifest, glossary):
+    """Build the serving resources (pool, indexes, query cache) for one manifest version of the store"""
+    df_candidates, vectors = store.snapshot(manifest)
+    vectorizer = store.load_vectorizer(manifest)
+    df_application_std = standardize_candidate_data(fill_required_columns(df_candidates), glossary)
+    candidate_index = build_candidate_index(vectors, n_features=len(vectorizer.vocabulary_))
+    return {
+        'df_application_std': df_application_std,
+        'vectorizer': vectorizer,
+        'candidate_index': candidate_index,
+        'filter_index': CandidateFilterIndex(df_application_std),
+        'ann_index': build_ann_index(candidate_index),
+        'query_cache': QueryCache(version=cache_version(vectorizer, candidate_index)),
+    }
+
+@st.cache_resource
+def load_store_generations():
+    """Serving generations of the JOB_FIT_STORE store (None when serving the static parquet files)"""
+    store_path = os.environ.get('JOB_FIT_STORE')
+    if not store_path:
+        return None
+    glossary = load_glossary()
+    return ServingGenerations(
+        IncrementalTalentIndex(store_path),
+        lambda store, manifest: build_store_generation(store, manifest, glossary),
+    )
+
 # Generate mock data for UI testing (fallback)
 @st.cache_data
 def generate_mock_data():
@@ -236,41 +292,6 @@ class MockTalentRecommendationSystem:
         results.sort(key=lambda x: x['match_score'], reverse=True)
         return results
 
-def standardize_candidate_data(df, glossary):
-    """Apply glossary mappings to standardize candidate data"""
-    df_standardized = df.copy()
-    
-    # Standardize seniority levels using senioridade_group mapping
-    if 'senioridade_group' in glossary:
-        seniority_mapping = glossary['senioridade_group']
-        df_standardized['nivel_profissional_std'] = df_standardized['nivel_profissional'].map(
-            lambda x: seniority_mapping.get(x, x) if pd.notna(x) else x
-        )
-    
-    # Add numeric levels for sorting and filtering
-    if 'senioridade_lvl' in glossary:
-        seniority_levels = glossary['senioridade_lvl']
-        df_standardized['seniority_level'] = df_standardized['nivel_profissional_std'].map(
-            lambda x: seniority_levels.get(x, 0) if pd.notna(x) else 0
-        )
-    
-    if 'idioma_nvl' in glossary:
-        language_levels = glossary['idioma_nvl']
-        df_standardized['english_level'] = df_standardized['nivel_ingles'].map(
-            lambda x: language_levels.get(x, 0) if pd.notna(x) else 0
-        )
-        df_standardized['spanish_level'] = df_standardized['nivel_espanhol'].map(
-            lambda x: language_levels.get(x, 0) if pd.notna(x) else 0
-        )
-    
-    if 'nivel_academico_lvl' in glossary:
-        academic_levels = glossary['nivel_academico_lvl']
-        df_standardized['academic_level'] = df_standardized['nivel_academico'].map(
-            lambda x: academic_levels.get(x, 0) if pd.notna(x) else 0
-        )
-    
-    return df_standardized
-
 def create_match_score_gauge(score, title="Pontuação de Compatibilidade"):
     """Create a gauge chart for match scores"""
     fig = go.Figure(go.Indicator(
@@ -314,8 +335,23 @@ def main():
     
     with st.spinner('Loading glossary and candidate data...'):
         glossary = load_glossary()
-        df_application = load_real_data()
-        vectorizer = load_vectorizer()
+        store_generations = load_store_generations()
+        if store_generations is not None:
+            # Serves the latest generation that is ready; newer store versions are built in the background
+            resources = store_generations.current()['resources']
+            df_application_std = resources['df_application_std']
+            vectorizer = resources['vectorizer']
+            candidate_index = resources['candidate_index']
+            filter_index = resources['filter_index']
+            ann_index = resources['ann_index']
+            query_cache = resources['query_cache']
+        else:
+            df_application_std = load_standardized_data()
+            vectorizer = load_vectorizer()
+            candidate_index = load_candidate_index()
+            filter_index = load_filter_index()
+            ann_index = load_ann_index()
+            query_cache = load_query_cache()
 
     st.info("""
         **Como funciona:**
@@ -326,10 +362,7 @@ def main():
         4. Resultados rankeados por compatibilidade
         """)
     
-    talent_recommender = MockTalentRecommendationSystem(df_application)
-    
-    # Standardize candidate data using glossary
-    df_application_std = standardize_candidate_data(df_application, glossary)
+    talent_recommender = MockTalentRecommendationSystem(df_application_std)
     
     # Main Job Description Matching Interface
     st.header("🔍 Encontrar Candidatos para Descrição da Vaga")
@@ -539,55 +572,54 @@ Procuramos um desenvolvedor Python sênior com experiência em:
                 dict_filters_processed['nivel_espanhol_filter'] = glossary['idioma_nvl'].get(dict_filters['nivel_espanhol_filter'], None)
                 dict_filters_processed['nivel_profissional_filter'] = glossary['senioridade_lvl'].get(dict_filters['nivel_profissional_filter'], None)
 
-                # Apply filters to df_application_std (pre-filter the dataset)
-                df_filtered = df_application_std.copy()
-                
-                # Location filter (exact match)
-                if local_filter != "Todos":
-                    df_filtered = df_filtered[df_filtered['local'] == local_filter]
-                
-                # Gender affirmative action filter (exact match)
-                if vaga_afirmativa_sexo:
-                    df_filtered = df_filtered[df_filtered['sexo'] == 'Feminino']
-                
-                # PCD affirmative action filter (exact match)
-                if vaga_afirmativa_pcd:
-                    df_filtered = df_filtered[df_filtered['pcd'] == 'Sim']
-                
-                # Academic level filter (greater or equal - minimum requirement)
-                if dict_filters_processed['nivel_academico_filter'] is not None:
-                    df_filtered = df_filtered[df_filtered['academic_level'] >= dict_filters_processed['nivel_academico_filter']]
-                
-                # English level filter (greater or equal - minimum requirement)
-                if dict_filters_processed['nivel_ingles_filter'] is not None:
-                    df_filtered = df_filtered[df_filtered['english_level'] >= dict_filters_processed['nivel_ingles_filter']]
-                
-                # Spanish level filter (greater or equal - minimum requirement)
-                if dict_filters_processed['nivel_espanhol_filter'] is not None:
-                    df_filtered = df_filtered[df_filtered['spanish_level'] >= dict_filters_processed['nivel_espanhol_filter']]
-                
-                # Professional level filter (greater or equal - minimum seniority)
-                if dict_filters_processed['nivel_profissional_filter'] is not None:
-                    df_filtered = df_filtered[df_filtered['seniority_level'] >= dict_filters_processed['nivel_profissional_filter']]
-                
-                
+                # Resolve the filters to row ids with the precomputed bitsets (no frame copies)
+                row_ids = filter_index.select(
+                    equals={
+                        'local': local_filter if local_filter != "Todos" else None,
+                        'sexo': 'Feminino' if vaga_afirmativa_sexo else None,
+                        'pcd': 'Sim' if vaga_afirmativa_pcd else None,
+                    },
+                    at_least={
+                        'academic_level': dict_filters_processed['nivel_academico_filter'],
+                        'english_level': dict_filters_processed['nivel_ingles_filter'],
+                        'spanish_level': dict_filters_processed['nivel_espanhol_filter'],
+                        'seniority_level': dict_filters_processed['nivel_profissional_filter'],
+                    }
+                )
                 
                 # Show filtering info
                 original_count = len(df_application_std)
-                filtered_count = len(df_filtered)
+                filtered_count = len(row_ids)
                 st.info(f"📊 Dataset filtrado: {filtered_count:,} candidatos (de {original_count:,} originais)")
                 
-                job_description = job_description_vector(job_description, vectorizer)
-                # Get recommendations from the pre-filtered dataset
-                # Update talent recommender with filtered data
-                talent_recommender_filtered = TalentRecommendationSystem(df_filtered, job_description, vectorizer)
-                all_matches = talent_recommender_filtered.recommend_for_job_description(len(df_filtered))
-                
-                # Apply minimum score filter
-                filtered_matches = [match for match in all_matches if match['match_score'] >= min_score]
-                
-                # Limit to top_n results
-                filtered_matches = filtered_matches[:top_n]
+                # Score only the filtered row ids against the full candidate index
+                # (the approximate index is used only when no filter restricts the pool)
+                is_filtered = filtered_count < original_count
+                if query_cache is not None:
+                    # Cached sparse query vector and top-k ranking for this text + filter signature
+                    n_features = candidate_index.shape[1] if candidate_index is not None else None
+                    job_vector = query_cache.query_vector(job_description, vectorizer, n_features)
+                    talent_recommender_filtered = TalentRecommendationSystem(
+                        df_application_std, pd.DataFrame({'vetor_cv': [job_vector]}), vectorizer, candidate_index,
+                        ann_index=None if is_filtered else ann_index
+                    )
+                    signature = filter_signature(
+                        equals=dict(local=local_filter, sexo=vaga_afirmativa_sexo, pcd=vaga_afirmativa_pcd),
+                        at_least=dict_filters_processed,
+                        approximate=ann_index is not None and not is_filtered,
+                    )
+                    filtered_matches = query_cache.recommend(
+                        talent_recommender_filtered, job_description, signature,
+                        top_n=top_n, min_score=min_score, row_ids=row_ids if is_filtered else None
+                    )
+                else:
+                    job_description = job_description_vector(job_description, vectorizer)
+                    talent_recommender_filtered = TalentRecommendationSystem(
+                        df_application_std, job_description, vectorizer, candidate_index,
+                        ann_index=None if is_filtered else ann_index
+                    )
+                    # Top-N selection and minimum score are applied inside the engine
+                    filtered_matches = talent_recommender_filtered.recommend_for_job_description(top_n=top_n, min_score=min_score, row_ids=row_ids if is_filtered else None)
                 
                 if filtered_matches:
                     st.success(f"Encontrados {len(filtered_matches)} candidatos compatíveis com os filtros aplicados!")
@@ -0,0 +1,194 @@
+"""
+Tabela de candidatos padronizada, pré-computada para o app.
+
+O passo de build lê o talent pool, preenche os valores padrão, aplica o
+glossário (``candidate_mapping.json``) e grava o resultado em parquet com tipos
+compactos (``category`` para os campos de baixa cardinalidade e ``int8`` para os
+níveis). O hash do glossário e a impressão digital do talent pool de origem
+(tamanho e data de modificação) vão nos metadados do parquet: o app só usa a
+tabela se ela foi gerada com o glossário e o talent pool atuais, sem nenhuma
+transformação na carga.
+
+Uso pela linha de comando::
+
+    python candidate_table.py [talent_pool_final.parquet] [candidate_mapping.json] [talent_pool_serving.parquet]
+"""
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+DEFAULT_INPUT_PATH = os.path.join(dir_path, 'talent_pool_final.parquet')
+DEFAULT_GLOSSARY_PATH = os.path.join(dir_path, 'candidate_mapping.json')
+DEFAULT_OUTPUT_PATH = os.path.join(dir_path, 'talent_pool_serving.parquet')
+
+GLOSSARY_METADATA_KEY = b'candidate_mapping_sha256'
+SOURCE_METADATA_KEY = b'talent_pool_fingerprint'
+
+# Colunas obrigatórias e valores padrão quando ausentes
+REQUIRED_COLUMNS = {
+    'nivel_profissional': 'N/A',
+    'area_atuacao': 'N/A',
+    'nivel_academico': 'N/A',
+    'nivel_ingles': 'N/A',
+    'nivel_espanhol': 'N/A',
+    'sexo': 'N/A',
+    'pcd': 'Não',
+    'conhecimentos_tecnicos': 'N/A',
+    'cv_pt_cleaned': 'N/A',
+    'titulo_profissional': 'N/A',
+    'objetivo_profissional': 'N/A',
+    'local': 'N/A',
+    'remuneracao_numeric': 0
+}
+
+# Colunas de baixa cardinalidade gravadas como ``category``
+CATEGORICAL_COLUMNS = [
+    'nivel_profissional', 'nivel_profissional_std', 'area_atuacao', 'nivel_academico',
+    'nivel_ingles', 'nivel_espanhol', 'sexo', 'pcd', 'local'
+]
+
+LEVEL_COLUMNS = ['seniority_level', 'english_level', 'spanish_level', 'academic_level']
+
+
+def glossary_version(glossary):
+    """Hash estável (sha256) do glossário, usado para versionar a tabela."""
+    payload = json.dumps(glossary, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def source_fingerprint(path):
+    """Tamanho e data de modificação (ns) do arquivo de origem, sem ler o conteúdo."""
+    stat = os.stat(path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def fill_required_columns(df):
+    """Adiciona ``index``/``prospect_code`` e preenche as colunas obrigatórias."""
+    df = df.copy()
+
+    # Add index and prospect_code if not present
+    if 'index' not in df.columns:
+        df['index'] = range(len(df))
+
+    if 'prospect_code' not in df.columns:
+        df['prospect_code'] = [f"PRSP-2025-{i+1:04d}" for i in range(len(df))]
+
+    fills = {}
+    for col, default_value in REQUIRED_COLUMNS.items():
+        if col not in df.columns:
+            df[col] = default_value
+        else:
+            fills[col] = default_value
+    return df.fillna(fills)
+
+
+def _map_level(values, levels):
+    # Equivale a ``levels.get(x, 0) if pd.notna(x) else 0``
+    return values.map(levels).fillna(0).astype('int8')
+
+
+def standardize_candidate_data(df, glossary, copy=True):
+    """Apply glossary mappings to standardize candidate data"""
+    df_standardized = df.copy() if copy else df
+
+    # Standardize seniority levels using senioridade_group mapping
+    if 'senioridade_group' in glossary:
+        seniority_mapping = glossary['senioridade_group']
+        nivel = df_standardized['nivel_profissional']
+        df_standardized['nivel_profissional_std'] = nivel.map(seniority_mapping).where(
+            nivel.isin(list(seniority_mapping)), nivel
+        )
+
+    # Add numeric levels for sorting and filtering
+    if 'senioridade_lvl' in glossary:
+        df_standardized['seniority_level'] = _map_level(
+            df_standardized['nivel_profissional_std'], glossary['senioridade_lvl']
+        )
+
+    if 'idioma_nvl' in glossary:
+        language_levels = glossary['idioma_nvl']
+        df_standardized['english_level'] = _map_level(df_standardized['nivel_ingles'], language_levels)
+        df_standardized['spanish_level'] = _map_level(df_standardized['nivel_espanhol'], language_levels)
+
+    if 'nivel_academico_lvl' in glossary:
+        df_standardized['academic_level'] = _map_level(
+            df_standardized['nivel_academico'], glossary['nivel_academico_lvl']
+        )
+
+    return df_standardized
+
+
+def build_serving_table(input_path=DEFAULT_INPUT_PATH, glossary_path=DEFAULT_GLOSSARY_PATH,
+                        output_path=DEFAULT_OUTPUT_PATH):
+    """
+    Gera o parquet servido pelo app com as colunas derivadas já calculadas.
+
+    Retorno
+    -------
+    output_path : str
+        Caminho do parquet gerado.
+    """
+    with open(glossary_path, 'r', encoding='utf-8') as f:
+        glossary = json.load(f)
+
+    # Impressão digital antes da leitura: uma troca do arquivo durante o build invalida a tabela
+    fingerprint = source_fingerprint(input_path)
+    df = fill_required_columns(pd.read_parquet(input_path))
+    df = standardize_candidate_data(df, glossary, copy=False)
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(str).astype('category')
+    for column in LEVEL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('int8')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[GLOSSARY_METADATA_KEY] = glossary_version(glossary).encode('utf-8')
+    metadata[SOURCE_METADATA_KEY] = fingerprint.encode('utf-8')
+    pq.write_table(table.replace_schema_metadata(metadata), output_path)
+
+    print(f"Tabela padronizada salva: {df.shape} -> {output_path}")
+    return output_path
+
+
+def load_serving_table(glossary, path=DEFAULT_OUTPUT_PATH, source_path=DEFAULT_INPUT_PATH):
+    """
+    Carrega a tabela pré-computada se ela corresponde ao glossário e ao talent pool atuais.
+
+    Parâmetros
+    ----------
+    glossary : dict
+        Glossário atual (``candidate_mapping.json``).
+    path : str, opcional
+        Parquet gerado por ``build_serving_table``.
+    source_path : str, opcional
+        Talent pool de origem; se não existir, só o glossário é conferido.
+
+    Retorno
+    -------
+    df : pd.DataFrame ou None
+        Tabela pronta para uso, ou ``None`` se não existe ou está desatualizada.
+    """
+    if not os.path.exists(path):
+        return None
+
+    metadata = pq.read_schema(path).metadata or {}
+    if metadata.get(GLOSSARY_METADATA_KEY, b'').decode('utf-8') != glossary_version(glossary):
+        return None
+    fingerprint = metadata.get(SOURCE_METADATA_KEY, b'').decode('utf-8')
+    if os.path.exists(source_path) and fingerprint != source_fingerprint(source_path):
+        return None
+    return pd.read_parquet(path)
+
+
+if __name__ == '__main__':
+    build_serving_table(*sys.argv[1:4])
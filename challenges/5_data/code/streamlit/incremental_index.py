@@ -0,0 +1,571 @@
+"""
+Atualização incremental do talent pool, sem re-vetorizar o pool inteiro.
+
+O pool é mantido em um diretório ("store") com:
+
+- ``manifest.json``: lista de segmentos e tombstones, com número de sequência;
+- ``segment_<seq>/``: um artefato ``sparse_store`` (vetores TF-IDF, índice = id do
+  candidato) e ``records.parquet`` (colunas do candidato, sem vetores);
+- ``tombstones_<seq>.parquet``: ids removidos;
+- ``vectorizer.pkl``: vetorizador congelado usado em todos os segmentos.
+
+Novos candidatos (ou candidatos alterados) viram um segmento delta,
+transformado apenas com ``transform`` do vetorizador congelado. Na leitura
+(``snapshot``), vale a versão mais recente de cada id: um segmento ou tombstone
+com sequência maior substitui os anteriores. ``compact`` reescreve o pool vivo em
+um único segmento (opcionalmente com ``refit`` do vetorizador) e remove os deltas.
+
+Cada escrita grava o arquivo novo com outro nome e troca o ``manifest.json`` com
+``os.replace``: leitores sempre enxergam um estado consistente. As escritas
+(``append``, ``delete``, ``compact``) são serializadas por um lock de arquivo
+(``.writer.lock``) e, antes de escrever, removem sobras de uma escrita
+interrompida (segmentos e tombstones com sequência ainda não registrada no
+manifesto). Os arquivos substituídos por uma compactação só são apagados na
+compactação seguinte, então um leitor com o manifesto anterior ainda consegue
+ler a geração dele.
+
+``ServingGenerations`` monta os recursos servidos pelo app para uma versão do
+manifesto em uma thread de fundo e troca a geração servida quando ela fica pronta.
+
+Uso pela linha de comando::
+
+    python incremental_index.py init STORE talent_pool_final.parquet talent_vectorizer.pkl
+    python incremental_index.py append STORE novos_candidatos.parquet
+    python incremental_index.py delete STORE PRSP-2025-0001 PRSP-2025-0002
+    python incremental_index.py compact STORE [--refit]
+    python incremental_index.py status STORE
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from sparse_store import load_sparse_matrix, save_sparse_matrix
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+VECTORIZER_NAME = 'vectorizer.pkl'
+LOCK_NAME = '.writer.lock'
+
+# Arquivos de dados do store: <tipo>_<sequência> (segmentos, tombstones e vetorizadores retreinados)
+_SEQUENCED_FILE = re.compile(r'^\.?(?:segment|tombstones|vectorizer)_(\d+)')
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class IncrementalTalentIndex:
+    """
+    Talent pool em segmentos (base + deltas) com tombstones e compactação.
+    """
+
+    def __init__(self, root):
+        """
+        Parâmetros
+        ----------
+        root : str
+            Diretório do store (criado com ``IncrementalTalentIndex.create``).
+        """
+        self.root = root
+
+    # Manifesto ---------------------------------------------------------------
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def read_manifest(self):
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Versão de formato não suportada em {self.root}: {manifest.get('format_version')}")
+        return manifest
+
+    def _write_manifest(self, manifest):
+        manifest['version'] += 1
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        return manifest
+
+    def version(self):
+        """Versão do manifesto (incrementada a cada append, delete ou compactação)."""
+        return self.read_manifest()['version']
+
+    def load_vectorizer(self, manifest=None):
+        """Vetorizador congelado do store (o do ``manifest`` informado, se houver)."""
+        manifest = manifest or self.read_manifest()
+        return joblib.load(os.path.join(self.root, manifest['vectorizer']))
+
+    @contextmanager
+    def _writer_lock(self):
+        """Lock exclusivo (entre processos) para o ciclo ler manifesto -> escrever -> trocar manifesto."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_NAME), 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _remove_orphans(self, manifest):
+        """
+        Remove arquivos de uma escrita interrompida (chamado com o lock de escrita).
+
+        A sequência só cresce: um arquivo com sequência >= ``next_sequence`` não
+        pode estar em nenhum manifesto publicado.
+        """
+        removed = []
+        for name in os.listdir(self.root):
+            match = _SEQUENCED_FILE.match(name)
+            if match is None or int(match.group(1)) < manifest['next_sequence']:
+                continue
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+            removed.append(name)
+        return removed
+
+    # Escrita -----------------------------------------------------------------
+
+    @classmethod
+    def create(cls, root, df, vectorizer, id_column='prospect_code', text_column='cv_pt', vectors=None):
+        """
+        Cria o store com o pool atual como segmento base.
+
+        Parâmetros
+        ----------
+        root : str
+            Diretório do store (não pode conter um manifesto).
+        df : pd.DataFrame
+            Talent pool inicial.
+        vectorizer : TfidfVectorizer
+            Vetorizador já treinado; é congelado no store.
+        id_column : str, opcional, default='prospect_code'
+            Coluna com o identificador único do candidato.
+        text_column : str, opcional, default='cv_pt'
+            Coluna com o texto vetorizado.
+        vectors : scipy.sparse matrix, opcional
+            Vetores já calculados para ``df`` (ex.: ``utils.build_candidate_index``).
+
+        Retorno
+        -------
+        store : IncrementalTalentIndex
+        """
+        store = cls(root)
+        with store._writer_lock():
+            if os.path.exists(store.manifest_path):
+                raise FileExistsError(f"Já existe um store em {root}")
+
+            joblib.dump(vectorizer, os.path.join(root, VECTORIZER_NAME))
+            manifest = {
+                'format_version': FORMAT_VERSION,
+                'version': 0,
+                'next_sequence': 1,
+                'id_column': id_column,
+                'text_column': text_column,
+                'n_features': len(vectorizer.vocabulary_),
+                'vectorizer': VECTORIZER_NAME,
+                'segments': [],
+                'tombstones': [],
+                'retired': [],
+                'created_at': _now(),
+                'compacted_at': None,
+            }
+            store._write_manifest(manifest)
+        store.append(df, vectors=vectors, vectorizer=vectorizer)
+        return store
+
+    def _vectorize(self, df, vectorizer, manifest, n_workers):
+        from pipeline import vectorize_talent_pool
+
+        matrix = vectorize_talent_pool(df, vectorizer, text_column=manifest['text_column'], n_workers=n_workers)
+        return sparse.csr_matrix(matrix)
+
+    def _write_segment(self, manifest, df, vectors):
+        sequence = manifest['next_sequence']
+        name = f'segment_{sequence:06d}'
+        tmp_path = os.path.join(self.root, f'.{name}.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+        ids = df[manifest['id_column']].astype(str)
+        save_sparse_matrix(vectors, tmp_path, index=pd.Index(ids.to_numpy()))
+        df.drop(columns=['vetor_cv'], errors='ignore').reset_index(drop=True).to_parquet(
+            os.path.join(tmp_path, 'records.parquet')
+        )
+        os.replace(tmp_path, os.path.join(self.root, name))
+
+        manifest['segments'].append({'name': name, 'sequence': sequence, 'rows': len(df), 'created_at': _now()})
+        manifest['next_sequence'] = sequence + 1
+        return name
+
+    def append(self, df, vectors=None, vectorizer=None, n_workers=1):
+        """
+        Adiciona candidatos novos ou alterados como um segmento delta.
+
+        Parâmetros
+        ----------
+        df : pd.DataFrame
+            Candidatos a inserir/atualizar (precisa de ``id_column`` e ``text_column``).
+        vectors : scipy.sparse matrix, opcional
+            Vetores já calculados. Se omitido, ``df`` é transformado com o
+            vetorizador congelado do store.
+        vectorizer : TfidfVectorizer, opcional
+            Evita recarregar o vetorizador do disco.
+        n_workers : int, opcional, default=1
+            Processos usados na vetorização (``pipeline.vectorize_talent_pool``).
+
+        Retorno
+        -------
+        name : str
+            Nome do segmento criado.
+        """
+        with self._writer_lock():
+            return self._append(df, vectors, vectorizer, n_workers)
+
+    def _append(self, df, vectors, vectorizer, n_workers):
+        manifest = self.read_manifest()
+        if manifest['id_column'] not in df.columns:
+            raise KeyError(f"Coluna de id '{manifest['id_column']}' ausente")
+        self._remove_orphans(manifest)
+
+        # Ids repetidos no mesmo lote: vale a última ocorrência
+        keep = ~df[manifest['id_column']].duplicated(keep='last').to_numpy()
+        if vectors is not None:
+            vectors = sparse.csr_matrix(vectors, copy=True)
+            if vectors.shape[0] != len(df):
+                raise ValueError(f"vectors tem {vectors.shape[0]} linhas, mas df tem {len(df)}")
+            vectors = vectors[np.flatnonzero(keep)]
+        df = df[keep]
+        if vectors is None:
+            vectors = self._vectorize(df, vectorizer or self.load_vectorizer(manifest), manifest, n_workers)
+        vectors.resize((vectors.shape[0], manifest['n_features']))
+
+        name = self._write_segment(manifest, df, vectors)
+        self._write_manifest(manifest)
+        return name
+
+    def delete(self, ids):
+        """
+        Remove candidatos (tombstones). Retorna o número de ids registrados.
+        """
+        ids = pd.Index(pd.Series(list(ids), dtype=object).astype(str)).unique()
+        if len(ids) == 0:
+            return 0
+
+        with self._writer_lock():
+            manifest = self.read_manifest()
+            self._remove_orphans(manifest)
+            sequence = manifest['next_sequence']
+            name = f'tombstones_{sequence:06d}.parquet'
+            tmp_path = os.path.join(self.root, f'.{name}.tmp')
+            pd.DataFrame({'id': ids}).to_parquet(tmp_path)
+            os.replace(tmp_path, os.path.join(self.root, name))
+
+            manifest['tombstones'].append({'name': name, 'sequence': sequence, 'rows': len(ids), 'created_at': _now()})
+            manifest['next_sequence'] = sequence + 1
+            self._write_manifest(manifest)
+        return len(ids)
+
+    # Leitura -----------------------------------------------------------------
+
+    def _live_rows(self, manifest):
+        """Posição (segmento, linha) da versão viva de cada id."""
+        frames = []
+        for position, segment in enumerate(manifest['segments']):
+            _, ids = load_sparse_matrix(os.path.join(self.root, segment['name']))
+            frames.append(pd.DataFrame({
+                'id': ids.astype(str), 'sequence': segment['sequence'],
+                'segment': position, 'row': np.arange(len(ids)),
+            }))
+        for tombstone in manifest['tombstones']:
+            ids = pd.read_parquet(os.path.join(self.root, tombstone['name']))['id'].astype(str)
+            frames.append(pd.DataFrame({'id': ids, 'sequence': tombstone['sequence'], 'segment': -1, 'row': -1}))
+
+        if not frames:
+            return pd.DataFrame(columns=['id', 'sequence', 'segment', 'row'])
+
+        versions = pd.concat(frames, ignore_index=True).sort_values('sequence', kind='stable')
+        latest = versions.drop_duplicates(subset='id', keep='last')
+        return latest[latest['segment'] >= 0].sort_values(['segment', 'row'], kind='stable')
+
+    def snapshot(self, manifest=None):
+        """
+        Pool vivo (base + deltas - tombstones), pronto para servir.
+
+        Parâmetros
+        ----------
+        manifest : dict, opcional
+            Manifesto lido antes (``read_manifest``); padrão: o atual.
+
+        Retorno
+        -------
+        df : pd.DataFrame
+            Candidatos vivos (uma linha por id), sem ``vetor_cv``.
+        vectors : scipy.sparse.csr_matrix
+            Vetores TF-IDF alinhados às linhas de ``df``.
+        """
+        manifest = manifest or self.read_manifest()
+        live = self._live_rows(manifest)
+
+        records, matrices = [], []
+        for position, rows in live.groupby('segment', sort=True)['row']:
+            path = os.path.join(self.root, manifest['segments'][position]['name'])
+            matrix, _ = load_sparse_matrix(path)
+            rows = rows.to_numpy()
+            matrices.append(matrix[rows])
+            records.append(pd.read_parquet(os.path.join(path, 'records.parquet')).iloc[rows])
+
+        if not matrices:
+            return pd.DataFrame(columns=[manifest['id_column']]), sparse.csr_matrix((0, manifest['n_features']))
+        df = pd.concat(records, ignore_index=True)
+        return df, sparse.vstack(matrices, format='csr')
+
+    def status(self):
+        """
+        Frescor e tamanho do store (segmentos pendentes de compactação, tombstones, idade).
+        """
+        manifest = self.read_manifest()
+        writes = manifest['segments'] + manifest['tombstones']
+        last_write = max((entry['created_at'] for entry in writes), default=manifest['created_at'])
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(last_write)
+        return {
+            'version': manifest['version'],
+            'segments': len(manifest['segments']),
+            'delta_segments': max(len(manifest['segments']) - 1, 0),
+            'delta_rows': sum(segment['rows'] for segment in manifest['segments'][1:]),
+            'tombstones': sum(tombstone['rows'] for tombstone in manifest['tombstones']),
+            'last_write_at': last_write,
+            'seconds_since_last_write': age.total_seconds(),
+            'compacted_at': manifest['compacted_at'],
+            'retired_files': len(manifest.get('retired', [])),
+        }
+
+    # Compactação -------------------------------------------------------------
+
+    def compact(self, refit=False, n_workers=1):
+        """
+        Reescreve o pool vivo em um único segmento, no lugar de deltas e tombstones.
+
+        Os arquivos substituídos ficam em ``retired`` no manifesto e só são
+        apagados na compactação seguinte (leitores com o manifesto anterior
+        continuam conseguindo ler os segmentos dele).
+
+        Parâmetros
+        ----------
+        refit : bool, opcional, default=False
+            Retreina o vetorizador (``fit``) sobre o pool vivo e re-vetoriza todos
+            os candidatos. Sem refit, os vetores existentes são reaproveitados.
+        n_workers : int, opcional, default=1
+            Processos usados na re-vetorização (apenas com ``refit``).
+
+        Retorno
+        -------
+        name : str
+            Nome do novo segmento base.
+        """
+        with self._writer_lock():
+            return self._compact(refit, n_workers)
+
+    def _compact(self, refit, n_workers):
+        start = time.perf_counter()
+        manifest = self.read_manifest()
+        self._remove_orphans(manifest)
+        df, vectors = self.snapshot(manifest)
+        old_files = [entry['name'] for entry in manifest['segments'] + manifest['tombstones']]
+        # Geração retirada pela compactação anterior: nenhum manifesto publicado a referencia mais
+        expired = manifest.get('retired', [])
+
+        if refit:
+            from sklearn.base import clone
+
+            vectorizer = clone(self.load_vectorizer(manifest))
+            vectorizer.fit(df[manifest['text_column']].fillna(""))
+            vectorizer_name = f"vectorizer_{manifest['next_sequence']:06d}.pkl"
+            joblib.dump(vectorizer, os.path.join(self.root, vectorizer_name))
+            old_files.append(manifest['vectorizer'])
+            manifest['vectorizer'] = vectorizer_name
+            manifest['n_features'] = len(vectorizer.vocabulary_)
+            vectors = self._vectorize(df, vectorizer, manifest, n_workers)
+
+        manifest['segments'], manifest['tombstones'] = [], []
+        name = self._write_segment(manifest, df, vectors)
+        manifest['retired'] = old_files
+        manifest['compacted_at'] = _now()
+        self._write_manifest(manifest)
+
+        # Só remove os arquivos antigos depois que o manifesto novo está no lugar
+        for old in expired:
+            path = os.path.join(self.root, old)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+
+        print(f"Store compactado: {len(df)} candidatos em {time.perf_counter() - start:.1f}s -> {name}")
+        return name
+
+
+class ServingGenerations:
+    """
+    Geração servida do store, reconstruída em segundo plano quando o manifesto muda.
+
+    Uma geração é o resultado de ``build(store, manifest)`` (ex.: pool
+    padronizado, índices e caches do app) para uma versão do manifesto. Só a
+    primeira geração é montada na thread de quem chama ``current``; depois, uma
+    versão nova dispara a montagem em uma thread de fundo e ``current`` continua
+    devolvendo a geração anterior até a nova ficar pronta, quando ela é trocada
+    de uma vez (atribuição sob lock).
+    """
+
+    def __init__(self, store, build):
+        """
+        Parâmetros
+        ----------
+        store : IncrementalTalentIndex
+        build : callable
+            ``build(store, manifest) -> recursos`` da geração.
+        """
+        self.store = store
+        self.build = build
+        self._lock = threading.Lock()
+        self._first_build_lock = threading.Lock()
+        self._current = None
+        self._building_version = None
+        self.last_error = None
+
+    def _build(self, manifest):
+        return {'version': manifest['version'], 'resources': self.build(self.store, manifest), 'built_at': _now()}
+
+    def _build_in_background(self, manifest):
+        try:
+            generation = self._build(manifest)
+            with self._lock:
+                if self._current is None or generation['version'] > self._current['version']:
+                    self._current = generation
+                self.last_error = None
+        except Exception as error:  # a geração anterior continua servida
+            self.last_error = error
+        finally:
+            with self._lock:
+                self._building_version = None
+
+    def current(self):
+        """
+        Geração mais recente pronta: ``{'version', 'resources', 'built_at'}``.
+
+        Dispara a montagem da versão atual do manifesto, se ela for mais nova que a servida.
+        """
+        if self._current is None:
+            with self._first_build_lock:
+                if self._current is None:
+                    generation = self._build(self.store.read_manifest())
+                    with self._lock:
+                        self._current = generation
+            return self._current
+
+        manifest = self.store.read_manifest()
+        with self._lock:
+            generation = self._current
+            if manifest['version'] > generation['version'] and self._building_version is None:
+                self._building_version = manifest['version']
+                threading.Thread(target=self._build_in_background, args=(manifest,), daemon=True).start()
+        return generation
+
+    def status(self):
+        """Versão servida, versão em montagem e último erro de montagem."""
+        with self._lock:
+            return {
+                'serving_version': self._current['version'] if self._current is not None else None,
+                'building_version': self._building_version,
+                'last_error': repr(self.last_error) if self.last_error is not None else None,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Atualização incremental do talent pool.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    init_parser = subparsers.add_parser('init', help='Cria o store a partir do talent pool atual')
+    init_parser.add_argument('store')
+    init_parser.add_argument('input', help='Parquet do talent pool')
+    init_parser.add_argument('vectorizer', help='Vetorizador treinado (.pkl)')
+    init_parser.add_argument('--id-column', default='prospect_code')
+    init_parser.add_argument('--text-column', default='cv_pt')
+
+    append_parser = subparsers.add_parser('append', help='Adiciona/atualiza candidatos (segmento delta)')
+    append_parser.add_argument('store')
+    append_parser.add_argument('input', help='Parquet com os candidatos novos ou alterados')
+    append_parser.add_argument('--workers', type=int, default=1)
+
+    delete_parser = subparsers.add_parser('delete', help='Remove candidatos (tombstones)')
+    delete_parser.add_argument('store')
+    delete_parser.add_argument('ids', nargs='+')
+
+    compact_parser = subparsers.add_parser('compact', help='Compacta deltas e tombstones no segmento base')
+    compact_parser.add_argument('store')
+    compact_parser.add_argument('--refit', action='store_true')
+    compact_parser.add_argument('--workers', type=int, default=1)
+
+    status_parser = subparsers.add_parser('status', help='Mostra o frescor do store')
+    status_parser.add_argument('store')
+
+    args = parser.parse_args()
+
+    # O vetorizador salvo referencia ``tokenizer`` do módulo principal
+    import __main__
+    import utils
+    __main__.tokenizer = utils.tokenizer
+
+    if args.command == 'init':
+        from candidate_table import fill_required_columns
+
+        df = fill_required_columns(pd.read_parquet(args.input))
+        vectorizer = joblib.load(args.vectorizer)
+        vectors = None
+        if 'vetor_cv' in df.columns:
+            vectors = utils.build_candidate_index(df['vetor_cv'].values, n_features=len(vectorizer.vocabulary_))
+        IncrementalTalentIndex.create(
+            args.store, df, vectorizer, id_column=args.id_column, text_column=args.text_column, vectors=vectors
+        )
+    elif args.command == 'append':
+        store = IncrementalTalentIndex(args.store)
+        print(f"Segmento criado: {store.append(pd.read_parquet(args.input), n_workers=args.workers)}")
+    elif args.command == 'delete':
+        print(f"{IncrementalTalentIndex(args.store).delete(args.ids)} ids removidos")
+    elif args.command == 'compact':
+        IncrementalTalentIndex(args.store).compact(refit=args.refit, n_workers=args.workers)
+
+    print(json.dumps(IncrementalTalentIndex(args.store).status(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
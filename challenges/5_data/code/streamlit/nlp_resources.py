@@ -0,0 +1,90 @@
+"""
+Recursos de NLP (NLTK) carregados sob demanda, sem acesso à rede em tempo de execução.
+
+Os dados do NLTK (stopwords, punkt, punkt_tab e rslp) são procurados primeiro em
+um diretório local empacotado com o app (``nltk_data`` ao lado deste arquivo, ou
+``JOB_FIT_NLTK_DATA``). Nada é baixado nem carregado na importação: stopwords,
+stemmer e tokenizador são criados no primeiro uso e reaproveitados.
+
+Para empacotar os dados (no build da imagem, com rede)::
+
+    python nlp_resources.py download
+
+Para medir o tempo de importação de ``utils``::
+
+    python nlp_resources.py import-time
+"""
+import os
+import subprocess
+import sys
+from functools import lru_cache
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+NLTK_DATA_DIR = os.environ.get('JOB_FIT_NLTK_DATA', os.path.join(dir_path, 'nltk_data'))
+NLTK_RESOURCES = ('stopwords', 'punkt', 'punkt_tab', 'rslp')
+
+
+@lru_cache(maxsize=None)
+def _nltk():
+    """Importa o NLTK e prioriza o diretório de dados local."""
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(language='portuguese'):
+    """Stopwords do idioma como ``frozenset`` (carregadas uma única vez)."""
+    return frozenset(_nltk().corpus.stopwords.words(language))
+
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    """``RSLPStemmer`` compartilhado (as regras são lidas no primeiro uso)."""
+    from nltk.stem import RSLPStemmer
+
+    _nltk()
+    return RSLPStemmer()
+
+
+def word_tokenize(text, language='portuguese'):
+    """``nltk.word_tokenize`` usando os dados locais."""
+    return _nltk().word_tokenize(text, language=language)
+
+
+def download_resources(target_dir=NLTK_DATA_DIR):
+    """Baixa os recursos do NLTK para o diretório local (uso no build, não em produção)."""
+    import nltk
+
+    os.makedirs(target_dir, exist_ok=True)
+    for resource in NLTK_RESOURCES:
+        if not nltk.download(resource, download_dir=target_dir, quiet=True):
+            raise RuntimeError(f"Falha ao baixar o recurso NLTK '{resource}' para {target_dir}")
+    return target_dir
+
+
+def measure_import_time(module='utils'):
+    """
+    Mede, em um processo novo, o tempo de ``import <module>`` (em segundos).
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=dir_path, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'import-time'
+    if command == 'download':
+        print(f"Recursos NLTK salvos em {download_resources(*sys.argv[2:3])}")
+    elif command == 'import-time':
+        print(f"import utils: {measure_import_time():.3f}s")
+    else:
+        raise SystemExit(f"Comando desconhecido: {command} (use 'download' ou 'import-time')")
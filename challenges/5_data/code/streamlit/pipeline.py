@@ -0,0 +1,136 @@
+"""
+Pipeline paralelo de tokenização + TF-IDF do talent pool.
+
+Divide o talent pool em blocos (``chunk_size`` linhas) e distribui os blocos
+entre processos. Cada processo recebe o vetorizador já treinado uma única vez
+(no ``initializer`` do pool), tokeniza e aplica ``transform`` no seu bloco; os
+blocos voltam em ordem e são empilhados em uma única matriz esparsa, alinhada
+às linhas do DataFrame de entrada.
+
+Uso pela linha de comando::
+
+    python pipeline.py talent_pool.parquet talent_vectorizer.pkl talent_pool_vectors \
+        --text-column cv_pt --workers 8 --chunk-size 2000
+"""
+import argparse
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import pandas as pd
+from scipy import sparse
+
+import utils
+from sparse_store import save_sparse_matrix
+
+# Estado de cada processo do pool (preenchido por ``_init_worker``)
+_worker_vectorizer = None
+_worker_pretokenized_vectorizer = None
+
+
+def _identity_analyzer(tokens):
+    return tokens
+
+
+def _pretokenized_copy(vectorizer):
+    """
+    Cópia do vetorizador que recebe listas de tokens já processadas.
+
+    Só é usada quando o vetorizador foi treinado com ``utils.tokenizer``: nesse
+    caso ``PortugueseTokenizer.tokenize_many`` produz exatamente os mesmos tokens,
+    com a normalização feita em lote.
+    """
+    if vectorizer.tokenizer is not utils.tokenizer:
+        return None
+    if vectorizer.analyzer != 'word' or tuple(vectorizer.ngram_range) != (1, 1) or vectorizer.stop_words is not None:
+        return None
+
+    pretokenized = copy.deepcopy(vectorizer)
+    pretokenized.set_params(analyzer=_identity_analyzer)
+    return pretokenized
+
+
+def _init_worker(vectorizer):
+    global _worker_vectorizer, _worker_pretokenized_vectorizer
+    _worker_vectorizer = vectorizer
+    _worker_pretokenized_vectorizer = _pretokenized_copy(vectorizer)
+
+
+def _transform_chunk(texts):
+    """Tokeniza e vetoriza um bloco de textos no processo atual."""
+    texts = pd.Series(texts, dtype=object).fillna("")
+    if _worker_pretokenized_vectorizer is not None:
+        tokens = utils.get_tokenizer().tokenize_many(texts)
+        return sparse.csr_matrix(_worker_pretokenized_vectorizer.transform(tokens.tolist()))
+    return sparse.csr_matrix(_worker_vectorizer.transform(texts))
+
+
+def vectorize_talent_pool(df, vectorizer, text_column='cv_pt_cleaned', n_workers=None, chunk_size=2000):
+    """
+    Vetoriza o talent pool em paralelo com um vetorizador já treinado.
+
+    Parâmetros
+    ----------
+    df : pd.DataFrame
+        Talent pool.
+    vectorizer : TfidfVectorizer
+        Vetorizador já treinado (apenas ``transform`` é aplicado).
+    text_column : str, opcional, default='cv_pt_cleaned'
+        Coluna com o texto dos currículos.
+    n_workers : int, opcional
+        Número de processos. Padrão: ``os.cpu_count()``. Com 1, roda no processo atual.
+    chunk_size : int, opcional, default=2000
+        Linhas por bloco enviado a cada processo.
+
+    Retorno
+    -------
+    vector_matrix : scipy.sparse.csr_matrix
+        Matriz TF-IDF (n_linhas x n_features) na mesma ordem de ``df``.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    texts = df[text_column].astype(object).tolist()
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    if not chunks:
+        return sparse.csr_matrix((0, len(vectorizer.vocabulary_)))
+
+    if n_workers == 1 or len(chunks) == 1:
+        _init_worker(vectorizer)
+        matrices = [_transform_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(vectorizer,)) as executor:
+            # ``map`` devolve os blocos na ordem de envio: a ordem das linhas é preservada
+            matrices = list(executor.map(_transform_chunk, chunks))
+
+    return sparse.vstack(matrices, format='csr')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vetoriza o talent pool em paralelo (TF-IDF).')
+    parser.add_argument('input', help='Parquet do talent pool')
+    parser.add_argument('vectorizer', help='Vetorizador treinado (.pkl)')
+    parser.add_argument('output', help='Diretório de saída da matriz esparsa (sparse_store)')
+    parser.add_argument('--text-column', default='cv_pt_cleaned')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    # O vetorizador salvo referencia ``tokenizer`` do módulo principal
+    import __main__
+    __main__.tokenizer = utils.tokenizer
+
+    df = pd.read_parquet(args.input, columns=[args.text_column])
+    vectorizer = joblib.load(args.vectorizer)
+
+    start = time.perf_counter()
+    vector_matrix = vectorize_talent_pool(
+        df, vectorizer, text_column=args.text_column, n_workers=args.workers, chunk_size=args.chunk_size
+    )
+    save_sparse_matrix(vector_matrix, args.output, index=df.index, feature_names=vectorizer.get_feature_names_out())
+    print(f"{vector_matrix.shape[0]} linhas vetorizadas em {time.perf_counter() - start:.1f}s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
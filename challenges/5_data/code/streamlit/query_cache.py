@@ -0,0 +1,199 @@
+"""
+Cache de consultas repetidas (mesma descrição de vaga, filtros diferentes).
+
+As entradas são indexadas pelo hash do texto normalizado: textos que só diferem
+em caixa, acentos, pontuação ou espaços geram o mesmo vetor TF-IDF e reaproveitam
+a mesma entrada. Cada entrada guarda:
+
+- o vetor esparso (CSR) da vaga, já normalizado;
+- para cada assinatura de filtros, o ranking dos ``ranking_depth`` melhores
+  candidatos (posições e scores), sem ``min_score``.
+
+Como o ranking está em ordem decrescente de score, qualquer combinação de
+``top_n <= ranking_depth`` e ``min_score`` é um prefixo dele: mudar sliders não
+recalcula a similaridade. O cache é limitado (LRU) e é criado por versão do
+vetorizador/talent pool (``cache_version``). A mesma instância é compartilhada
+entre as sessões do Streamlit (``st.cache_resource``): os acessos às estruturas
+LRU são protegidos por um lock, e a vetorização e o ranking rodam fora dele.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils import get_tokenizer, job_description_matrix, tokenizer
+
+
+def cache_version(vectorizer, candidate_index):
+    """
+    Versão (hash) do par vetorizador + índice de candidatos.
+
+    Parâmetros
+    ----------
+    vectorizer : TfidfVectorizer
+        Vetorizador já treinado (vocabulário, idf e parâmetros de pré-processamento).
+    candidate_index : scipy.sparse.csr_matrix
+        Índice de candidatos servido (``utils.build_candidate_index``).
+
+    Retorno
+    -------
+    version : str
+    """
+    digest = hashlib.sha256()
+    params = {
+        name: repr(getattr(vectorizer, name, None))
+        for name in ('lowercase', 'ngram_range', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf')
+    }
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    vocabulary = sorted((term, int(column)) for term, column in vectorizer.vocabulary_.items())
+    digest.update(json.dumps(vocabulary, ensure_ascii=False).encode('utf-8'))
+    if hasattr(vectorizer, 'idf_'):
+        digest.update(np.ascontiguousarray(vectorizer.idf_).tobytes())
+
+    if candidate_index is not None:
+        digest.update(repr(candidate_index.shape).encode('utf-8'))
+        for array in (candidate_index.indptr, candidate_index.indices, candidate_index.data):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def filter_signature(equals=None, at_least=None, approximate=False):
+    """Assinatura (hashable) dos filtros usados em ``CandidateFilterIndex.select``."""
+    def _items(values):
+        return tuple(sorted((key, value) for key, value in (values or {}).items() if value is not None))
+    return _items(equals), _items(at_least), bool(approximate)
+
+
+class QueryCache:
+    """
+    Cache LRU de vetores de vaga e rankings por assinatura de filtros.
+    """
+
+    def __init__(self, max_queries=128, max_rankings_per_query=32, ranking_depth=20, version=None):
+        """
+        Parâmetros
+        ----------
+        max_queries : int, opcional, default=128
+            Número máximo de descrições de vaga distintas mantidas.
+        max_rankings_per_query : int, opcional, default=32
+            Número máximo de assinaturas de filtros guardadas por descrição.
+        ranking_depth : int, opcional, default=20
+            Tamanho do ranking guardado (o maior ``top_n`` do app).
+        version : str, opcional
+            Versão do vetorizador/talent pool (``cache_version``).
+        """
+        self.max_queries = max_queries
+        self.max_rankings_per_query = max_rankings_per_query
+        self.ranking_depth = ranking_depth
+        self.version = version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def normalize_text(text, vectorizer=None):
+        """
+        Texto normalizado usado na chave.
+
+        Com o tokenizador do app, aplica a mesma normalização do tokenizador (que
+        determina os tokens); com outro tokenizador, apenas colapsa os espaços.
+        """
+        text = "" if text is None else str(text)
+        if vectorizer is None or getattr(vectorizer, 'tokenizer', None) is tokenizer:
+            return get_tokenizer().normalize(text)
+        return " ".join(text.split())
+
+    def text_key(self, text, vectorizer=None):
+        """Hash (sha1) do texto normalizado."""
+        return hashlib.sha1(self.normalize_text(text, vectorizer).encode('utf-8')).hexdigest()
+
+    def _query_entry(self, text, vectorizer, n_features=None):
+        key = self.text_key(text, vectorizer)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None or (n_features is not None and entry['vector'].shape[1] != n_features):
+            # Vetorização fora do lock; se duas sessões criarem a mesma chave, a última fica
+            entry = {'vector': job_description_matrix(text, vectorizer, n_features), 'rankings': OrderedDict()}
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_queries:
+                    self._entries.popitem(last=False)
+        # A entrada continua válida para quem a recebeu mesmo se for removida do LRU depois
+        return entry
+
+    def query_vector(self, text, vectorizer, n_features=None):
+        """
+        Vetor da vaga (CSR 1 x n_features, normalizado), transformado uma única vez.
+        """
+        return self._query_entry(text, vectorizer, n_features)['vector']
+
+    def recommend(self, recommender, text, signature, top_n=10, min_score=None, row_ids=None):
+        """
+        Resultados de ``recommender.recommend_for_job_description`` com cache do ranking.
+
+        Parâmetros
+        ----------
+        recommender : utils.TalentRecommendationSystem
+            Sistema montado com o vetor de ``query_vector(text, ...)``.
+        text : str
+            Descrição de vaga (a mesma usada em ``query_vector``).
+        signature : tuple
+            Assinatura dos filtros (``filter_signature``); identifica ``row_ids``.
+        top_n, min_score, row_ids
+            Mesmos parâmetros de ``recommend_for_job_description``.
+
+        Retorno
+        -------
+        results : list of dict
+        """
+        entry = self._query_entry(text, recommender.vectorizer, recommender.candidate_index.shape[1])
+        rankings = entry['rankings']
+        with self._lock:
+            ranking = rankings.get(signature)
+            if ranking is not None and top_n <= ranking['depth']:
+                self.hits += 1
+                rankings.move_to_end(signature)
+            else:
+                ranking = None
+                self.misses += 1
+
+        if ranking is None:
+            depth = max(top_n, self.ranking_depth)
+            top_indices, top_scores = recommender.rank_candidates(top_n=depth, row_ids=row_ids)
+            ranking = {'depth': depth, 'indices': top_indices, 'scores': top_scores}
+            with self._lock:
+                rankings[signature] = ranking
+                rankings.move_to_end(signature)
+                while len(rankings) > self.max_rankings_per_query:
+                    rankings.popitem(last=False)
+
+        # Ranking decrescente: o resultado de (top_n, min_score) é um prefixo dele
+        top_indices, top_scores = ranking['indices'], ranking['scores']
+        if min_score is not None:
+            n_keep = int(np.count_nonzero(top_scores >= min_score))
+            top_indices, top_scores = top_indices[:n_keep], top_scores[:n_keep]
+        return recommender.build_results(top_indices[:top_n], top_scores[:top_n])
+
+    def stats(self):
+        """Tamanho e taxa de acerto do cache de rankings."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'queries': len(self._entries),
+                'rankings': sum(len(entry['rankings']) for entry in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
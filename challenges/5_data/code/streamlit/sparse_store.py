@@ -0,0 +1,230 @@
+"""
+Armazenamento dos vetores TF-IDF em formato esparso (CSR) no disco.
+
+Cada artefato é um diretório com os três vetores da matriz CSR em ``.npy``
+(``data``, ``indices`` e ``indptr``), um ``meta.json`` (formato, dimensões e
+vocabulário) e, opcionalmente, ``index.parquet`` com os rótulos das linhas.
+Arquivos ``.npy`` podem ser abertos com memory-map, então a carga não copia a
+matriz para a memória nem a densifica.
+
+Como o artefato pode estar mapeado por leitores, ele nunca é reescrito no
+lugar: cada gravação vai para um diretório irmão temporário e substitui o
+anterior com ``os.replace`` (``replace_directory``). Os leitores antigos seguem
+com os arquivos anteriores (desvinculados, não truncados) e uma gravação
+interrompida não mistura vetores novos e antigos.
+"""
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+FORMAT_VERSION = 1
+_ARRAYS = ('data', 'indices', 'indptr')
+
+
+def staging_path(path):
+    """Diretório temporário irmão de ``path`` (oculto e único por processo/thread)."""
+    parent, name = os.path.split(os.path.abspath(path))
+    return os.path.join(parent, f'.{name}.tmp-{os.getpid()}-{threading.get_ident()}')
+
+
+def replace_directory(tmp_path, path):
+    """
+    Troca o diretório ``path`` pelo ``tmp_path`` já completo.
+
+    O diretório anterior é renomeado e só então removido; arquivos que algum
+    leitor tenha mapeado continuam válidos até serem fechados.
+    """
+    retired = f'{tmp_path}.old'
+    if os.path.exists(path):
+        os.replace(path, retired)
+    os.replace(tmp_path, path)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def save_sparse_matrix(matrix, path, index=None, feature_names=None):
+    """
+    Salva uma matriz esparsa como artefato CSR.
+
+    Parâmetros
+    ----------
+    matrix : scipy.sparse matrix
+        Matriz a salvar (é convertida para CSR).
+    path : str
+        Diretório de saída (substituído de uma vez se já existir).
+    index : pd.Index ou sequência, opcional
+        Rótulos das linhas (ex.: ``df.index``).
+    feature_names : sequência de str, opcional
+        Vocabulário (``vectorizer.get_feature_names_out()``).
+
+    Retorno
+    -------
+    path : str
+        Diretório do artefato.
+    """
+    matrix = sparse.csr_matrix(matrix)
+    if index is not None and len(index) != matrix.shape[0]:
+        raise ValueError(f"index tem {len(index)} rótulos, mas a matriz tem {matrix.shape[0]} linhas")
+
+    tmp_path = staging_path(path)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        for name in _ARRAYS:
+            np.save(os.path.join(tmp_path, f'{name}.npy'), getattr(matrix, name))
+
+        if index is not None:
+            pd.DataFrame({'index': pd.Index(index)}).to_parquet(os.path.join(tmp_path, 'index.parquet'))
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'shape': list(matrix.shape),
+            'nnz': int(matrix.nnz),
+            'has_index': index is not None,
+            'feature_names': list(feature_names) if feature_names is not None else None,
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    replace_directory(tmp_path, path)
+    return path
+
+
+def read_meta(path):
+    """Lê o ``meta.json`` de um artefato."""
+    with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Versão de formato não suportada em {path}: {meta.get('format_version')}")
+    return meta
+
+
+def load_sparse_matrix(path, mmap=True):
+    """
+    Carrega um artefato CSR.
+
+    Parâmetros
+    ----------
+    path : str
+        Diretório do artefato.
+    mmap : bool, opcional, default=True
+        Abre os ``.npy`` com ``mmap_mode='r'`` (somente leitura, sem cópia).
+
+    Retorno
+    -------
+    matrix : scipy.sparse.csr_matrix
+        Matriz carregada.
+    index : pd.Index ou None
+        Rótulos das linhas, se foram salvos.
+    """
+    meta = read_meta(path)
+    arrays = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+        for name in _ARRAYS
+    }
+    matrix = sparse.csr_matrix(
+        (arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(meta['shape']), copy=False
+    )
+
+    index = None
+    if meta['has_index']:
+        index = pd.Index(pd.read_parquet(os.path.join(path, 'index.parquet'))['index'])
+    return matrix, index
+
+
+def combine_vector_batches(batch_paths, output_path):
+    """
+    Concatena (por linhas) artefatos de lotes em um único artefato, sem densificar.
+
+    Os vetores de saída são escritos com ``np.lib.format.open_memmap`` lote a
+    lote, então a memória usada é limitada ao maior lote.
+
+    Parâmetros
+    ----------
+    batch_paths : list of str
+        Diretórios dos lotes, na ordem das linhas.
+    output_path : str
+        Diretório do artefato combinado.
+
+    Retorno
+    -------
+    output_path : str
+        Diretório do artefato combinado.
+    """
+    metas = [read_meta(path) for path in batch_paths]
+    if not metas:
+        raise ValueError("Nenhum lote para combinar")
+
+    n_features = metas[0]['shape'][1]
+    for path, meta in zip(batch_paths, metas):
+        if meta['shape'][1] != n_features:
+            raise ValueError(f"Lote {path} tem {meta['shape'][1]} features, esperado {n_features}")
+
+    n_rows = sum(meta['shape'][0] for meta in metas)
+    nnz = sum(meta['nnz'] for meta in metas)
+
+    # Mesmo dtype de índices que o scipy escolheria: evita cópia ao abrir com mmap
+    index_dtype = np.int32 if max(nnz, n_features) < np.iinfo(np.int32).max else np.int64
+    data_dtype = np.load(os.path.join(batch_paths[0], 'data.npy'), mmap_mode='r').dtype
+
+    tmp_path = staging_path(output_path)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        out_data = np.lib.format.open_memmap(
+            os.path.join(tmp_path, 'data.npy'), mode='w+', dtype=data_dtype, shape=(nnz,)
+        )
+        out_indices = np.lib.format.open_memmap(
+            os.path.join(tmp_path, 'indices.npy'), mode='w+', dtype=index_dtype, shape=(nnz,)
+        )
+        out_indptr = np.lib.format.open_memmap(
+            os.path.join(tmp_path, 'indptr.npy'), mode='w+', dtype=index_dtype, shape=(n_rows + 1,)
+        )
+
+        indexes = []
+        row_offset, nnz_offset = 0, 0
+        out_indptr[0] = 0
+        for path in batch_paths:
+            matrix, index = load_sparse_matrix(path)
+            batch_rows, batch_nnz = matrix.shape[0], matrix.nnz
+
+            out_data[nnz_offset:nnz_offset + batch_nnz] = matrix.data
+            out_indices[nnz_offset:nnz_offset + batch_nnz] = matrix.indices
+            out_indptr[row_offset + 1:row_offset + batch_rows + 1] = np.asarray(matrix.indptr[1:]) + nnz_offset
+            indexes.append(index)
+
+            row_offset += batch_rows
+            nnz_offset += batch_nnz
+
+        for array in (out_data, out_indices, out_indptr):
+            array.flush()
+        del out_data, out_indices, out_indptr
+
+        has_index = all(index is not None for index in indexes)
+        if has_index:
+            combined_index = indexes[0].append(indexes[1:]) if len(indexes) > 1 else indexes[0]
+            pd.DataFrame({'index': combined_index}).to_parquet(os.path.join(tmp_path, 'index.parquet'))
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'shape': [n_rows, n_features],
+            'nnz': int(nnz),
+            'has_index': has_index,
+            'feature_names': metas[0]['feature_names'],
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    replace_directory(tmp_path, output_path)
+    print(f"Conjunto combinado salvo: ({n_rows}, {n_features}), nnz={nnz} -> {output_path}")
+    return output_path
@@ -0,0 +1,72 @@
+"""
+Versionamento da tabela servida pelo ``candidate_table``.
+
+A tabela só é carregada se foi gerada com o glossário e o talent pool atuais.
+
+Uso (a partir de ``code/streamlit``)::
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import candidate_table  # noqa: E402
+
+POOL = pd.DataFrame({
+    'nivel_profissional': ['Sênior', 'Júnior', None],
+    'nivel_ingles': ['Fluente', 'Básico', None],
+    'cv_pt': ['engenheiro de dados', 'analista', 'desenvolvedor'],
+})
+
+
+class ServingTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_path = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.work_path, 'talent_pool_final.parquet')
+        self.output_path = os.path.join(self.work_path, 'talent_pool_serving.parquet')
+        with open(candidate_table.DEFAULT_GLOSSARY_PATH, 'r', encoding='utf-8') as f:
+            self.glossary = json.load(f)
+        POOL.to_parquet(self.source_path)
+        candidate_table.build_serving_table(self.source_path, candidate_table.DEFAULT_GLOSSARY_PATH, self.output_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def load(self, glossary=None):
+        return candidate_table.load_serving_table(glossary or self.glossary, self.output_path, self.source_path)
+
+    def test_loads_current_table(self):
+        df = self.load()
+        self.assertEqual(len(df), len(POOL))
+        self.assertIn('seniority_level', df.columns)
+
+    def test_rejects_other_glossary(self):
+        glossary = {**self.glossary, 'idioma_nvl': {}}
+        self.assertIsNone(self.load(glossary))
+
+    def test_rejects_changed_source(self):
+        pd.concat([POOL, POOL.iloc[:1]], ignore_index=True).to_parquet(self.source_path)
+        self.assertIsNone(self.load())
+
+        # Mesmo tamanho, outra data de modificação
+        candidate_table.build_serving_table(self.source_path, candidate_table.DEFAULT_GLOSSARY_PATH, self.output_path)
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNone(self.load())
+
+    def test_missing_source_checks_glossary_only(self):
+        os.remove(self.source_path)
+        self.assertEqual(len(self.load()), len(POOL))
+
+
+if __name__ == '__main__':
+    unittest.main()
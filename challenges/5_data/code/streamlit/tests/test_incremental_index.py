@@ -0,0 +1,122 @@
+"""
+Testes do ``IncrementalTalentIndex`` (segmentos, tombstones e compactação).
+
+Os vetores são passados prontos (``vectorizer.transform``), então os testes não
+dependem do tokenizer nem da vetorização em processos do ``pipeline``.
+
+Uso (a partir de ``code/streamlit``)::
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental_index import IncrementalTalentIndex  # noqa: E402
+
+BASE = pd.DataFrame({
+    'prospect_code': ['P1', 'P2', 'P3', 'P4'],
+    'cv_pt': ['engenheiro de dados python', 'analista sap', 'desenvolvedor java spring', 'cientista de dados'],
+})
+
+
+class IncrementalTalentIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_path = tempfile.mkdtemp()
+        self.root = os.path.join(self.work_path, 'store')
+        self.vectorizer = TfidfVectorizer().fit(BASE['cv_pt'])
+        self.store = IncrementalTalentIndex.create(self.root, BASE, self.vectorizer, vectors=self.vectors(BASE))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def vectors(self, df):
+        return self.vectorizer.transform(df['cv_pt'])
+
+    def append(self, ids, texts):
+        df = pd.DataFrame({'prospect_code': ids, 'cv_pt': texts})
+        return self.store.append(df, vectors=self.vectors(df))
+
+    def live(self, manifest=None):
+        """``{id: (texto, vetor denso)}`` do snapshot."""
+        df, vectors = self.store.snapshot(manifest)
+        self.assertEqual(len(df), vectors.shape[0])
+        dense = vectors.toarray()
+        return {code: (text, dense[i]) for i, (code, text) in enumerate(zip(df['prospect_code'], df['cv_pt']))}
+
+    def assertSameLive(self, first, second):
+        self.assertEqual(sorted(first), sorted(second))
+        for code in first:
+            self.assertEqual(first[code][0], second[code][0])
+            np.testing.assert_allclose(first[code][1], second[code][1])
+
+    def test_updated_id_beats_base(self):
+        self.append(['P2', 'P5'], ['engenheiro de dados sap', 'analista java'])
+        live = self.live()
+
+        self.assertEqual(sorted(live), ['P1', 'P2', 'P3', 'P4', 'P5'])
+        self.assertEqual(live['P2'][0], 'engenheiro de dados sap')
+        expected = self.vectorizer.transform(['engenheiro de dados sap']).toarray()[0]
+        np.testing.assert_allclose(live['P2'][1], expected)
+        self.assertEqual(live['P1'][0], BASE['cv_pt'][0])
+
+    def test_tombstone_hides_id(self):
+        self.append(['P3'], ['desenvolvedor python'])
+        self.assertEqual(self.store.delete(['P1', 'P3']), 2)
+        self.assertEqual(sorted(self.live()), ['P2', 'P4'])
+
+        # Um segmento posterior ao tombstone traz o id de volta
+        self.append(['P1'], ['engenheiro de dados java'])
+        live = self.live()
+        self.assertEqual(sorted(live), ['P1', 'P2', 'P4'])
+        self.assertEqual(live['P1'][0], 'engenheiro de dados java')
+
+    def test_compaction_keeps_snapshot(self):
+        self.append(['P2', 'P5'], ['engenheiro de dados sap', 'analista java'])
+        self.store.delete(['P4'])
+        self.append(['P6', 'P5'], ['cientista python', 'analista java spring'])
+        before = self.live()
+
+        self.store.compact()
+        manifest = self.store.read_manifest()
+
+        self.assertEqual(len(manifest['segments']), 1)
+        self.assertEqual(manifest['tombstones'], [])
+        self.assertSameLive(before, self.live())
+        status = self.store.status()
+        self.assertEqual((status['delta_segments'], status['tombstones']), (0, 0))
+
+    def test_retired_files_removed_on_next_compaction(self):
+        self.append(['P5'], ['analista java'])
+        self.store.delete(['P1'])
+        old_manifest = self.store.read_manifest()
+        old_files = [entry['name'] for entry in old_manifest['segments'] + old_manifest['tombstones']]
+        expected = self.live(old_manifest)
+
+        self.store.compact()
+        self.assertEqual(sorted(self.store.read_manifest()['retired']), sorted(old_files))
+        for name in old_files:
+            self.assertTrue(os.path.exists(os.path.join(self.root, name)), name)
+        # Um leitor com o manifesto anterior ainda lê a geração dele
+        self.assertSameLive(expected, self.live(old_manifest))
+
+        first_base = self.store.read_manifest()['segments'][0]['name']
+        self.store.compact()
+        for name in old_files:
+            self.assertFalse(os.path.exists(os.path.join(self.root, name)), name)
+        self.assertTrue(os.path.exists(os.path.join(self.root, first_base)))
+        self.assertEqual(self.store.read_manifest()['retired'], [first_base])
+        self.assertSameLive(expected, self.live())
+
+
+if __name__ == '__main__':
+    unittest.main()
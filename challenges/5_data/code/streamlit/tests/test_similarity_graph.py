@@ -0,0 +1,61 @@
+"""
+Regravação do grafo kNN do ``compute_similarity_batched``.
+
+Uma nova execução no mesmo ``output_dir`` grava o grafo em um diretório novo e o
+troca de uma vez: o grafo aberto antes (memory-map) segue com os mesmos valores.
+
+Uso (a partir de ``code/streamlit``)::
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+
+
+class SimilarityGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_path = tempfile.mkdtemp()
+        self.candidates = sp.random(120, 40, density=0.2, format='csr', random_state=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def compute(self):
+        return utils.compute_similarity_batched(
+            self.candidates, top_k=5, batch_size_sim=50, output_dir=self.work_path,
+        )
+
+    def test_rerun_keeps_open_graph_valid(self):
+        graph_path = self.compute()
+        opened = utils.load_similarity_graph(graph_path)
+        expected = opened.copy()
+
+        # Sem os blocos, a segunda execução recalcula tudo e regrava o grafo
+        for name in os.listdir(self.work_path):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.work_path, name))
+        self.assertEqual(self.compute(), graph_path)
+
+        self.assertEqual((opened != expected).nnz, 0)
+        reloaded = utils.load_similarity_graph(graph_path)
+        self.assertEqual((reloaded != expected).nnz, 0)
+        self.assertEqual(
+            utils.similar_candidates(reloaded, 7), utils.similar_candidates(opened, 7),
+        )
+        self.assertFalse([name for name in os.listdir(self.work_path) if name.startswith('.')])
+        np.testing.assert_array_equal(np.diff(reloaded.indptr) <= 5, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Gravação do ``sparse_store`` sobre um artefato já existente.
+
+- um leitor com memory-map do artefato anterior continua lendo os mesmos
+  valores depois de uma nova gravação no mesmo caminho;
+- uma gravação interrompida deixa o artefato anterior intacto e não deixa
+  diretórios temporários para trás.
+
+Uso (a partir de ``code/streamlit``)::
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sparse_store  # noqa: E402
+
+
+def random_matrix(n_rows, seed):
+    return sp.random(n_rows, 50, density=0.1, format='csr', dtype=np.float32, random_state=seed)
+
+
+class SparseStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.work_path, 'vectors')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_path, ignore_errors=True)
+
+    def assertOnlyArtifact(self):
+        self.assertEqual(os.listdir(self.work_path), ['vectors'])
+
+    def test_mapped_reader_survives_new_save(self):
+        old = random_matrix(200, seed=0)
+        sparse_store.save_sparse_matrix(old, self.path, index=range(200))
+        mapped, _ = sparse_store.load_sparse_matrix(self.path)
+
+        new = random_matrix(20, seed=1)
+        sparse_store.save_sparse_matrix(new, self.path, index=range(20))
+
+        self.assertEqual((mapped != old).nnz, 0)
+        loaded, index = sparse_store.load_sparse_matrix(self.path)
+        self.assertEqual((loaded != new).nnz, 0)
+        self.assertEqual(list(index), list(range(20)))
+        self.assertOnlyArtifact()
+
+    def test_interrupted_save_keeps_previous(self):
+        old = random_matrix(100, seed=0)
+        sparse_store.save_sparse_matrix(old, self.path)
+
+        original_save = np.save
+        calls = []
+
+        def failing_save(file, array, *args, **kwargs):
+            calls.append(file)
+            if len(calls) == 2:
+                raise OSError('disco cheio')
+            return original_save(file, array, *args, **kwargs)
+
+        with mock.patch.object(sparse_store.np, 'save', side_effect=failing_save):
+            with self.assertRaises(OSError):
+                sparse_store.save_sparse_matrix(random_matrix(100, seed=1), self.path)
+
+        loaded, _ = sparse_store.load_sparse_matrix(self.path)
+        self.assertEqual((loaded != old).nnz, 0)
+        self.assertOnlyArtifact()
+
+    def test_combine_replaces_previous(self):
+        batches = [random_matrix(30, seed=seed) for seed in range(3)]
+        batch_paths = []
+        for i, batch in enumerate(batches):
+            batch_path = os.path.join(self.work_path, f'batch_{i}')
+            sparse_store.save_sparse_matrix(batch, batch_path, index=range(i * 30, (i + 1) * 30))
+            batch_paths.append(batch_path)
+
+        sparse_store.save_sparse_matrix(random_matrix(500, seed=9), self.path)
+        mapped, _ = sparse_store.load_sparse_matrix(self.path)
+        expected_old = mapped.copy()
+
+        sparse_store.combine_vector_batches(batch_paths, self.path)
+
+        self.assertEqual((mapped != expected_old).nnz, 0)
+        combined, index = sparse_store.load_sparse_matrix(self.path)
+        self.assertEqual((combined != sp.vstack(batches).tocsr()).nnz, 0)
+        self.assertEqual(list(index), list(range(90)))
+        for batch_path in batch_paths:
+            shutil.rmtree(batch_path)
+        self.assertOnlyArtifact()
+
+
+if __name__ == '__main__':
+    unittest.main()
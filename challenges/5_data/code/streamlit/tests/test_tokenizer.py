@@ -0,0 +1,69 @@
+"""
+Equivalência do ``PortugueseTokenizer`` com ``tokenizer_reference`` (``word_tokenize`` do NLTK).
+
+Uso (a partir de ``code/streamlit``)::
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+
+# Textos só com [a-z ] (caminho rápido do ``_split``), incluindo as contrações do NLTKWordTokenizer
+SIMPLE_CASES = [
+    "cannot",
+    "i cannot go",
+    "gonna wanna gotta lemme gimme",
+    "you wanna",
+    "wannabe cannotx scannot gonnabe",
+    "engenheiro de dados cannot trabalhar gonna aprender python wanna",
+    "",
+]
+
+TEXT_CASES = SIMPLE_CASES + [
+    "Engenheiro(a) de Dados Sênior - 5 anos com Python, SQL & Spark.",
+    "I cannot, gonna... WANNA go! Lemme 'twas d'ye",
+    None,
+]
+
+
+def _nltk_data_available():
+    try:
+        utils.tokenizer_reference("teste")
+    except LookupError:
+        return False
+    return True
+
+
+class SimpleSplitTest(unittest.TestCase):
+
+    def test_matches_nltk_word_tokenizer(self):
+        from nltk.tokenize import NLTKWordTokenizer
+
+        tokenizer = utils.PortugueseTokenizer.__new__(utils.PortugueseTokenizer)
+        tokenizer.language = "portuguese"
+        for text in SIMPLE_CASES:
+            with self.subTest(text=text):
+                self.assertIsNotNone(tokenizer._SIMPLE.fullmatch(text))
+                self.assertEqual(tokenizer._split(text, simple=True), NLTKWordTokenizer().tokenize(text))
+
+
+@unittest.skipUnless(_nltk_data_available(), "dados do NLTK (stopwords, rslp, punkt) indisponíveis")
+class TokenizerReferenceTest(unittest.TestCase):
+
+    def test_tokenizer_matches_reference(self):
+        for text in TEXT_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(utils.tokenizer(text), utils.tokenizer_reference(text))
+
+    def test_tokenize_many_matches_reference(self):
+        expected = [utils.tokenizer_reference(text) for text in TEXT_CASES]
+        self.assertEqual(utils.PortugueseTokenizer().tokenize_many(TEXT_CASES).tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,30 +1,18 @@
 import numpy as np
 import pandas as pd
 import re
-import nltk
-nltk.download("stopwords")
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-import random
 import time
 import string
 import unicodedata
-from sklearn.utils import shuffle
-from sklearn.model_selection import train_test_split
-from sklearn import svm
-from sklearn import metrics
-import multiprocessing
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel, cosine_similarity
-import glob
-
-nltk.download("punkt")
-nltk.download("punkt_tab")
-nltk.download('rslp')
-
-# inicializa stemmer
-from nltk.stem import RSLPStemmer
-stemmer = RSLPStemmer()
+from sklearn.preprocessing import normalize
+from scipy import sparse
+import json
+import os
+from functools import lru_cache
+
+# stopwords, stemmer e tokenizador do NLTK são carregados sob demanda, a partir
+# dos dados locais (ver nlp_resources.py); nada é baixado na importação
+from nlp_resources import get_stemmer, get_stopwords, word_tokenize
 
 # carregar modelo para português
 # nlp = spacy.load("pt_core_news_sm")
@@ -48,65 +36,384 @@ def normalize_str(text: str) -> str:
 #     doc = nlp(text)
 #     return " ".join([token.text for token in doc if token.ent_type_ != "PER"])
 
-def tokenizer(text: str):
-    stop_words_br = set(nltk.corpus.stopwords.words("portuguese"))
-    #stop_words_en = set(nltk.corpus.stopwords.words("english"))
+def tokenizer_reference(text: str):
+    """Tokenizador original (sem cache); mantido como referência para ``benchmark_tokenizer``"""
+    stop_words_br = set(get_stopwords("portuguese"))
+    #stop_words_en = set(get_stopwords("english"))
     if isinstance(text, str):
         text = normalize_str(text)                                              # normaliza string
         # text = remove_person_names(text)                                        # remove nomes
         tokens = word_tokenize(text, language="portuguese")                     # tokeniza para a lingua portuguesa
         tokens = [t for t in tokens if t not in stop_words_br and len(t) > 2]
         #tokens = [t for t in tokens if t not in stop_words_en and len(t) > 2]
-        tokens = [stemmer.stem(t) for t in tokens]                              # stemiza tokens
+        tokens = [get_stemmer().stem(t) for t in tokens]                        # stemiza tokens
         return tokens
     return None
 
+class PortugueseTokenizer:
+    """
+    Tokenizador de português com recursos pré-computados e cache de radicais.
+
+    Produz os mesmos tokens de ``tokenizer_reference``, mas:
+      - stopwords, tabela de pontuação e regex são montados uma única vez;
+      - os radicais (RSLP) ficam em um cache LRU limitado, indexado pelo token;
+      - ``tokenize_many`` normaliza um lote inteiro com operações vetorizadas do
+        pandas (``Series.str``) antes da stemização.
+    """
+
+    # Números e pontuação viram espaço em uma única passada (o espaço extra é colapsado depois)
+    _DIGITS_PUNCTUATION = re.compile(r"[\d" + re.escape(string.punctuation) + r"]+")
+    _DIGITS_PUNCTUATION_ARROW = r"[\p{Nd}" + re.escape(string.punctuation) + r"]+"
+    _SPACES = re.compile(r"\s+")
+    _SIMPLE = re.compile(r"[a-z ]*")
+    # Contrações sem apóstrofo que o NLTKWordTokenizer separa (MacIntyreContractions.CONTRACTIONS2);
+    # as demais regras do word_tokenize dependem de pontuação e não se aplicam a texto [a-z ]
+    _CONTRACTIONS = [
+        re.compile(r"\b(can)(not)\b"),
+        re.compile(r"\b(gim)(me)\b"),
+        re.compile(r"\b(gon)(na)\b"),
+        re.compile(r"\b(got)(ta)\b"),
+        re.compile(r"\b(lem)(me)\b"),
+        re.compile(r"\b(wan)(na)(?=\s)"),
+    ]
+
+    def __init__(self, stem_cache_size=200_000, language="portuguese"):
+        """
+        Parâmetros
+        ----------
+        stem_cache_size : int, opcional, default=200_000
+            Número máximo de tokens distintos mantidos no cache de radicais.
+        language : str, opcional, default="portuguese"
+            Idioma das stopwords e do ``word_tokenize``.
+        """
+        self.language = language
+        self.stop_words = get_stopwords(language)
+        self.stem = lru_cache(maxsize=stem_cache_size)(get_stemmer().stem)
+
+    def normalize(self, text: str) -> str:
+        """Mesmo resultado de ``normalize_str`` com regex e tabela pré-compiladas."""
+        text = self._DIGITS_PUNCTUATION.sub(" ", text.lower())
+        text = normalize_accents(text)
+        return self._SPACES.sub(" ", text).strip()
+
+    def _split(self, text: str, simple: bool):
+        # Texto só com [a-z ]: word_tokenize = separar contrações + separar por espaço
+        if simple:
+            text = f" {text} "
+            for contraction in self._CONTRACTIONS:
+                text = contraction.sub(r" \1 \2 ", text)
+            return text.split()
+        return word_tokenize(text, language=self.language)
+
+    def _filter_and_stem(self, tokens):
+        stop_words = self.stop_words
+        stem = self.stem
+        return [stem(t) for t in tokens if len(t) > 2 and t not in stop_words]
+
+    def __call__(self, text: str):
+        if isinstance(text, str):
+            text = self.normalize(text)
+            simple = self._SIMPLE.fullmatch(text) is not None
+            return self._filter_and_stem(self._split(text, simple))
+        return None
+
+    def tokenize_many(self, texts):
+        """
+        Tokeniza um lote de textos.
+
+        Parâmetros
+        ----------
+        texts : iterável de str ou pd.Series
+            Textos de entrada; valores que não são str resultam em ``None``.
+
+        Retorno
+        -------
+        tokens : pd.Series
+            Lista de tokens por texto, com o mesmo índice da entrada.
+        """
+        texts = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        is_text = texts.map(lambda value: isinstance(value, str))
+
+        # Kernels de string do Arrow para minúsculas/regex; NFKD + ASCII no caminho do Python
+        normalized = (
+            texts[is_text]
+            .astype("string[pyarrow]")
+            .str.lower()
+            .str.replace(self._DIGITS_PUNCTUATION_ARROW, " ", regex=True)
+            .astype(object)
+            .str.normalize("NFKD")
+            .str.encode("ascii", "ignore")
+            .str.decode("utf-8")
+            .astype("string[pyarrow]")
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip()
+        )
+        simple = normalized.str.fullmatch(self._SIMPLE.pattern)
+
+        tokens = [None] * len(texts)
+        positions = np.flatnonzero(is_text.to_numpy(dtype=bool))
+        for position, text, is_simple in zip(positions, normalized.tolist(), simple.tolist()):
+            tokens[position] = self._filter_and_stem(self._split(text, is_simple))
+        return pd.Series(tokens, index=texts.index, dtype=object)
+
+    def cache_info(self):
+        """Estatísticas do cache de radicais (hits, misses, tamanho)."""
+        return self.stem.cache_info()
+
+_default_tokenizer = None
+
+def get_tokenizer():
+    """Retorna o ``PortugueseTokenizer`` compartilhado (criado no primeiro uso)."""
+    global _default_tokenizer
+    if _default_tokenizer is None:
+        _default_tokenizer = PortugueseTokenizer()
+    return _default_tokenizer
+
+def tokenizer(text: str):
+    # Mantém a função no nível do módulo: o vetorizador salvo (pickle) referencia ``tokenizer``
+    return get_tokenizer()(text)
+
+def benchmark_tokenizer(texts, sample_size=None):
+    """
+    Compara o tempo do tokenizador original com ``PortugueseTokenizer.tokenize_many``.
+
+    Parâmetros
+    ----------
+    texts : pd.Series
+        Textos a tokenizar (ex.: ``df['cv_pt_cleaned']``).
+    sample_size : int, opcional
+        Usa apenas as primeiras ``sample_size`` linhas.
+
+    Retorno
+    -------
+    report : dict
+        Tempos em segundos, speedup e se as saídas são idênticas.
+    """
+    texts = pd.Series(texts)
+    if sample_size is not None:
+        texts = texts.iloc[:sample_size]
+
+    start = time.perf_counter()
+    reference = [tokenizer_reference(text) for text in texts]
+    reference_seconds = time.perf_counter() - start
+
+    fast_tokenizer = PortugueseTokenizer()
+    start = time.perf_counter()
+    fast = fast_tokenizer.tokenize_many(texts).tolist()
+    fast_seconds = time.perf_counter() - start
+
+    return {
+        'n_texts': len(texts),
+        'reference_seconds': reference_seconds,
+        'tokenize_many_seconds': fast_seconds,
+        'speedup': reference_seconds / fast_seconds if fast_seconds else float('inf'),
+        'identical_output': reference == fast,
+        'stem_cache': fast_tokenizer.cache_info()._asdict(),
+    }
+
 def tokenize_and_vectorize_fixed(df, fitted_vectorizer, filename_prefix, batch_idx):
-    """Transform batch using the pre-fitted vectorizer"""
+    """Transform batch using the pre-fitted vectorizer and save it as a sparse CSR artifact"""
+    from sparse_store import save_sparse_matrix
+
     # Transform (not fit_transform) to use existing vocabulary
     vector_matrix = fitted_vectorizer.transform(df["cv_pt_cleaned"].fillna(""))
-    
-    # Convert to DataFrame with consistent column names
-    df_tfidf = pd.DataFrame(
-        vector_matrix.toarray(), 
-        columns=fitted_vectorizer.get_feature_names_out(),
-        index=df.index  # Preserve original indices
+
+    # Save batch without densifying (data/indices/indptr + original indices)
+    output_path = f"{filename_prefix}_batch_{batch_idx}"
+    save_sparse_matrix(
+        vector_matrix,
+        output_path,
+        index=df.index,  # Preserve original indices
+        feature_names=fitted_vectorizer.get_feature_names_out(),
     )
-    
-    # Save batch
-    output_file = f"{filename_prefix}_batch_{batch_idx}.parquet"
-    df_tfidf.to_parquet(output_file)
-    print(f"Saved batch {batch_idx} with shape {df_tfidf.shape} to {output_file}")
-    
-    return df_tfidf
+    print(f"Saved batch {batch_idx} with shape {vector_matrix.shape} (nnz={vector_matrix.nnz}) to {output_path}")
+
+    return vector_matrix
+
+def _top_k_sparse_rows(scores, top_n, min_score=None, exclude_columns=None):
+    """
+    Seleciona os ``top_n`` maiores valores de cada linha de uma matriz CSR.
+
+    Parâmetros
+    ----------
+    scores : scipy.sparse.csr_matrix
+        Similaridades (linhas = consultas, colunas = candidatos).
+    top_n : int
+        Número de colunas mantidas por linha.
+    min_score : float, opcional
+        Descarta valores abaixo deste limiar antes da seleção.
+    exclude_columns : np.ndarray, opcional
+        Uma coluna por linha a ignorar (ex.: o próprio candidato).
+
+    Retorno
+    -------
+    iterador de (linha, colunas, valores)
+        Colunas e valores ordenados por valor decrescente (empate: menor coluna).
+    """
+    for row in range(scores.shape[0]):
+        row_start, row_end = scores.indptr[row], scores.indptr[row + 1]
+        row_indices = scores.indices[row_start:row_end]
+        row_scores = scores.data[row_start:row_end]
+
+        keep = None
+        if min_score is not None:
+            keep = row_scores >= min_score
+        if exclude_columns is not None:
+            not_excluded = row_indices != exclude_columns[row]
+            keep = not_excluded if keep is None else keep & not_excluded
+        if keep is not None:
+            row_indices, row_scores = row_indices[keep], row_scores[keep]
+
+        if top_n < row_scores.shape[0]:
+            partition = np.argpartition(-row_scores, top_n - 1)[:top_n]
+            row_indices, row_scores = row_indices[partition], row_scores[partition]
+
+        order = np.lexsort((row_indices, -row_scores))
+        yield row, row_indices[order], row_scores[order]
 
 # Step 4: Efficient similarity computation for large datasets
-def compute_similarity_batched(df_tfidf, batch_size_sim=500, output_prefix='similarity_batch'):
-    """Compute cosine similarity in batches to handle large datasets"""
-    from sklearn.metrics.pairwise import cosine_similarity
-    import numpy as np
-    
-    n_samples = len(df_tfidf)
-    print(f"Computing similarity for {n_samples} samples in batches of {batch_size_sim}")
-    
-    # Create similarity matrix in batches to manage memory
-    similarity_files = []
-    
+def compute_similarity_batched(candidate_index, top_k=20, min_similarity=None, batch_size_sim=500,
+                               output_dir='similarity_graph', output_prefix='similarity_batch', exclude_self=True):
+    """
+    Monta o grafo kNN candidato x candidato em blocos (esparso x esparso transposto).
+
+    Para cada bloco de ``batch_size_sim`` linhas calcula ``bloco @ índice.T`` e
+    guarda apenas os ``top_k`` vizinhos de cada linha (acima de ``min_similarity``),
+    em vez da matriz densa ``batch_size_sim x N``. Cada bloco é salvo em
+    ``output_dir`` assim que termina; ao rodar de novo com os mesmos parâmetros,
+    blocos já salvos são pulados (retomada após interrupção). Ao final os blocos
+    são reunidos em uma matriz CSR N x N salva com ``sparse_store``.
+
+    Parâmetros
+    ----------
+    candidate_index : scipy.sparse.csr_matrix ou pd.DataFrame
+        Índice de candidatos (``build_candidate_index``) ou DataFrame com ``vetor_cv``.
+    top_k : int, opcional, default=20
+        Vizinhos mantidos por candidato.
+    min_similarity : float, opcional
+        Similaridade mínima para manter uma aresta.
+    batch_size_sim : int, opcional, default=500
+        Linhas por bloco.
+    output_dir : str, opcional, default='similarity_graph'
+        Diretório dos blocos e do grafo final.
+    output_prefix : str, opcional, default='similarity_batch'
+        Prefixo dos arquivos.
+    exclude_self : bool, opcional, default=True
+        Não inclui o próprio candidato entre os vizinhos.
+
+    Retorno
+    -------
+    graph_path : str
+        Diretório do grafo kNN (abrir com ``load_similarity_graph``).
+    """
+    from sparse_store import save_sparse_matrix
+
+    if isinstance(candidate_index, pd.DataFrame):
+        candidate_index = build_candidate_index(candidate_index['vetor_cv'].values)
+    candidate_index = sparse.csr_matrix(candidate_index)
+
+    n_samples = candidate_index.shape[0]
+    print(f"Computing kNN graph (top_k={top_k}) for {n_samples} samples in batches of {batch_size_sim}")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Parâmetros da execução: só retoma blocos gerados com a mesma configuração
+    params = {
+        'n_samples': n_samples,
+        'n_features': candidate_index.shape[1],
+        'nnz': int(candidate_index.nnz),
+        'top_k': top_k,
+        'min_similarity': min_similarity,
+        'batch_size_sim': batch_size_sim,
+        'exclude_self': exclude_self,
+    }
+    params_file = os.path.join(output_dir, f'{output_prefix}_params.json')
+    if os.path.exists(params_file):
+        with open(params_file, 'r', encoding='utf-8') as f:
+            saved_params = json.load(f)
+        if saved_params != params:
+            raise ValueError(
+                f"{output_dir} contém blocos gerados com outros parâmetros ({saved_params}); "
+                f"use outro output_dir/output_prefix"
+            )
+    else:
+        with open(params_file, 'w', encoding='utf-8') as f:
+            json.dump(params, f)
+
+    candidate_index_t = candidate_index.T.tocsc()
+    batch_files = []
+
     for i in range(0, n_samples, batch_size_sim):
         batch_end = min(i + batch_size_sim, n_samples)
-        batch_data = df_tfidf.iloc[i:batch_end]
-        
-        # Compute similarity between this batch and ALL data
-        batch_similarity = cosine_similarity(batch_data, df_tfidf)
-        
-        # Save batch similarity
-        batch_file = f'/home/lucas-nunes/workspace/Postech/challenges/5_data/data/gold/{output_prefix}_{i}_{batch_end}.npy'
-        np.save(batch_file, batch_similarity)
-        similarity_files.append(batch_file)
-        
-        print(f"Computed similarity batch {i}-{batch_end}: {batch_similarity.shape}")
-    
-    return similarity_files
+        batch_file = os.path.join(output_dir, f'{output_prefix}_{i}_{batch_end}.npz')
+        batch_files.append(batch_file)
+
+        if os.path.exists(batch_file):
+            print(f"Skipping similarity batch {i}-{batch_end}: already computed")
+            continue
+
+        # Similaridade deste bloco com TODOS os candidatos, ainda esparsa
+        batch_similarity = (candidate_index[i:batch_end] @ candidate_index_t).tocsr()
+        exclude_columns = np.arange(i, batch_end) if exclude_self else None
+
+        rows, cols, values = [], [], []
+        for row, neighbours, scores in _top_k_sparse_rows(batch_similarity, top_k, min_similarity, exclude_columns):
+            rows.append(np.full(neighbours.shape[0], i + row, dtype=np.int64))
+            cols.append(neighbours.astype(np.int64))
+            values.append(scores)
+
+        # Escreve em arquivo temporário e renomeia: um bloco interrompido nunca fica pela metade
+        tmp_file = batch_file[:-len('.npz')] + '.tmp.npz'
+        np.savez(
+            tmp_file,
+            rows=np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64),
+            cols=np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64),
+            values=np.concatenate(values) if values else np.zeros(0),
+        )
+        os.replace(tmp_file, batch_file)
+
+        print(f"Computed similarity batch {i}-{batch_end}: {sum(len(v) for v in values)} edges")
+
+    # Reúne os blocos no grafo kNN final (CSR N x N)
+    rows, cols, values = [], [], []
+    for batch_file in batch_files:
+        with np.load(batch_file) as batch:
+            rows.append(batch['rows'])
+            cols.append(batch['cols'])
+            values.append(batch['values'])
+
+    knn_graph = sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_samples, n_samples),
+    )
+    # Grava em diretório novo e troca com os.replace: quem já abriu o grafo anterior (mmap) continua válido
+    graph_path = os.path.join(output_dir, f'{output_prefix}_knn')
+    save_sparse_matrix(knn_graph, graph_path)
+    print(f"kNN graph saved: {knn_graph.nnz} edges -> {graph_path}")
+
+    return graph_path
+
+def load_similarity_graph(graph_path):
+    """Abre (memory-map) o grafo kNN salvo por ``compute_similarity_batched``"""
+    from sparse_store import load_sparse_matrix
+
+    knn_graph, _ = load_sparse_matrix(graph_path)
+    return knn_graph
+
+def similar_candidates(knn_graph, candidate_idx, top_n=10):
+    """
+    Retorna os vizinhos mais similares de um candidato a partir do grafo kNN.
+
+    Retorno
+    -------
+    neighbours : list of tuple
+        Pares ``(índice do candidato, similaridade)`` em ordem decrescente.
+    """
+    row_start, row_end = knn_graph.indptr[candidate_idx], knn_graph.indptr[candidate_idx + 1]
+    neighbours = np.asarray(knn_graph.indices[row_start:row_end])
+    scores = np.asarray(knn_graph.data[row_start:row_end])
+    order = np.lexsort((neighbours, -scores))[:top_n]
+    return [(int(neighbours[i]), float(scores[i])) for i in order]
 
 def job_description_vector(cv_input, vectorizer):
 
@@ -121,20 +428,193 @@ def job_description_vector(cv_input, vectorizer):
     # Transformar usando o mesmo vetorizador (não aplicar fit, apenas transform)
     X_tfidf_input = vectorizer.transform(df_input[campo_vetor].fillna(""))
 
-    # Converter para formato de array e armazenar em um DataFrame
+    # Armazena o vetor (linha CSR 1 x n_features) sem densificar
     df_input_job_desc = pd.DataFrame({
-        'vetor_cv': [X_tfidf_input.toarray()[0]]  # Armazena o vetor completo
+        'vetor_cv': [X_tfidf_input[0]]
     })
     df_input_job_desc = df_input_job_desc.reset_index(drop=True)
     return df_input_job_desc
 
+def job_description_matrix(job_descriptions, vectorizer, n_features=None):
+    """
+    Vetoriza várias descrições de vaga em uma única chamada a ``vectorizer.transform``.
+
+    Parâmetros
+    ----------
+    job_descriptions : str, list of str ou pd.Series
+        Descrições de vaga.
+    vectorizer : TfidfVectorizer
+        Vetorizador já treinado.
+    n_features : int, opcional
+        Largura do índice de candidatos; as linhas são truncadas ou completadas.
+
+    Retorno
+    -------
+    job_matrix : scipy.sparse.csr_matrix
+        Matriz (n_vagas x n_features) com linhas normalizadas (L2).
+    """
+    if isinstance(job_descriptions, str):
+        job_descriptions = [job_descriptions]
+
+    job_matrix = sparse.csr_matrix(
+        vectorizer.transform(pd.Series(job_descriptions).fillna("")), dtype=np.float64
+    )
+    if n_features is not None:
+        job_matrix.resize((job_matrix.shape[0], n_features))
+    return normalize(job_matrix, norm='l2', copy=False)
+
+def build_candidate_index(vectors, n_features=None):
+    """
+    Monta o índice de candidatos como uma matriz CSR com linhas normalizadas (L2).
+
+    O índice é construído uma única vez (no carregamento do talent pool) e
+    reutilizado em todas as buscas: cada consulta passa a ser um único produto
+    matriz esparsa x vetor.
+
+    Parâmetros
+    ----------
+    vectors : sequência de np.ndarray ou matriz esparsa
+        Vetores TF-IDF dos candidatos (ex.: coluna ``vetor_cv``).
+    n_features : int, opcional
+        Número de features do vetorizador. Vetores maiores são truncados e
+        menores são completados com zeros, como na comparação com a vaga.
+
+    Retorno
+    -------
+    candidate_index : scipy.sparse.csr_matrix
+        Matriz (n_candidatos x n_features) com linhas de norma unitária.
+    """
+    if sparse.issparse(vectors):
+        candidate_index = sparse.csr_matrix(vectors, dtype=np.float64, copy=True)
+        if n_features is not None:
+            candidate_index.resize((candidate_index.shape[0], n_features))
+        return normalize(candidate_index, norm='l2', copy=False)
+
+    # Monta a CSR linha a linha para não materializar a matriz densa inteira
+    indptr = [0]
+    indices = []
+    data = []
+    width = 0
+    for vector in vectors:
+        vector = np.zeros(0) if vector is None else np.asarray(vector, dtype=np.float64).ravel()
+        if n_features is not None:
+            vector = vector[:n_features]
+        width = max(width, vector.shape[0])
+        nonzero = np.flatnonzero(vector)
+        indices.append(nonzero)
+        data.append(vector[nonzero])
+        indptr.append(indptr[-1] + nonzero.shape[0])
+
+    if n_features is not None:
+        width = n_features
+
+    candidate_index = sparse.csr_matrix(
+        (
+            np.concatenate(data) if data else np.zeros(0),
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+            np.asarray(indptr),
+        ),
+        shape=(len(indptr) - 1, width),
+    )
+    return normalize(candidate_index, norm='l2', copy=False)
+
+class CandidateFilterIndex:
+    """
+    Índice de atributos dos candidatos para filtrar a busca sem copiar o DataFrame.
+
+    Para campos categóricos guarda um bitset (``np.packbits``) por valor; para
+    níveis ordinais guarda um bitset cumulativo por limiar (``nível >= limiar``).
+    Uma consulta é a interseção (AND) dos bitsets e retorna as posições das
+    linhas que o motor de similaridade pontua diretamente.
+    """
+
+    def __init__(self, df,
+                 categorical_columns=('local', 'sexo', 'pcd'),
+                 ordinal_columns=('academic_level', 'english_level', 'spanish_level', 'seniority_level')):
+        """
+        Constrói os bitsets a partir do DataFrame padronizado de candidatos.
+
+        Parâmetros
+        ----------
+        df : pd.DataFrame
+            Candidatos padronizados (ex.: saída de ``standardize_candidate_data``).
+        categorical_columns : tuple of str
+            Colunas filtradas por igualdade.
+        ordinal_columns : tuple of str
+            Colunas numéricas filtradas por valor mínimo (``>=``).
+        """
+        self.n_rows = len(df)
+        self.categorical = {}
+        self.ordinal = {}
+
+        for column in categorical_columns:
+            if column not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[column])
+            self.categorical[column] = {
+                value: np.packbits(codes == code) for code, value in enumerate(uniques)
+            }
+
+        for column in ordinal_columns:
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy()
+            thresholds = np.unique(values)
+            self.ordinal[column] = (
+                thresholds,
+                [np.packbits(values >= threshold) for threshold in thresholds],
+            )
+
+    def _empty(self):
+        return np.packbits(np.zeros(self.n_rows, dtype=bool))
+
+    def select(self, equals=None, at_least=None):
+        """
+        Retorna as posições dos candidatos que atendem a todos os filtros.
+
+        Parâmetros
+        ----------
+        equals : dict, opcional
+            ``{coluna: valor}`` para filtros de igualdade (``None`` ignora o filtro).
+        at_least : dict, opcional
+            ``{coluna: nível mínimo}`` para filtros ordinais (``None`` ignora o filtro).
+
+        Retorno
+        -------
+        row_ids : np.ndarray
+            Posições (ordenadas) das linhas selecionadas.
+        """
+        bitsets = []
+
+        for column, value in (equals or {}).items():
+            if value is None:
+                continue
+            bitsets.append(self.categorical.get(column, {}).get(value, self._empty()))
+
+        for column, level in (at_least or {}).items():
+            if level is None:
+                continue
+            if column not in self.ordinal:
+                bitsets.append(self._empty())
+                continue
+            thresholds, masks = self.ordinal[column]
+            # Menor limiar armazenado que satisfaz ``>= level``
+            position = np.searchsorted(thresholds, level, side='left')
+            bitsets.append(masks[position] if position < len(masks) else self._empty())
+
+        if not bitsets:
+            return np.arange(self.n_rows)
+
+        selected = np.bitwise_and.reduce(bitsets) if len(bitsets) > 1 else bitsets[0]
+        return np.flatnonzero(np.unpackbits(selected, count=self.n_rows))
+
 class TalentRecommendationSystem:
     """
     Classe para recomendação de candidatos com base em similaridade de texto
     utilizando vetores TF-IDF e similaridade do cosseno.
     """
 
-    def __init__(self, df_tfidf, df_tfidf_input, vectorizer):
+    def __init__(self, df_tfidf, df_tfidf_input, vectorizer, candidate_index=None, ann_index=None):
         """
         Inicializa o sistema de recomendação.
 
@@ -146,67 +626,211 @@ class TalentRecommendationSystem:
             DataFrame contendo o vetor TF-IDF da descrição de vaga.
         vectorizer : TfidfVectorizer
             Vetorizador usado para transformar os textos.
+        candidate_index : scipy.sparse.csr_matrix, opcional
+            Índice pré-construído com ``build_candidate_index``, alinhado às
+            linhas de ``df_tfidf``. Se omitido, é montado a partir de ``vetor_cv``.
+        ann_index : ann.ApproximateCandidateIndex, opcional
+            Índice aproximado sobre ``candidate_index``. Quando informado, buscas
+            sem filtro pontuam apenas os candidatos das listas visitadas.
         """
         self.df_tfidf = df_tfidf
         self.df_tfidf_input = df_tfidf_input
         self.vectorizer = vectorizer
         self.similarity_cache = {}
 
-    def recommend_for_job_description(self, top_n=10):
+        if candidate_index is None:
+            job_vector = self.df_tfidf_input['vetor_cv'].values[0]
+            candidate_index = build_candidate_index(
+                self.df_tfidf['vetor_cv'].values, n_features=job_vector.shape[-1]
+            )
+        self.candidate_index = candidate_index
+        self.ann_index = ann_index
+
+    def _job_vector(self):
+        """Retorna o vetor da vaga como CSR (1 x n_features) normalizado (L2)."""
+        job_vector = self.df_tfidf_input['vetor_cv'].values[0]
+        if sparse.issparse(job_vector):
+            job_vector = sparse.csr_matrix(job_vector, dtype=np.float64, copy=True)
+        else:
+            job_vector = sparse.csr_matrix(np.asarray(job_vector, dtype=np.float64).reshape(1, -1))
+
+        # Força o vetor da vaga ao tamanho do índice (trunca ou completa com zeros)
+        job_vector.resize((1, self.candidate_index.shape[1]))
+        return normalize(job_vector, norm='l2', copy=False)
+
+    def rank_candidates(self, top_n=10, min_score=None, row_ids=None):
         """
-        Encontra os candidatos mais similares a uma descrição de vaga.
+        Ordena os candidatos pela similaridade com a descrição de vaga.
 
         Parâmetros
         ----------
         top_n : int, opcional, default=10
             Número de candidatos a retornar.
+        min_score : float, opcional
+            Similaridade mínima para que o candidato seja retornado.
+        row_ids : np.ndarray, opcional
+            Posições dos candidatos a pontuar (ex.: ``CandidateFilterIndex.select``).
+            Se omitido, pontua todo o talent pool.
+
+        Retorno
+        -------
+        top_indices : np.ndarray
+            Posições dos candidatos, em ordem decrescente de similaridade.
+        top_scores : np.ndarray
+            Similaridade do cosseno de cada candidato.
+        """
+        job_vector = self._job_vector()
+
+        # Pontua apenas as linhas selecionadas pelos filtros (ou as visitadas pelo ANN)
+        candidate_index = self.candidate_index
+        candidates = np.arange(candidate_index.shape[0])
+        if row_ids is None and self.ann_index is not None:
+            row_ids = self.ann_index.candidates(job_vector)
+        if row_ids is not None:
+            candidates = np.asarray(row_ids, dtype=np.int64)
+            candidate_index = candidate_index[candidates]
+
+        # Linhas normalizadas: o produto escalar já é a similaridade do cosseno
+        similarities = (candidate_index @ job_vector.T).toarray().ravel()
+
+        # Descarta candidatos abaixo do score mínimo antes de selecionar
+        scores = similarities
+        if min_score is not None:
+            keep = np.flatnonzero(similarities >= min_score)
+            candidates, scores = candidates[keep], similarities[keep]
+
+        # Seleção parcial dos top_n (O(N)) e ordenação apenas dos sobreviventes
+        if top_n < scores.shape[0]:
+            partition = np.argpartition(-scores, top_n - 1)[:top_n]
+            candidates, scores = candidates[partition], scores[partition]
+        order = np.argsort(-scores, kind='stable')
+        return candidates[order], scores[order]
+
+    def build_results(self, top_indices, top_scores):
+        """
+        Monta os dicionários de resultado para candidatos já ordenados.
 
         Retorno
         -------
         results : list of dict
-            Lista de dicionários com informações dos candidatos recomendados.
+            Um dicionário por candidato, na ordem de ``top_indices``.
         """
-        from sklearn.metrics.pairwise import cosine_similarity
-        
-        # Obtém o vetor da vaga e garante o formato correto
-        job_vector = self.df_tfidf_input['vetor_cv'].values[0]
-        if len(job_vector.shape) == 1:
-            job_vector = job_vector.reshape(1, -1)
-            
-        # Obtém os vetores dos candidatos e garante o formato correto
-        candidate_vectors = np.vstack([v for v in self.df_tfidf['vetor_cv'].values])
-        
-        # Force candidate_vectors to fit job_vector size
-        job_vector_size = job_vector.shape[1]
-        candidate_vector_size = candidate_vectors.shape[1]
-        
-        if job_vector_size != candidate_vector_size:
-            if job_vector_size < candidate_vector_size:
-                # Truncate candidate vectors to match job vector size
-                candidate_vectors = candidate_vectors[:, :job_vector_size]
-            else:
-                # Pad candidate vectors with zeros to match job vector size
-                padding = np.zeros((candidate_vectors.shape[0], job_vector_size - candidate_vector_size))
-                candidate_vectors = np.hstack([candidate_vectors, padding])
-        
-        # Calcula a similaridade com todos os candidatos
-        similarities = cosine_similarity(job_vector, candidate_vectors)[0]
-
-        # Seleciona os melhores candidatos
-        top_indices = np.argsort(similarities)[::-1][:top_n]
-        top_scores = similarities[top_indices]
-
-        # Monta os resultados
+        # Monta os resultados com uma única leitura das colunas necessárias
+        df_top = self.df_tfidf.iloc[top_indices]
+        columns = {}
+        for column in ('nivel_profissional', 'area_atuacao', 'nivel_academico', 'cv_pt'):
+            default = '' if column == 'cv_pt' else 'N/A'
+            columns[column] = df_top[column].tolist() if column in df_top.columns else [default] * len(df_top)
+
         results = []
-        for idx, score in zip(top_indices, top_scores):
+        for i, (idx, score) in enumerate(zip(top_indices, top_scores)):
             candidate_info = {
                 'index': int(idx),
                 'match_score': float(score),
-                'nivel_profissional': self.df_tfidf.iloc[idx].get('nivel_profissional', 'N/A'),
-                'area_atuacao': self.df_tfidf.iloc[idx].get('area_atuacao', 'N/A'),
-                'nivel_academico': self.df_tfidf.iloc[idx].get('nivel_academico', 'N/A'),
-                'conhecimentos_preview': str(self.df_tfidf.iloc[idx].get('cv_pt', ''))[:200] + '...'
+                'nivel_profissional': columns['nivel_profissional'][i],
+                'area_atuacao': columns['area_atuacao'][i],
+                'nivel_academico': columns['nivel_academico'][i],
+                'conhecimentos_preview': str(columns['cv_pt'][i])[:200] + '...'
             }
             results.append(candidate_info)
 
-        return results
\ No newline at end of file
+        return results
+
+    def recommend_for_job_description(self, top_n=10, min_score=None, row_ids=None):
+        """
+        Encontra os candidatos mais similares a uma descrição de vaga.
+
+        Parâmetros
+        ----------
+        top_n : int, opcional, default=10
+            Número de candidatos a retornar.
+        min_score : float, opcional
+            Similaridade mínima para que o candidato seja retornado.
+        row_ids : np.ndarray, opcional
+            Posições dos candidatos a pontuar (ex.: ``CandidateFilterIndex.select``).
+            Se omitido, pontua todo o talent pool.
+
+        Retorno
+        -------
+        results : list of dict
+            Lista de dicionários com informações dos candidatos recomendados,
+            ordenada pela similaridade (decrescente).
+        """
+        top_indices, top_scores = self.rank_candidates(top_n=top_n, min_score=min_score, row_ids=row_ids)
+        return self.build_results(top_indices, top_scores)
+
+def match_job_descriptions(job_descriptions, vectorizer, candidate_index, df_candidates=None,
+                           top_n=10, min_score=None, block_size=256, text_column='job_description',
+                           id_column=None, candidate_columns=('nivel_profissional', 'area_atuacao', 'nivel_academico')):
+    """
+    Recomenda candidatos para várias vagas de uma vez (vagas x talent pool inteiro).
+
+    As descrições são vetorizadas em uma única chamada e pontuadas em blocos de
+    ``block_size`` vagas com produto esparso x esparso; de cada linha do bloco são
+    mantidos apenas os ``top_n`` melhores (``np.argpartition``). Candidatos com
+    similaridade zero não são retornados.
+
+    Parâmetros
+    ----------
+    job_descriptions : list of str, pd.Series ou pd.DataFrame
+        Descrições das vagas. Para DataFrame, o texto é lido de ``text_column``.
+    vectorizer : TfidfVectorizer
+        Vetorizador já treinado.
+    candidate_index : scipy.sparse.csr_matrix
+        Índice de candidatos (``build_candidate_index``).
+    df_candidates : pd.DataFrame, opcional
+        Talent pool alinhado ao índice; usado para anexar ``candidate_columns``.
+    top_n : int, opcional, default=10
+        Número de candidatos por vaga.
+    min_score : float, opcional
+        Similaridade mínima para que o candidato seja retornado.
+    block_size : int, opcional, default=256
+        Número de vagas pontuadas por bloco (limita a memória intermediária).
+    text_column : str, opcional
+        Coluna de texto quando ``job_descriptions`` é um DataFrame.
+    id_column : str, opcional
+        Coluna de identificação da vaga no DataFrame; por padrão usa a posição.
+    candidate_columns : tuple of str, opcional
+        Colunas de ``df_candidates`` copiadas para o resultado.
+
+    Retorno
+    -------
+    df_matches : pd.DataFrame
+        Uma linha por (vaga, candidato) com ``vaga``, ``rank``, ``index``,
+        ``match_score`` e as ``candidate_columns`` disponíveis.
+    """
+    if isinstance(job_descriptions, pd.DataFrame):
+        job_ids = job_descriptions[id_column].to_numpy() if id_column else np.arange(len(job_descriptions))
+        job_descriptions = job_descriptions[text_column]
+    else:
+        if isinstance(job_descriptions, str):
+            job_descriptions = [job_descriptions]
+        job_ids = np.arange(len(job_descriptions))
+
+    job_matrix = job_description_matrix(job_descriptions, vectorizer, n_features=candidate_index.shape[1])
+    candidate_index_t = candidate_index.T.tocsc()
+
+    vagas, ranks, indices, scores = [], [], [], []
+    for start in range(0, job_matrix.shape[0], block_size):
+        block_scores = (job_matrix[start:start + block_size] @ candidate_index_t).tocsr()
+
+        for row, row_indices, row_scores in _top_k_sparse_rows(block_scores, top_n, min_score):
+            vagas.append(np.repeat(job_ids[start + row], row_indices.shape[0]))
+            ranks.append(np.arange(1, row_indices.shape[0] + 1))
+            indices.append(row_indices)
+            scores.append(row_scores)
+
+    df_matches = pd.DataFrame({
+        'vaga': np.concatenate(vagas) if vagas else np.array([], dtype=job_ids.dtype),
+        'rank': np.concatenate(ranks) if ranks else np.array([], dtype=np.int64),
+        'index': np.concatenate(indices).astype(np.int64) if indices else np.array([], dtype=np.int64),
+        'match_score': np.concatenate(scores) if scores else np.array([], dtype=np.float64),
+    })
+
+    if df_candidates is not None:
+        df_top = df_candidates.iloc[df_matches['index'].to_numpy()]
+        for column in candidate_columns:
+            if column in df_top.columns:
+                df_matches[column] = df_top[column].to_numpy()
+
+    return df_matches